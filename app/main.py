@@ -8,11 +8,36 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from starlette.routing import Match
 import time
 import os
 
 from app.routes.analyze import router as analyze_router
-from app.services.database import connect_to_mongo, close_mongo_connection
+from app.routes.matching import router as matching_router
+from app.routes.jobs import router as jobs_router
+from app.routes.metrics import router as metrics_router
+from app.services.database import (
+    connect_to_mongo,
+    close_mongo_connection,
+    rebuild_rollups_if_empty,
+    reconcile_statistics_if_missing,
+    start_statistics_reconciler,
+    stop_statistics_reconciler,
+    start_write_behind,
+    stop_write_behind
+)
+from app.services.llm_service import close_llm_client
+from app.services.match_index import load_match_indexes, compact_match_indexes
+from app.services.near_duplicates import rebuild_near_duplicate_index
+from app.services.job_queue import start_job_workers, stop_job_workers
+from app.services.metrics import (
+    start_request_timing,
+    format_server_timing,
+    http_request_duration,
+    http_requests,
+    http_errors
+)
 
 # Configure logging
 logging.basicConfig(
@@ -36,6 +61,16 @@ async def lifespan(app: FastAPI):
     # Connect to MongoDB
     logger.info("🗄️  Initializing MongoDB...")
     await connect_to_mongo()
+    await rebuild_rollups_if_empty()
+    await reconcile_statistics_if_missing()
+    await rebuild_near_duplicate_index()
+    start_statistics_reconciler()
+    start_write_behind()
+    start_job_workers()
+    
+    # Load the top-k matching indexes
+    logger.info("🎯 Loading match indexes...")
+    await run_in_threadpool(load_match_indexes)
     
     # Verify OpenAI API key
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -50,7 +85,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down application...")
+    await stop_job_workers()
+    await run_in_threadpool(compact_match_indexes)
+    await stop_write_behind()
+    await stop_statistics_reconciler()
     await close_mongo_connection()
+    await close_llm_client()
     logger.info("✅ Application shutdown complete")
 
 
@@ -78,20 +118,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browsers read the history pagination cursor and stage timings
+    expose_headers=["X-Next-Cursor", "Location", "Server-Timing"],
 )
 
 logger.info(f"✓ CORS enabled for: {origins}")
 
 
 # Request/Response logging middleware
+def route_template(request: Request) -> str:
+    """
+    Get the path template of the route serving a request, e.g.
+    /api/v1/analyses/{analysis_id}, to keep metric label cardinality bounded.
+    """
+    for route in app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """
     Log all incoming requests and responses.
-    Useful for debugging and monitoring.
+    Records request metrics and reports stage durations in Server-Timing.
     """
     
     start_time = time.time()
+    timings = start_request_timing()
+    route = route_template(request)
     
     # Log request
     logger.debug(f"📨 {request.method} {request.url.path}")
@@ -100,11 +156,22 @@ async def log_requests(request: Request, call_next):
         response = await call_next(request)
     except Exception as e:
         logger.error(f"❌ Request failed: {str(e)}")
+        http_requests.labels(method=request.method, route=route, status="500").inc()
+        http_errors.labels(method=request.method, route=route, status="500").inc()
         raise
     
     # Calculate processing time
     process_time = time.time() - start_time
+    status = str(response.status_code)
+    http_request_duration.labels(method=request.method, route=route).observe(process_time)
+    http_requests.labels(method=request.method, route=route, status=status).inc()
+    if response.status_code >= 400:
+        http_errors.labels(method=request.method, route=route, status=status).inc()
+    
     response.headers["X-Process-Time"] = str(process_time)
+    # Streaming responses only cover the stages before the first byte
+    response.headers["Server-Timing"] = format_server_timing(timings, process_time)
+    response.headers["Timing-Allow-Origin"] = ", ".join(origins)
     
     # Log response
     logger.debug(f"📤 {request.method} {request.url.path} - {response.status_code} ({process_time:.3f}s)")
@@ -132,6 +199,9 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # Include API routes
 app.include_router(analyze_router)
+app.include_router(matching_router)
+app.include_router(jobs_router)
+app.include_router(metrics_router)
 
 
 # Health check endpoint
@@ -3,8 +3,8 @@ Pydantic models and schemas for request/response validation.
 Ensures type safety and automatic API documentation with OpenAPI.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, HttpUrl, model_validator
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
@@ -23,6 +23,28 @@ class AnalyzeRequest(BaseModel):
         min_length=50, 
         description="The full text of the job description"
     )
+    callback_url: Optional[HttpUrl] = Field(
+        None,
+        description="URL that receives the finished job as a POST (async=true only)"
+    )
+    backend: Optional[str] = Field(
+        None,
+        max_length=50,
+        description="LLM backend to use (openai, local, stub); routed by priority when omitted"
+    )
+    high_priority: bool = Field(
+        False,
+        description="Analyze with the stronger escalation backend directly, skipping the cheaper first pass"
+    )
+    previous_analysis_id: Optional[str] = Field(
+        None,
+        max_length=24,
+        description="ID of the analysis of the previous revision of this resume against the same job description; only changed sections are re-analyzed"
+    )
+    track_revisions: bool = Field(
+        False,
+        description="Store the resume with the analysis so later revisions can pass its ID as previous_analysis_id; implied by previous_analysis_id"
+    )
 
     class Config:
         json_schema_extra = {
@@ -33,6 +55,23 @@ class AnalyzeRequest(BaseModel):
         }
 
 
+class RevisionInfo(BaseModel):
+    """
+    Position of an analysis in the revision chain of a resume.
+    """
+    number: int = Field(..., ge=1, description="Revision number, 1 for the first analysis")
+    mode: Literal["full", "delta", "unchanged"] = Field(
+        ...,
+        description="full for a complete analysis, delta when only changed sections were re-analyzed, unchanged when the resume did not change"
+    )
+    previous_analysis_id: Optional[str] = Field(None, description="Analysis of the previous revision")
+    root_analysis_id: Optional[str] = Field(None, description="First analysis of the chain; unset on the first analysis itself")
+    changed_sections: List[str] = Field(
+        default_factory=list,
+        description="Headings of the sections changed since the previous revision"
+    )
+
+
 class AnalyzeResponse(BaseModel):
     """
     Response model containing analysis results from LLM.
@@ -56,6 +95,22 @@ class AnalyzeResponse(BaseModel):
         None,
         description="MongoDB document ID for this analysis result"
     )
+    cached: bool = Field(
+        False,
+        description="Whether the result was served from the analysis cache"
+    )
+    approximate: bool = Field(
+        False,
+        description="Whether the result was reused from the analysis of a near-identical resume and job description"
+    )
+    reused_previous: bool = Field(
+        False,
+        description="Whether the result was copied from the previous revision because the resume did not change; no analysis ran"
+    )
+    revision: Optional[RevisionInfo] = Field(
+        None,
+        description="Revision chain of the analysis, when revision tracking is enabled"
+    )
 
     class Config:
         json_schema_extra = {
@@ -65,11 +120,221 @@ class AnalyzeResponse(BaseModel):
                 "improvement_suggestions": [
                     "Add Docker containerization experience",
                     "Highlight cloud deployment projects"
+                ],
+                "cached": False
+            }
+        }
+
+
+class SkillMatchResponse(BaseModel):
+    """
+    Response model for local skill matching.
+    Skills are canonical taxonomy names in order of first mention in the JD.
+    """
+    required_skills: List[str] = Field(
+        default_factory=list,
+        description="Skills mentioned in the job description"
+    )
+    matched_skills: List[str] = Field(
+        default_factory=list,
+        description="Required skills also mentioned in the resume"
+    )
+    missing_skills: List[str] = Field(
+        default_factory=list,
+        description="Required skills not mentioned in the resume"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "required_skills": ["Python", "Kubernetes", "Terraform"],
+                "matched_skills": ["Python"],
+                "missing_skills": ["Kubernetes", "Terraform"]
+            }
+        }
+
+
+class BatchAnalyzeRequest(BaseModel):
+    """
+    Request model for batch analysis.
+    Accepts either one resume and many job descriptions,
+    or many resumes and one job description.
+    """
+    resume_text: Optional[str] = Field(
+        None,
+        description="A single resume compared against every job description"
+    )
+    resume_texts: Optional[List[str]] = Field(
+        None,
+        min_length=1,
+        max_length=5000,
+        description="Many resumes compared against a single job description"
+    )
+    job_description_text: Optional[str] = Field(
+        None,
+        description="A single job description compared against every resume"
+    )
+    job_description_texts: Optional[List[str]] = Field(
+        None,
+        min_length=1,
+        max_length=5000,
+        description="Many job descriptions compared against a single resume"
+    )
+    max_parallelism: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Upper bound on concurrent analyses for this batch"
+    )
+    mode: Literal["llm", "fast"] = Field(
+        "llm",
+        description="llm for full LLM analysis, fast for local vectorized scoring"
+    )
+    backend: Optional[str] = Field(
+        None,
+        max_length=50,
+        description="LLM backend to use in llm mode; routed by the batch priority when omitted"
+    )
+
+    @model_validator(mode="after")
+    def check_batch_shape(self) -> "BatchAnalyzeRequest":
+        """Ensure exactly one side of the comparison is a list and the size fits the mode."""
+        one_resume_many_jds = self.resume_text is not None and self.job_description_texts is not None
+        many_resumes_one_jd = self.resume_texts is not None and self.job_description_text is not None
+        
+        if one_resume_many_jds == many_resumes_one_jd or (
+            self.resume_texts is not None and self.job_description_texts is not None
+        ):
+            raise ValueError(
+                "Provide either resume_text with job_description_texts, "
+                "or resume_texts with job_description_text"
+            )
+        
+        items = len(self.resume_texts or self.job_description_texts)
+        if self.mode == "llm" and items > 200:
+            raise ValueError("LLM batches are limited to 200 items; use mode=fast for larger batches")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "resume_text": "Senior Software Engineer with 5 years experience in Python...",
+                "job_description_texts": [
+                    "We are looking for a Python developer with FastAPI experience...",
+                    "Backend engineer needed with Django and PostgreSQL skills..."
                 ]
             }
         }
 
 
+class BatchItemResult(BaseModel):
+    """
+    Outcome of a single item in a batch analysis.
+    Exactly one of result and error is set.
+    """
+    index: int = Field(..., description="Position of the item in the request list")
+    result: Optional[AnalyzeResponse] = Field(None, description="Analysis result on success")
+    error: Optional[str] = Field(None, description="Error message on failure")
+
+
+class BatchAnalyzeResponse(BaseModel):
+    """
+    Response model for batch analysis, with results in input order.
+    """
+    total: int = Field(..., description="Number of items in the batch")
+    succeeded: int = Field(..., description="Number of items analyzed successfully")
+    failed: int = Field(..., description="Number of items that failed")
+    results: List[BatchItemResult] = Field(default_factory=list)
+
+
+class JobAcceptedResponse(BaseModel):
+    """
+    Response model for an analysis accepted as an asynchronous job.
+    """
+    job_id: str = Field(..., description="Identifier of the job")
+    status: str = Field("queued", description="Initial job status")
+    status_url: str = Field(..., description="URL to poll for the job status and result")
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Status of an asynchronous analysis job.
+    The result is set once the job has succeeded, the error once it has failed.
+    """
+    job_id: str = Field(..., description="Identifier of the job")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(..., description="Job status")
+    attempts: int = Field(0, description="Number of times a worker has picked up the job")
+    created_at: datetime = Field(..., description="When the job was submitted")
+    updated_at: datetime = Field(..., description="When the job last changed")
+    completed_at: Optional[datetime] = Field(None, description="When the job finished")
+    result: Optional[AnalyzeResponse] = Field(None, description="Analysis result of a succeeded job")
+    error: Optional[str] = Field(None, description="Error message of a failed job")
+    callback_status: Optional[str] = Field(None, description="Callback delivery status (delivered, failed or rejected)")
+
+
+class IndexDocumentRequest(BaseModel):
+    """
+    Request model for registering a resume or job description in the match index.
+    """
+    item_id: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=128,
+        description="Identifier of the document; generated when omitted. Re-using an ID replaces the document."
+    )
+    text: str = Field(
+        ...,
+        min_length=50,
+        description="The full text of the resume or job description"
+    )
+
+
+class IndexDocumentResponse(BaseModel):
+    """
+    Response model for a registered document.
+    """
+    item_id: str = Field(..., description="Identifier of the document")
+    kind: str = Field(..., description="Index the document belongs to (resumes or jobs)")
+    documents: int = Field(..., description="Number of documents in the index")
+
+
+class MatchRequest(BaseModel):
+    """
+    Request model for top-k matching against the index.
+    """
+    text: str = Field(
+        ...,
+        min_length=50,
+        description="Resume text (to find jobs) or job description text (to find resumes)"
+    )
+    k: int = Field(10, ge=1, le=100, description="Number of candidates to return")
+    rerank: bool = Field(
+        False,
+        description="Re-rank the candidates with a full LLM analysis of each pair"
+    )
+
+
+class MatchCandidate(BaseModel):
+    """
+    A single candidate returned by the match index.
+    """
+    item_id: str = Field(..., description="Identifier of the matched document")
+    similarity: float = Field(..., description="Cosine similarity to the query")
+    analysis: Optional[AnalyzeResponse] = Field(
+        None,
+        description="LLM analysis of the pair, when re-ranking was requested"
+    )
+    error: Optional[str] = Field(None, description="Error message if re-ranking this pair failed")
+
+
+class MatchResponse(BaseModel):
+    """
+    Response model for top-k matching, best candidate first.
+    """
+    kind: str = Field(..., description="Index that was searched (resumes or jobs)")
+    reranked: bool = Field(False, description="Whether candidates were re-ranked by the LLM")
+    candidates: List[MatchCandidate] = Field(default_factory=list)
+
+
 class AnalysisResult(BaseModel):
     """
     Database model for storing analysis results with metadata.
@@ -80,6 +345,7 @@ class AnalysisResult(BaseModel):
     improvement_suggestions: List[str]
     resume_length: int  # Character count of resume
     jd_length: int  # Character count of job description
+    revision: Optional[RevisionInfo] = None  # Revision chain, for LLM analyses
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
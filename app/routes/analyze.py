@@ -3,19 +3,67 @@ API routes for resume-JD matching analysis.
 Defines all endpoints for the FastAPI application.
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, List, Dict, Literal, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import json
+import math
 import logging
+from bson.objectid import ObjectId
 
-from app.models.schemas import AnalyzeRequest, AnalyzeResponse, ErrorResponse, AnalysisResult
-from app.services.llm_service import analyze_resume_vs_jd
+from app.models.schemas import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    ErrorResponse,
+    AnalysisResult,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    BatchItemResult,
+    JobAcceptedResponse,
+    SkillMatchResponse
+)
+from app.services.analysis_service import (
+    run_analysis,
+    run_batch_analysis,
+    run_fast_batch_analysis,
+    stream_analysis,
+    analysis_flight
+)
+from app.services.cache import get_cache_stats
+from app.services.profiles import get_profile_stats
+from app.services.near_duplicates import get_near_duplicate_stats
+from app.services.revisions import run_revision_analysis, new_revision, get_revision_stats
+from app.services.skills import match_skills
+from app.services.fast_scorer import fast_analyze
+from app.services.llm_service import (
+    quota_scheduler,
+    llm_resilience,
+    llm_backends,
+    select_backend,
+    default_backend_name,
+    backend_routes,
+    escalation_routes
+)
+from app.services.cascade import escalation_band
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.resilience import CircuitOpenError
+from app.services.metrics import stage
 from app.services.database import (
+    build_analysis_document,
     save_analysis_result,
+    save_analysis_results_bulk,
     get_analysis_by_id,
     get_all_analyses,
+    get_revision_chain,
     delete_analysis,
-    get_statistics
+    get_statistics,
+    get_rollup_buckets,
+    enqueue_job,
+    write_behind_queue
 )
+from app.services.job_queue import notify_job_enqueued, validate_callback_url
+from app.services.rollups import summarize_buckets, choose_granularity
 
 logger = logging.getLogger(__name__)
 
@@ -30,24 +78,173 @@ router = APIRouter(
 )
 
 
+def retry_later_error(status_code: int, error: Exception) -> HTTPException:
+    """
+    Build a 429/503 response for an analysis the LLM cannot serve right now.
+    
+    Args:
+        status_code: 429 for exhausted quota, 503 for an open circuit
+        error: RateLimitExceeded or CircuitOpenError carrying retry_after
+        
+    Returns:
+        HTTPException: Error with a Retry-After header
+    """
+    return HTTPException(
+        status_code=status_code,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
+def validate_analyze_request(request: AnalyzeRequest) -> Tuple[str, str]:
+    """
+    Strip and validate the texts of an analysis request.
+    
+    Args:
+        request: AnalyzeRequest containing resume_text and job_description_text
+        
+    Returns:
+        Tuple[str, str]: Stripped resume text and job description text
+        
+    Raises:
+        HTTPException: If either text is too short after stripping
+    """
+    resume_text = request.resume_text.strip()
+    jd_text = request.job_description_text.strip()
+    
+    if not resume_text or len(resume_text) < 50:
+        logger.warning("❌ Invalid resume: too short")
+        raise HTTPException(
+            status_code=400,
+            detail="Resume must be at least 50 characters long"
+        )
+    
+    if not jd_text or len(jd_text) < 50:
+        logger.warning("❌ Invalid job description: too short")
+        raise HTTPException(
+            status_code=400,
+            detail="Job description must be at least 50 characters long"
+        )
+    
+    return resume_text, jd_text
+
+
+def validate_backend(name: Optional[str], priority: str) -> None:
+    """
+    Check that a requested LLM backend exists before work is queued or streamed.
+    
+    Args:
+        name: Backend named by the request, if any
+        priority: Quota priority class the analysis will run in
+    
+    Raises:
+        HTTPException: If the backend does not exist
+    """
+    try:
+        select_backend(name, priority)
+    except ValueError as e:
+        logger.warning(f"❌ {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+
+def validate_analysis_id(analysis_id: str) -> None:
+    """
+    Check that an analysis ID is a well-formed MongoDB document ID.
+    
+    Args:
+        analysis_id: ID given by the client
+    
+    Raises:
+        HTTPException: If the ID is malformed
+    """
+    if not ObjectId.is_valid(analysis_id):
+        logger.warning(f"❌ Invalid analysis ID: {analysis_id}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid analysis ID: {analysis_id}"
+        )
+
+
+async def load_previous_analysis(analysis_id: str) -> Dict:
+    """
+    Fetch the analysis a revised resume is compared with.
+    
+    Args:
+        analysis_id: previous_analysis_id of the request
+    
+    Returns:
+        Dict: Stored analysis, including its revision data
+    
+    Raises:
+        HTTPException: If the ID is malformed or the analysis does not exist
+    """
+    validate_analysis_id(analysis_id)
+    previous = await get_analysis_by_id(analysis_id)
+    if not previous:
+        logger.warning(f"⚠️ Previous analysis not found: {analysis_id}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"Analysis with ID {analysis_id} not found"
+        )
+    return previous
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a Server-Sent Events message.
+    
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        
+    Returns:
+        str: SSE message terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post(
     "/analyze",
     response_model=AnalyzeResponse,
     summary="Analyze resume against job description",
-    description="Compare a resume with a job description and get match analysis, missing skills, and improvement suggestions."
+    description="Compare a resume with a job description and get match analysis, missing skills, and improvement suggestions. With async=true the analysis is queued and 202 is returned with a job ID to poll. With previous_analysis_id, only the resume sections changed since that analysis (stored with track_revisions) are re-analyzed.",
+    responses={202: {"model": JobAcceptedResponse}}
 )
-async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
+async def analyze(
+    request: AnalyzeRequest,
+    mode: Literal["llm", "fast"] = Query(
+        "llm",
+        description="llm for full LLM analysis, fast for local scoring without an OpenAI call"
+    ),
+    async_: bool = Query(
+        False,
+        alias="async",
+        description="Queue the analysis as a job and return 202 immediately (llm mode only)"
+    )
+) -> AnalyzeResponse:
     """
     Main endpoint for resume-JD matching analysis.
     
     Accepts resume and job description text, sends to OpenAI for analysis,
-    and stores results in MongoDB.
+    and stores results in MongoDB. In fast mode the result comes from the
+    local vectorized scorer instead of OpenAI. In async mode the analysis
+    is queued for the job workers; the result is available from
+    GET /jobs/{job_id} and, if callback_url is set, POSTed to it. With
+    track_revisions, the resume is stored with the analysis; a later
+    request passing its ID as previous_analysis_id is diffed against it
+    and linked into its revision chain.
     
     Args:
         request: AnalyzeRequest containing resume_text and job_description_text
+        mode: Scoring mode, "llm" (default) or "fast"
+        async_: Whether to queue the analysis as a job
         
     Returns:
-        AnalyzeResponse: Match percentage, missing skills, and suggestions
+        AnalyzeResponse: Match percentage, missing skills, and suggestions,
+        or a 202 response with the job ID in async mode
         
     Raises:
         HTTPException: If validation fails or API error occurs
@@ -57,35 +254,70 @@ async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
         logger.info("🔄 Processing analysis request...")
         
         # Input validation (additional to Pydantic validation)
-        resume_text = request.resume_text.strip()
-        jd_text = request.job_description_text.strip()
+        with stage("validation"):
+            resume_text, jd_text = validate_analyze_request(request)
         
-        if not resume_text or len(resume_text) < 50:
-            logger.warning("❌ Invalid resume: too short")
+        if (request.previous_analysis_id or request.track_revisions) and (async_ or mode != "llm"):
             raise HTTPException(
                 status_code=400,
-                detail="Resume must be at least 50 characters long"
+                detail="previous_analysis_id and track_revisions are only available for synchronous LLM analysis"
             )
         
-        if not jd_text or len(jd_text) < 50:
-            logger.warning("❌ Invalid job description: too short")
-            raise HTTPException(
-                status_code=400,
-                detail="Job description must be at least 50 characters long"
+        if async_:
+            if mode != "llm":
+                raise HTTPException(
+                    status_code=400,
+                    detail="async mode is only available for LLM analysis"
+                )
+            
+            # Jobs run in the batch priority class
+            validate_backend(request.backend, "batch")
+            callback_url = str(request.callback_url) if request.callback_url else None
+            if callback_url:
+                await validate_callback_url(callback_url)
+            job_id = await enqueue_job(resume_text, jd_text, callback_url, request.backend, request.high_priority)
+            notify_job_enqueued()
+            
+            status_url = f"{router.prefix}/jobs/{job_id}"
+            accepted = JobAcceptedResponse(job_id=job_id, status_url=status_url)
+            return JSONResponse(
+                status_code=202,
+                content=accepted.model_dump(),
+                headers={"Location": status_url}
             )
         
-        # Call LLM service for analysis
-        logger.debug("📊 Calling LLM service for analysis...")
-        analysis_result = analyze_resume_vs_jd(resume_text, jd_text)
+        revision = None
+        if mode == "fast":
+            logger.debug("⚡ Scoring with the local fast scorer...")
+            analysis_result, cached = fast_analyze(resume_text, jd_text), False
+        elif request.previous_analysis_id:
+            # Re-analyze only what changed since the previous revision
+            previous = await load_previous_analysis(request.previous_analysis_id)
+            analysis_result, cached, revision = await run_revision_analysis(
+                resume_text, jd_text, previous, backend=request.backend, high_priority=request.high_priority
+            )
+        else:
+            # Call LLM service for analysis (served from cache when possible)
+            logger.debug("📊 Calling LLM service for analysis...")
+            analysis_result, cached = await run_analysis(
+                resume_text, jd_text, backend=request.backend, high_priority=request.high_priority
+            )
+            # The resume is stored for later revisions only when the client asks for it
+            if request.track_revisions:
+                revision = new_revision(resume_text, jd_text)
         
-        # Save result to MongoDB
+        # Save result to MongoDB (cache hits are recorded in history too)
         logger.debug("💾 Saving analysis result to MongoDB...")
         analysis_id = await save_analysis_result(
             match_percentage=analysis_result["match_percentage"],
             missing_skills=analysis_result["missing_skills"],
             improvement_suggestions=analysis_result["improvement_suggestions"],
             resume_length=len(resume_text),
-            jd_length=len(jd_text)
+            jd_length=len(jd_text),
+            cached=cached,
+            mode=mode,
+            near_duplicate=analysis_result.get("near_duplicate"),
+            revision=revision
         )
         
         logger.info(f"✅ Analysis complete and saved with ID: {analysis_id}")
@@ -94,7 +326,11 @@ async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
         response = AnalyzeResponse(
             match_percentage=analysis_result["match_percentage"],
             missing_skills=analysis_result["missing_skills"],
-            improvement_suggestions=analysis_result["improvement_suggestions"]
+            improvement_suggestions=analysis_result["improvement_suggestions"],
+            cached=cached,
+            approximate=analysis_result.get("approximate", False),
+            reused_previous=analysis_result.get("reused_previous", False),
+            revision=revision
         )
         # Add analysis_id to response
         response.analysis_id = analysis_id
@@ -103,6 +339,12 @@ async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
+    except RateLimitExceeded as e:
+        logger.warning(f"⏳ Analysis rejected by quota scheduler: {str(e)}")
+        raise retry_later_error(429, e)
+    except CircuitOpenError as e:
+        logger.warning(f"🔌 Analysis rejected by circuit breaker: {str(e)}")
+        raise retry_later_error(503, e)
     except ValueError as e:
         logger.warning(f"❌ Validation error: {str(e)}")
         raise HTTPException(
@@ -116,32 +358,273 @@ async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
             detail="An error occurred during analysis. Please try again later."
         )
 
+@router.post(
+    "/analyze/stream",
+    summary="Analyze with streamed results",
+    description="Same analysis as /analyze, streamed as Server-Sent Events: match_percentage first, then one missing_skill and one improvement_suggestion event per item, and a final complete event carrying the analysis_id.",
+    response_class=StreamingResponse
+)
+async def analyze_stream(request: AnalyzeRequest) -> StreamingResponse:
+    """
+    Streaming endpoint for resume-JD matching analysis.
+    
+    Each field is sent as soon as the model has generated it. Once the
+    stream finishes, the result is stored in MongoDB and a complete event
+    with the full result and its analysis_id is sent. Failures after the
+    stream has started are reported as an error event.
+    
+    Args:
+        request: AnalyzeRequest containing resume_text and job_description_text
+        
+    Returns:
+        StreamingResponse: text/event-stream response
+        
+    Raises:
+        HTTPException: If validation fails
+    """
+    with stage("validation"):
+        resume_text, jd_text = validate_analyze_request(request)
+        validate_backend(request.backend, "interactive")
+        if request.previous_analysis_id or request.track_revisions:
+            raise HTTPException(
+                status_code=400,
+                detail="previous_analysis_id and track_revisions are only available for synchronous LLM analysis"
+            )
+    
+    async def event_stream():
+        cached = False
+        analysis_result = None
+        try:
+            logger.info("🔄 Processing streaming analysis request...")
+            async for event, payload in stream_analysis(resume_text, jd_text, request.backend, request.high_priority):
+                if event == "cached":
+                    cached = payload
+                elif event == "result":
+                    analysis_result = payload
+                else:
+                    yield format_sse(event, {"value": payload})
+            
+            analysis_id = await save_analysis_result(
+                match_percentage=analysis_result["match_percentage"],
+                missing_skills=analysis_result["missing_skills"],
+                improvement_suggestions=analysis_result["improvement_suggestions"],
+                resume_length=len(resume_text),
+                jd_length=len(jd_text),
+                cached=cached
+            )
+            logger.info(f"✅ Streamed analysis complete and saved with ID: {analysis_id}")
+            
+            response = AnalyzeResponse(
+                match_percentage=analysis_result["match_percentage"],
+                missing_skills=analysis_result["missing_skills"],
+                improvement_suggestions=analysis_result["improvement_suggestions"],
+                analysis_id=analysis_id,
+                cached=cached
+            )
+            yield format_sse("complete", response.model_dump())
+            
+        except RateLimitExceeded as e:
+            logger.warning(f"⏳ Streaming analysis rejected by quota scheduler: {str(e)}")
+            yield format_sse("error", {
+                "status_code": 429,
+                "detail": str(e),
+                "retry_after": math.ceil(e.retry_after)
+            })
+        except CircuitOpenError as e:
+            logger.warning(f"🔌 Streaming analysis rejected by circuit breaker: {str(e)}")
+            yield format_sse("error", {
+                "status_code": 503,
+                "detail": str(e),
+                "retry_after": math.ceil(e.retry_after)
+            })
+        except ValueError as e:
+            logger.warning(f"❌ Validation error: {str(e)}")
+            yield format_sse("error", {"status_code": 400, "detail": str(e)})
+        except Exception as e:
+            logger.error(f"❌ Unexpected error in streaming analysis: {str(e)}")
+            yield format_sse("error", {
+                "status_code": 500,
+                "detail": "An error occurred during analysis. Please try again later."
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post(
+    "/analyze/batch",
+    response_model=BatchAnalyzeResponse,
+    summary="Analyze in batch",
+    description="Compare one resume against many job descriptions, or many resumes against one job description. Results are returned in input order; a failing item does not fail the batch."
+)
+async def analyze_batch(request: BatchAnalyzeRequest) -> BatchAnalyzeResponse:
+    """
+    Batch endpoint for resume-JD matching analysis.
+    
+    Fans the pairs out concurrently under the batch parallelism cap (or
+    scores them all at once in fast mode) and persists all successful
+    results with a single bulk insert.
+    
+    Args:
+        request: BatchAnalyzeRequest with one side of the comparison as a list
+        
+    Returns:
+        BatchAnalyzeResponse: Per-item results or errors in input order
+        
+    Raises:
+        HTTPException: If the backend does not exist or an unexpected error occurs
+    """
+    if request.mode == "llm":
+        validate_backend(request.backend, "batch")
+    
+    try:
+        if request.job_description_texts is not None:
+            resume_text = request.resume_text.strip()
+            pairs = [(resume_text, jd_text.strip()) for jd_text in request.job_description_texts]
+        else:
+            jd_text = request.job_description_text.strip()
+            pairs = [(resume_text.strip(), jd_text) for resume_text in request.resume_texts]
+        
+        logger.info(f"🔄 Processing {request.mode} batch analysis request with {len(pairs)} items...")
+        if request.mode == "fast":
+            outcomes = run_fast_batch_analysis(pairs)
+        else:
+            outcomes = await run_batch_analysis(pairs, request.max_parallelism, request.backend)
+        
+        items: List[BatchItemResult] = []
+        documents = []
+        for index, ((resume_text, jd_text), outcome) in enumerate(zip(pairs, outcomes)):
+            if isinstance(outcome, BaseException):
+                logger.warning(f"⚠️ Batch item {index} failed: {str(outcome)}")
+                error = str(outcome) if isinstance(outcome, (ValueError, RateLimitExceeded, CircuitOpenError)) else \
+                    "An error occurred during analysis. Please try again later."
+                items.append(BatchItemResult(index=index, error=error))
+                continue
+            
+            analysis_result, cached = outcome
+            documents.append(build_analysis_document(
+                match_percentage=analysis_result["match_percentage"],
+                missing_skills=analysis_result["missing_skills"],
+                improvement_suggestions=analysis_result["improvement_suggestions"],
+                resume_length=len(resume_text),
+                jd_length=len(jd_text),
+                cached=cached,
+                mode=request.mode,
+                near_duplicate=analysis_result.get("near_duplicate")
+            ))
+            items.append(BatchItemResult(
+                index=index,
+                result=AnalyzeResponse(
+                    match_percentage=analysis_result["match_percentage"],
+                    missing_skills=analysis_result["missing_skills"],
+                    improvement_suggestions=analysis_result["improvement_suggestions"],
+                    cached=cached,
+                    approximate=analysis_result.get("approximate", False)
+                )
+            ))
+        
+        # Persist all successful results in one round trip
+        try:
+            analysis_ids = iter(await save_analysis_results_bulk(documents))
+            for item in items:
+                if item.result is not None:
+                    item.result.analysis_id = next(analysis_ids)
+        except Exception as e:
+            logger.error(f"❌ Batch results could not be saved: {str(e)}")
+        
+        succeeded = len(documents)
+        logger.info(f"✅ Batch complete: {succeeded}/{len(items)} succeeded")
+        return BatchAnalyzeResponse(
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            results=items
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in batch analysis: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred during batch analysis. Please try again later."
+        )
+
+
+@router.post(
+    "/skills/match",
+    response_model=SkillMatchResponse,
+    summary="Match skills locally",
+    description="Find the job description skills missing from a resume using the local skill taxonomy, without calling the LLM."
+)
+async def match_resume_skills(request: AnalyzeRequest) -> SkillMatchResponse:
+    """
+    Deterministic skill matching against the skill taxonomy.
+    
+    Args:
+        request: AnalyzeRequest containing resume_text and job_description_text
+        
+    Returns:
+        SkillMatchResponse: Required, matched and missing skills
+    """
+    resume_text, jd_text = validate_analyze_request(request)
+    
+    try:
+        return SkillMatchResponse(**match_skills(resume_text, jd_text))
+        
+    except Exception as e:
+        logger.error(f"❌ Error matching skills: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to match skills"
+        )
+
+
 @router.get(
     "/analyses",
     response_model=List[AnalysisResult],
     summary="Get analysis history",
-    description="Retrieve all stored analysis results with pagination support."
+    description="Retrieve stored analysis results, newest first. Pass the X-Next-Cursor header of a page as cursor to get the next page."
 )
 async def get_analyses_history(
+    response: Response,
     limit: int = Query(50, ge=1, le=100, description="Maximum results to return"),
-    skip: int = Query(0, ge=0, description="Number of results to skip")
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated: number of results to skip; ignored when cursor is set")
 ) -> List[AnalysisResult]:
     """
     Get analysis history from MongoDB.
     
     Args:
+        response: Response used to return the next-page cursor header
         limit: Maximum number of results (default 50)
-        skip: Number of results to skip for pagination (default 0)
+        cursor: Opaque cursor of the next page (from X-Next-Cursor)
+        skip: Number of results to skip, kept for backward compatibility
         
     Returns:
         List[AnalysisResult]: List of analysis results
     """
     try:
-        logger.info(f"📚 Fetching analyses history (limit={limit}, skip={skip})...")
-        results = await get_all_analyses(limit=limit, skip=skip)
+        logger.info(f"📚 Fetching analyses history (limit={limit}, cursor={cursor}, skip={skip})...")
+        results, next_cursor = await get_all_analyses(limit=limit, skip=skip, cursor=cursor)
+        
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        
         logger.info(f"✅ Retrieved {len(results)} analyses")
         return results
         
+    except ValueError as e:
+        logger.warning(f"❌ Invalid pagination request: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ Error fetching analyses: {str(e)}")
         raise HTTPException(
@@ -193,6 +676,50 @@ async def get_analysis(analysis_id: str) -> AnalysisResult:
         )
 
 
+@router.get(
+    "/analyses/{analysis_id}/revisions",
+    response_model=List[AnalysisResult],
+    summary="Get the revision chain of an analysis",
+    description="Retrieve every analysis in the revision chain of an analysis, first revision first."
+)
+async def get_analysis_revisions(analysis_id: str) -> List[AnalysisResult]:
+    """
+    Get the revision chain an analysis belongs to.
+    
+    Args:
+        analysis_id: MongoDB document ID of any analysis in the chain
+    
+    Returns:
+        List[AnalysisResult]: Analyses of the chain, first revision first
+    
+    Raises:
+        HTTPException: If the ID is malformed or the analysis not found
+    """
+    try:
+        validate_analysis_id(analysis_id)
+        logger.info(f"🔍 Fetching revision chain of analysis: {analysis_id}")
+        results = await get_revision_chain(analysis_id)
+        
+        if not results:
+            logger.warning(f"⚠️ Analysis not found: {analysis_id}")
+            raise HTTPException(
+                status_code=404,
+                detail=f"Analysis with ID {analysis_id} not found"
+            )
+        
+        logger.info(f"✅ Retrieved {len(results)} revisions of analysis: {analysis_id}")
+        return results
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error fetching revision chain: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to retrieve revision chain"
+        )
+
+
 @router.delete(
     "/analyses/{analysis_id}",
     summary="Delete analysis result",
@@ -261,4 +788,155 @@ async def get_analysis_statistics() -> Dict:
         raise HTTPException(
             status_code=500,
             detail="Failed to retrieve statistics"
-        )
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/cache/stats",
+    summary="Get analysis cache statistics",
+    description="Get hit/miss counters and size of the analysis result cache, plus request coalescing and JD profile cache counters."
+)
+async def get_analysis_cache_statistics() -> Dict:
+    """
+    Get analysis cache statistics.
+    
+    Returns:
+        Dict: Cache size, configuration, hit/miss, coalescing, profile, near-duplicate and revision counters
+    """
+    return {
+        **get_cache_stats(),
+        "coalescing": analysis_flight.stats(),
+        "profiles": get_profile_stats(),
+        "near_duplicates": get_near_duplicate_stats(),
+        "revisions": get_revision_stats()
+    }
+
+
+@router.get(
+    "/llm/quota",
+    summary="Get LLM quota scheduler state",
+    description="Get the remaining request/token budget, queued calls per priority class and grant/reject counters."
+)
+async def get_llm_quota_statistics() -> Dict:
+    """
+    Get LLM quota scheduler statistics.
+    
+    Returns:
+        Dict: Remaining budget, queue depth and counters
+    """
+    return quota_scheduler.stats()
+
+
+@router.get(
+    "/llm/resilience",
+    summary="Get LLM resilience state",
+    description="Get the circuit breaker state and transitions, retry and hedge counters, and recent OpenAI latency percentiles."
+)
+async def get_llm_resilience_statistics() -> Dict:
+    """
+    Get LLM resilience statistics.
+    
+    Returns:
+        Dict: Circuit state, retry/hedge counters and latency percentiles
+    """
+    return llm_resilience.stats()
+
+
+@router.get(
+    "/llm/backends",
+    summary="Get LLM backends",
+    description="Get the configured LLM backends with their quota and resilience state, the default backend, the per-priority routes and the escalation routes."
+)
+async def get_llm_backends() -> Dict:
+    """
+    Get LLM backend configuration and state.
+    
+    Returns:
+        Dict: Default backend, routes, escalation settings and per-backend statistics
+    """
+    return {
+        "default": default_backend_name,
+        "routes": backend_routes,
+        "escalation": {
+            "routes": escalation_routes,
+            "band": list(escalation_band)
+        },
+        "backends": [backend.stats() for backend in llm_backends.values()]
+    }
+
+
+@router.get(
+    "/persistence/stats",
+    summary="Get write-behind persistence statistics",
+    description="Get the backlog size and flush counters of the write-behind queue."
+)
+async def get_persistence_statistics() -> Dict:
+    """
+    Get write-behind persistence statistics.
+    
+    Returns:
+        Dict: Queue state, backlog size and flush counters
+    """
+    return write_behind_queue.stats()
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """Convert a query timestamp to the naive UTC form stored in MongoDB."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@router.get(
+    "/statistics/rollups",
+    summary="Get score distribution and volume over a date range",
+    description="Merge pre-aggregated hourly or daily buckets into a score histogram, percentiles and a volume series for the requested range."
+)
+async def get_statistics_rollups(
+    start: Optional[datetime] = Query(None, description="Range start (default: 30 days before end)"),
+    end: Optional[datetime] = Query(None, description="Range end, exclusive (default: now)"),
+    granularity: Literal["auto", "hour", "day"] = Query("auto", description="Bucket size of the volume series; auto picks hour for ranges up to 7 days"),
+    bin_width: int = Query(10, ge=1, le=100, description="Width of the score histogram bins")
+) -> Dict:
+    """
+    Get distribution analytics from the rollup buckets.
+    Buckets are included when they start inside [start, end).
+    
+    Args:
+        start: Inclusive range start
+        end: Exclusive range end
+        granularity: "hour", "day" or "auto"
+        bin_width: Score histogram bin width
+        
+    Returns:
+        Dict: Totals, percentiles, histogram and volume series
+    """
+    end = _to_naive_utc(end) if end else datetime.utcnow()
+    start = _to_naive_utc(start) if start else end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(
+            status_code=400,
+            detail="start must be before end"
+        )
+    
+    try:
+        if granularity == "auto":
+            granularity = choose_granularity(start, end)
+        
+        logger.info(f"📊 Fetching {granularity} rollups from {start} to {end}...")
+        buckets = await get_rollup_buckets(granularity, start, end)
+        summary = summarize_buckets(buckets, bin_width=bin_width)
+        
+        return {
+            "start": start,
+            "end": end,
+            "granularity": granularity,
+            **summary
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching statistics rollups: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to retrieve statistics rollups"
+        )
@@ -0,0 +1,90 @@
+"""
+API routes for asynchronous analysis jobs.
+Jobs are created by POST /analyze?async=true and polled here.
+"""
+
+from fastapi import APIRouter, HTTPException
+from typing import Dict
+import logging
+
+from app.models.schemas import ErrorResponse, JobStatusResponse
+from app.services.database import get_job, get_job_queue_stats
+from app.services.job_queue import serialize_job, get_worker_stats
+
+logger = logging.getLogger(__name__)
+
+# Create router for job endpoints
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["jobs"],
+    responses={
+        404: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+
+
+@router.get(
+    "/jobs/stats",
+    summary="Get job queue statistics",
+    description="Get the number of jobs per status, the age of the oldest queued job and the workers running in this process."
+)
+async def get_job_statistics() -> Dict:
+    """
+    Get job queue depth and worker statistics.
+    
+    Returns:
+        Dict: Queue depth, jobs per status, queue lag and local workers
+    """
+    try:
+        return {
+            **await get_job_queue_stats(),
+            **get_worker_stats()
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting job statistics: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error retrieving job statistics"
+        )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Get job status",
+    description="Get the status of an asynchronous analysis job, with its result once it has succeeded."
+)
+async def get_job_status(job_id: str) -> JobStatusResponse:
+    """
+    Get the status and result of an asynchronous analysis job.
+    
+    Args:
+        job_id: Job ID returned by POST /analyze?async=true
+        
+    Returns:
+        JobStatusResponse: Job status, result or error
+        
+    Raises:
+        HTTPException: If the job is not found
+    """
+    try:
+        job = await get_job(job_id)
+        
+        if not job:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Job {job_id} not found"
+            )
+        
+        return JobStatusResponse(**serialize_job(job))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error retrieving job: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error retrieving job"
+        )
@@ -0,0 +1,239 @@
+"""
+API routes for top-k matching of resumes and job descriptions.
+Registers documents in the persisted vector index and queries it.
+"""
+
+from fastapi import APIRouter, HTTPException, Path
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Literal
+import uuid
+import logging
+
+from app.models.schemas import (
+    AnalyzeResponse,
+    ErrorResponse,
+    IndexDocumentRequest,
+    IndexDocumentResponse,
+    MatchRequest,
+    MatchResponse,
+    MatchCandidate
+)
+from app.services.analysis_service import run_batch_analysis
+from app.services.match_index import get_match_index, resume_index, job_index
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.resilience import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Create router for matching endpoints
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["matching"],
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+
+IndexKind = Literal["resumes", "jobs"]
+
+
+@router.post(
+    "/index/{kind}",
+    response_model=IndexDocumentResponse,
+    summary="Register a document in the match index",
+    description="Add a resume or job description to the match index, or replace it when the ID already exists."
+)
+async def index_document(
+    request: IndexDocumentRequest,
+    kind: IndexKind = Path(..., description="resumes or jobs")
+) -> IndexDocumentResponse:
+    """
+    Register a resume or job description for top-k matching.
+    
+    Args:
+        request: IndexDocumentRequest with the text and optional ID
+        kind: Index to add the document to
+        
+    Returns:
+        IndexDocumentResponse: ID of the document and index size
+    """
+    try:
+        item_id = request.item_id or uuid.uuid4().hex
+        index = get_match_index(kind)
+        # Appends to the log and may compact; keep the file I/O off the event loop
+        await run_in_threadpool(index.add, item_id, request.text.strip())
+        
+        logger.info(f"✅ Indexed {kind} document: {item_id}")
+        return IndexDocumentResponse(item_id=item_id, kind=kind, documents=len(index))
+        
+    except Exception as e:
+        logger.error(f"❌ Error indexing document: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to index document"
+        )
+
+
+@router.delete(
+    "/index/{kind}/{item_id}",
+    summary="Remove a document from the match index",
+    description="Delete a resume or job description from the match index."
+)
+async def delete_indexed_document(
+    item_id: str,
+    kind: IndexKind = Path(..., description="resumes or jobs")
+) -> Dict:
+    """
+    Remove a document from the match index.
+    
+    Args:
+        item_id: Identifier of the document
+        kind: Index to remove the document from
+        
+    Returns:
+        Dict: Success message
+        
+    Raises:
+        HTTPException: If the document is not found
+    """
+    try:
+        if not await run_in_threadpool(get_match_index(kind).delete, item_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Document with ID {item_id} not found in {kind} index"
+            )
+        
+        logger.info(f"✅ Removed {kind} document: {item_id}")
+        return {
+            "message": "Document removed successfully",
+            "item_id": item_id
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error removing document: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to remove document"
+        )
+
+
+@router.get(
+    "/index/stats",
+    summary="Get match index statistics",
+    description="Get document counts and storage state of both match indexes."
+)
+async def get_index_statistics() -> Dict:
+    """
+    Get match index statistics.
+    
+    Returns:
+        Dict: Statistics of the resumes and jobs indexes
+    """
+    return {
+        "resumes": resume_index.stats(),
+        "jobs": job_index.stats()
+    }
+
+
+async def _match(kind: IndexKind, request: MatchRequest) -> MatchResponse:
+    """
+    Query an index and optionally re-rank the candidates with the LLM.
+    
+    Args:
+        kind: Index holding the candidates
+        request: MatchRequest with the query text
+        
+    Returns:
+        MatchResponse: Candidates, best first
+    """
+    index = get_match_index(kind)
+    query_text = request.text.strip()
+    hits = await run_in_threadpool(index.search, query_text, request.k)
+    candidates = [MatchCandidate(item_id=item_id, similarity=round(score, 4)) for item_id, score in hits]
+    logger.info(f"🎯 Matched {len(candidates)} {kind} candidates")
+    
+    if not request.rerank or not candidates:
+        return MatchResponse(kind=kind, candidates=candidates)
+    
+    # Second stage: full analysis of the top-k pairs only. Documents deleted
+    # since the search have no text left to analyze and are dropped.
+    texts = {c.item_id: index.get_text(c.item_id) for c in candidates}
+    candidates = [c for c in candidates if texts[c.item_id] is not None]
+    if kind == "jobs":
+        pairs = [(query_text, texts[c.item_id]) for c in candidates]
+    else:
+        pairs = [(texts[c.item_id], query_text) for c in candidates]
+    outcomes = await run_batch_analysis(pairs)
+    
+    for candidate, outcome in zip(candidates, outcomes):
+        if isinstance(outcome, BaseException):
+            candidate.error = str(outcome) if isinstance(outcome, (ValueError, RateLimitExceeded, CircuitOpenError)) else \
+                "An error occurred during analysis. Please try again later."
+            continue
+        analysis_result, cached = outcome
+        candidate.analysis = AnalyzeResponse(**analysis_result, cached=cached)
+    
+    # Analyzed candidates first by match percentage, then failures by similarity
+    candidates.sort(key=lambda c: (
+        c.analysis is None,
+        -(c.analysis.match_percentage if c.analysis else 0),
+        -c.similarity
+    ))
+    return MatchResponse(kind=kind, reranked=True, candidates=candidates)
+
+
+@router.post(
+    "/match/jobs",
+    response_model=MatchResponse,
+    summary="Find job descriptions for a resume",
+    description="Rank the registered job descriptions by similarity to a resume, optionally re-ranking the top-k with the LLM."
+)
+async def match_jobs(request: MatchRequest) -> MatchResponse:
+    """
+    Find the registered job descriptions that best fit a resume.
+    
+    Args:
+        request: MatchRequest with the resume text
+        
+    Returns:
+        MatchResponse: Top-k job descriptions
+    """
+    try:
+        return await _match("jobs", request)
+        
+    except Exception as e:
+        logger.error(f"❌ Error matching jobs: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to match job descriptions"
+        )
+
+
+@router.post(
+    "/match/resumes",
+    response_model=MatchResponse,
+    summary="Find resumes for a job description",
+    description="Rank the registered resumes by similarity to a job description, optionally re-ranking the top-k with the LLM."
+)
+async def match_resumes(request: MatchRequest) -> MatchResponse:
+    """
+    Find the registered resumes that best fit a job description.
+    
+    Args:
+        request: MatchRequest with the job description text
+        
+    Returns:
+        MatchResponse: Top-k resumes
+    """
+    try:
+        return await _match("resumes", request)
+        
+    except Exception as e:
+        logger.error(f"❌ Error matching resumes: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to match resumes"
+        )
@@ -0,0 +1,144 @@
+"""
+Prometheus metrics endpoint.
+Exposes the stage and HTTP latency histograms plus the in-process service counters.
+"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+import logging
+
+from app.services.cache import cache_counters, memory_cache
+from app.services.profiles import profile_counters
+from app.services.chunking import chunk_counters
+from app.services.near_duplicates import near_duplicate_counters, near_duplicate_index
+from app.services.revisions import revision_counters
+from app.services.llm_service import llm_backends
+from app.services.analysis_service import analysis_flight
+from app.services.database import write_behind_queue
+from app.services.resilience import CLOSED, OPEN, HALF_OPEN
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["monitoring"])
+
+
+class ServiceCollector:
+    """
+    Reads the services' counter dicts at scrape time.
+    The services keep plain dicts so they stay free of Prometheus types.
+    """
+    
+    def collect(self):
+        cache = CounterMetricFamily(
+            "checknnext_cache_events",
+            "Analysis cache lookups and stores by outcome",
+            labels=["event"]
+        )
+        for event, value in cache_counters.items():
+            cache.add_metric([event], value)
+        yield cache
+        yield GaugeMetricFamily("checknnext_cache_memory_entries", "Entries in the in-process analysis cache", value=len(memory_cache))
+        
+        profiles = CounterMetricFamily(
+            "checknnext_profile_events",
+            "JD and resume profile cache hits, extractions and failed extractions",
+            labels=["kind", "event"]
+        )
+        for kind, counters in profile_counters.items():
+            for event, value in counters.items():
+                profiles.add_metric([kind, event], value)
+        yield profiles
+        
+        near_duplicates = CounterMetricFamily(
+            "checknnext_near_duplicate_events",
+            "Near-duplicate index lookups, hits and inserts",
+            labels=["event"]
+        )
+        for event, value in near_duplicate_counters.items():
+            near_duplicates.add_metric([event], value)
+        yield near_duplicates
+        yield GaugeMetricFamily("checknnext_near_duplicate_entries", "Pairs in the near-duplicate index", value=len(near_duplicate_index))
+        
+        revisions = CounterMetricFamily(
+            "checknnext_revision_events",
+            "Revised resumes re-analyzed in full, as a delta, or unchanged",
+            labels=["mode"]
+        )
+        for mode, value in revision_counters.items():
+            revisions.add_metric([mode], value)
+        yield revisions
+        
+        chunking = CounterMetricFamily(
+            "checknnext_chunked_analysis_events",
+            "Analyses split into chunks and the chunk calls they made",
+            labels=["event"]
+        )
+        for event, value in chunk_counters.items():
+            chunking.add_metric([event], value)
+        yield chunking
+        
+        quota_events = CounterMetricFamily(
+            "checknnext_llm_quota_events",
+            "LLM quota scheduler grants, rejections and throttles",
+            labels=["backend", "event"]
+        )
+        queued = GaugeMetricFamily("checknnext_llm_quota_queued", "LLM calls waiting for quota", labels=["backend", "priority"])
+        call_events = CounterMetricFamily(
+            "checknnext_llm_call_events",
+            "LLM calls, attempts, retries, failures and hedges",
+            labels=["backend", "event"]
+        )
+        circuit = GaugeMetricFamily("checknnext_llm_circuit_state", "1 for the current circuit breaker state", labels=["backend", "state"])
+        for name, backend in llm_backends.items():
+            for event, value in backend.quota.counters.items():
+                quota_events.add_metric([name, event], value)
+            for priority, depth in backend.quota.stats()["queued"].items():
+                queued.add_metric([name, priority], depth)
+            for event, value in backend.resilience.counters.items():
+                call_events.add_metric([name, event], value)
+            for state in (CLOSED, OPEN, HALF_OPEN):
+                circuit.add_metric([name, state], 1 if backend.resilience.breaker.state == state else 0)
+        yield quota_events
+        yield queued
+        yield call_events
+        yield circuit
+        
+        write_behind = write_behind_queue.stats()
+        persistence = CounterMetricFamily(
+            "checknnext_write_behind_events",
+            "Analyses queued, flushed and dropped by the write-behind queue",
+            labels=["event"]
+        )
+        for event, value in write_behind_queue.counters.items():
+            persistence.add_metric([event], value)
+        yield persistence
+        yield GaugeMetricFamily("checknnext_write_behind_backlog", "Analyses waiting to be flushed", value=write_behind["backlog"])
+        
+        coalescing = CounterMetricFamily(
+            "checknnext_coalescing_events",
+            "Analysis executions and requests coalesced onto one",
+            labels=["event"]
+        )
+        for event, value in analysis_flight.counters.items():
+            coalescing.add_metric([event], value)
+        yield coalescing
+        yield GaugeMetricFamily("checknnext_coalescing_in_flight", "Distinct analyses currently running", value=analysis_flight.in_flight())
+
+
+REGISTRY.register(ServiceCollector())
+
+
+@router.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description="Per-stage latency histograms, HTTP request and error counts and service counters in the Prometheus text format."
+)
+async def metrics() -> Response:
+    """
+    Expose metrics for Prometheus to scrape.
+    
+    Returns:
+        Response: Metrics in the Prometheus exposition format
+    """
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
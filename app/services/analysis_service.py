@@ -0,0 +1,416 @@
+"""
+Analysis orchestration service.
+Coordinates the result cache, request coalescing and the LLM service
+for a single resume-JD pair.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from app.services.cache import make_cache_key, get_cached_result, store_cached_result
+from app.services.singleflight import SingleFlight
+from app.services.fast_scorer import fast_analyze_batch
+from app.services.resilience import CircuitOpenError
+from app.services.metrics import stage, record_stage
+from app.services.skills import build_local_analysis
+from app.services.llm_service import (
+    analyze_resume_vs_jd,
+    stream_resume_vs_jd,
+    iter_result_events,
+    select_backend,
+    PROMPT_VERSION,
+    JD_PROFILE_VERSION,
+    RESUME_PROFILE_VERSION
+)
+from app.services.llm_backends import LLMBackend
+from app.services.compression import CompressedInputs, clean_inputs, fit_inputs, compression_version
+from app.services.chunking import needs_chunking, analyze_chunked
+from app.services.cascade import run_cascade, cascade_version, stream_backend
+from app.services.profiles import (
+    get_jd_profile,
+    get_resume_profile,
+    uses_jd_profile,
+    uses_resume_profile,
+    JD_PROFILE_ENABLED,
+    RESUME_PROFILE_ENABLED
+)
+from app.services.near_duplicates import (
+    PairSignature,
+    pair_signature,
+    find_near_duplicate,
+    record_near_duplicate,
+    signature_document,
+    NEAR_DUPLICATE_ENABLED
+)
+
+logger = logging.getLogger(__name__)
+
+# Default and maximum number of concurrent analyses within one batch
+BATCH_MAX_PARALLELISM = int(os.getenv("BATCH_MAX_PARALLELISM", "10"))
+
+# Serve local skill-matching results while the backend's circuit is open,
+# instead of failing with 503
+LLM_CIRCUIT_FALLBACK = os.getenv("LLM_CIRCUIT_FALLBACK", "true").lower() == "true"
+
+# Identical analyses in flight share one LLM call
+analysis_flight = SingleFlight()
+
+
+def analysis_prompt_version(
+    backend: LLMBackend,
+    high_priority: bool = False,
+    jd_profile: bool = False,
+    resume_profile: bool = False,
+    escalates: bool = True
+) -> str:
+    """
+    Get the prompt version an analysis runs with, for its cache key.
+    Results scored against JD or resume profiles, or with other compression
+    or escalation settings, are cached apart from each other. Streams pass
+    escalates=False, so their unescalated results never answer analyses
+    that would have been escalated.
+    """
+    version = PROMPT_VERSION
+    if escalates and cascade_version(backend, high_priority):
+        version += f"+{cascade_version(backend, high_priority)}"
+    if backend.configured and compression_version():
+        version += f"+compress-{compression_version()}"
+    if jd_profile:
+        version += f"+jd-profile-{JD_PROFILE_VERSION}"
+    if resume_profile:
+        version += f"+resume-profile-{RESUME_PROFILE_VERSION}"
+    return version
+
+
+def expected_prompt_version(
+    resume_text: str,
+    job_description_text: str,
+    backend: LLMBackend,
+    high_priority: bool = False
+) -> str:
+    """
+    Get the prompt version an analysis is expected to run with, for its
+    cache lookup. Profiles are decided on the cleaned texts, as in
+    prepare_inputs. An analysis whose profile extraction fails is stored
+    under the version it actually ran with instead.
+    """
+    jd_profile = resume_profile = False
+    if backend.configured and (JD_PROFILE_ENABLED or RESUME_PROFILE_ENABLED):
+        inputs = clean_inputs(resume_text, job_description_text)
+        jd_profile = uses_jd_profile(inputs.job_description_text, backend)
+        resume_profile = uses_resume_profile(inputs.resume_text, backend)
+    return analysis_prompt_version(backend, high_priority, jd_profile, resume_profile)
+
+
+async def get_profiles(
+    resume_text: str,
+    job_description_text: str,
+    backend: LLMBackend,
+    priority: str
+) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Fetch the JD and resume profiles of an analysis concurrently."""
+    with stage("profiles"):
+        jd_profile, resume_profile = await asyncio.gather(
+            get_jd_profile(job_description_text, backend, priority),
+            get_resume_profile(resume_text, backend, priority)
+        )
+    return jd_profile, resume_profile
+
+
+async def prepare_inputs(
+    resume_text: str,
+    job_description_text: str,
+    backend: LLMBackend,
+    priority: str,
+    use_profiles: bool = True
+) -> Tuple[CompressedInputs, Optional[Dict], Optional[Dict]]:
+    """
+    Clean the inputs of an analysis that goes to a model, fetch their
+    profiles and fit them to the prompt token budget. Inputs that overflow
+    the context window even once cleaned are left whole for chunked
+    analysis. Local skill matching always sees the full texts. With
+    use_profiles False, no profiles are fetched.
+    """
+    if not backend.configured:
+        inputs = CompressedInputs(resume_text, job_description_text, resume_text, job_description_text)
+        return inputs, None, None
+    
+    started = time.perf_counter()
+    inputs = clean_inputs(resume_text, job_description_text)
+    cleaning = time.perf_counter() - started
+    
+    jd_profile = resume_profile = None
+    if use_profiles:
+        jd_profile, resume_profile = await get_profiles(
+            inputs.resume_text, inputs.job_description_text, backend, priority
+        )
+    
+    started = time.perf_counter()
+    if not needs_chunking(inputs.resume_text, inputs.job_description_text, backend, jd_profile, resume_profile):
+        inputs = fit_inputs(inputs)
+    record_stage("compression", cleaning + time.perf_counter() - started)
+    return inputs, jd_profile, resume_profile
+
+
+async def analyze_inputs(
+    inputs: CompressedInputs,
+    priority: str,
+    backend: LLMBackend,
+    jd_profile: Optional[Dict],
+    resume_profile: Optional[Dict]
+) -> Dict:
+    """
+    Analyze prepared inputs in one call, or in chunks when the cleaned texts
+    overflow the context window. The check runs on the cleaned texts, not
+    on the prompt texts already cut to the budget.
+    """
+    texts = (inputs.resume_text, inputs.job_description_text)
+    if needs_chunking(*texts, backend, jd_profile, resume_profile):
+        return await analyze_chunked(*texts, priority, backend, jd_profile, resume_profile)
+    return await analyze_resume_vs_jd(
+        inputs.resume_prompt_text, inputs.job_description_prompt_text, priority, backend, jd_profile, resume_profile
+    )
+
+
+async def _analyze_and_cache(
+    resume_text: str,
+    job_description_text: str,
+    priority: str,
+    backend: LLMBackend,
+    high_priority: bool = False,
+    signature: Optional[PairSignature] = None
+) -> Dict:
+    """
+    Run the LLM analysis and populate the result cache and near-duplicate
+    index. The result is cached under the profiles it was actually scored
+    with. Indexed results carry their encoded signature, to be stored with
+    the analysis.
+    """
+    try:
+        inputs, jd_profile, resume_profile = await prepare_inputs(
+            resume_text, job_description_text, backend, priority
+        )
+        result = await run_cascade(
+            lambda llm_backend: analyze_inputs(inputs, priority, llm_backend, jd_profile, resume_profile),
+            backend,
+            high_priority
+        )
+    except CircuitOpenError:
+        if not LLM_CIRCUIT_FALLBACK:
+            raise
+        # Degraded result: served, but never cached
+        logger.warning(f"🔌 LLM backend '{backend.name}' circuit open - falling back to local skill matching")
+        return build_local_analysis(resume_text, job_description_text)
+    
+    # Local fallback results must not be cached as LLM results
+    if backend.configured:
+        prompt_version = analysis_prompt_version(backend, high_priority, jd_profile is not None, resume_profile is not None)
+        await store_cached_result(
+            make_cache_key(resume_text, job_description_text, backend.cache_namespace, prompt_version), result
+        )
+    if signature is not None:
+        record_near_duplicate(signature, result)
+        return {**result, "near_duplicate": signature_document(signature)}
+    
+    return result
+
+
+async def run_analysis(
+    resume_text: str,
+    job_description_text: str,
+    priority: str = "interactive",
+    backend: Optional[str] = None,
+    high_priority: bool = False
+) -> Tuple[Dict, bool]:
+    """
+    Analyze a resume against a job description, reusing cached results.
+    On a cache miss, concurrent requests for the same pair share a single
+    LLM call, which runs at the priority of the first caller. Results are
+    cached per backend. Borderline or invalid answers are escalated to a
+    stronger backend when one is configured. A pair nearly identical to an
+    earlier one reuses its analysis, flagged as approximate.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        priority: Quota priority class, "interactive" or "batch"
+        backend: LLM backend name; routed by priority when omitted
+        high_priority: Skip the first backend and use the stronger one
+        
+    Returns:
+        Tuple[Dict, bool]: Analysis result and whether it was served from
+        cache. Near-duplicate results have "approximate" set; fresh results
+        that were indexed carry their "near_duplicate" signature.
+    
+    Raises:
+        ValueError: If the backend does not exist
+    """
+    llm_backend = select_backend(backend, priority)
+    prompt_version = expected_prompt_version(resume_text, job_description_text, llm_backend, high_priority)
+    cache_key = make_cache_key(resume_text, job_description_text, llm_backend.cache_namespace, prompt_version)
+    
+    with stage("cache_lookup"):
+        cached_result = await get_cached_result(cache_key)
+    if cached_result is not None:
+        logger.info(f"⚡ Serving cached analysis - Match: {cached_result['match_percentage']}%")
+        return cached_result, True
+    
+    signature = None
+    if NEAR_DUPLICATE_ENABLED and llm_backend.configured:
+        with stage("near_duplicate_lookup"):
+            signature = pair_signature(resume_text, job_description_text, f"{llm_backend.cache_namespace}:{prompt_version}")
+            near_duplicate = find_near_duplicate(signature)
+        if near_duplicate is not None:
+            logger.info(f"≈ Serving near-duplicate analysis - Match: {near_duplicate['match_percentage']}%")
+            return {**near_duplicate, "approximate": True}, True
+    
+    result = await analysis_flight.do(
+        cache_key,
+        lambda: _analyze_and_cache(
+            resume_text, job_description_text, priority, llm_backend, high_priority, signature
+        )
+    )
+    
+    # Every coalesced caller gets its own copy of the shared result
+    copy = {
+        "match_percentage": result["match_percentage"],
+        "missing_skills": list(result["missing_skills"]),
+        "improvement_suggestions": list(result["improvement_suggestions"])
+    }
+    if "near_duplicate" in result:
+        copy["near_duplicate"] = dict(result["near_duplicate"])
+    return copy, False
+
+
+async def stream_analysis(
+    resume_text: str,
+    job_description_text: str,
+    backend: Optional[str] = None,
+    high_priority: bool = False
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream an analysis field by field, reusing cached results.
+    
+    The first event is ("cached", bool). The following events are those of
+    stream_resume_vs_jd, ending with ("result", dict). Cache hits replay the
+    stored result as the same sequence of events. Streams are not escalated
+    on their score; high-priority streams run on the stronger backend.
+    Streams send the full texts rather than wait for profile extraction
+    before their first event.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        backend: LLM backend name; routed by priority when omitted
+        high_priority: Use the stronger backend, if one is configured
+    """
+    llm_backend = stream_backend(select_backend(backend, "interactive"), high_priority)
+    prompt_version = analysis_prompt_version(llm_backend, escalates=False)
+    cache_key = make_cache_key(resume_text, job_description_text, llm_backend.cache_namespace, prompt_version)
+    
+    with stage("cache_lookup"):
+        cached_result = await get_cached_result(cache_key)
+    if cached_result is not None:
+        yield "cached", True
+        for event in iter_result_events(cached_result):
+            yield event
+        yield "result", cached_result
+        return
+    
+    yield "cached", False
+    started = False
+    try:
+        inputs, _, _ = await prepare_inputs(
+            resume_text, job_description_text, llm_backend, "interactive", use_profiles=False
+        )
+        texts = (inputs.resume_text, inputs.job_description_text)
+        if needs_chunking(*texts, llm_backend):
+            # Chunk results only mean something once merged, so nothing streams before the merge
+            result = await analyze_chunked(*texts, "interactive", llm_backend)
+            started = True
+            await store_cached_result(cache_key, result)
+            for event in iter_result_events(result):
+                yield event
+            yield "result", result
+            return
+        
+        prompt_texts = (inputs.resume_prompt_text, inputs.job_description_prompt_text)
+        async for event, payload in stream_resume_vs_jd(*prompt_texts, llm_backend):
+            started = True
+            if event == "result" and llm_backend.configured:
+                await store_cached_result(cache_key, payload)
+            yield event, payload
+    except CircuitOpenError:
+        # The circuit is checked before the stream opens, so nothing was sent yet
+        if started or not LLM_CIRCUIT_FALLBACK:
+            raise
+        logger.warning(f"🔌 LLM backend '{llm_backend.name}' circuit open - streaming local skill matching")
+        result = build_local_analysis(resume_text, job_description_text)
+        for event in iter_result_events(result):
+            yield event
+        yield "result", result
+
+
+async def run_batch_analysis(
+    pairs: List[Tuple[str, str]],
+    max_parallelism: Optional[int] = None,
+    backend: Optional[str] = None
+) -> List[Union[Tuple[Dict, bool], Exception]]:
+    """
+    Analyze many resume-JD pairs concurrently.
+    LLM calls run in the "batch" quota class so interactive requests go first.
+    
+    Args:
+        pairs: (resume_text, job_description_text) tuples
+        max_parallelism: Optional lower cap on concurrent analyses
+        backend: LLM backend name; routed by the batch priority when omitted
+        
+    Returns:
+        List: For each pair in input order, either the (result, cached) tuple
+        returned by run_analysis or the exception it raised
+    """
+    parallelism = min(max_parallelism or BATCH_MAX_PARALLELISM, BATCH_MAX_PARALLELISM)
+    semaphore = asyncio.Semaphore(parallelism)
+    
+    async def run_one(resume_text: str, job_description_text: str) -> Tuple[Dict, bool]:
+        async with semaphore:
+            return await run_analysis(resume_text, job_description_text, priority="batch", backend=backend)
+    
+    logger.info(f"📦 Running batch of {len(pairs)} analyses (parallelism={parallelism})")
+    return await asyncio.gather(
+        *[run_one(resume_text, jd_text) for resume_text, jd_text in pairs],
+        return_exceptions=True
+    )
+
+
+def run_fast_batch_analysis(pairs: List[Tuple[str, str]]) -> List[Union[Tuple[Dict, bool], Exception]]:
+    """
+    Score many resume-JD pairs with the local fast scorer in one matrix operation.
+    
+    Args:
+        pairs: (resume_text, job_description_text) tuples
+        
+    Returns:
+        List: For each pair in input order, either a (result, False) tuple
+        or the ValueError explaining why the pair was rejected
+    """
+    outcomes: List[Union[Tuple[Dict, bool], Exception]] = []
+    valid_positions = []
+    for position, (resume_text, jd_text) in enumerate(pairs):
+        if len(resume_text) < 50:
+            outcomes.append(ValueError("Resume text must be at least 50 characters"))
+        elif len(jd_text) < 50:
+            outcomes.append(ValueError("Job description must be at least 50 characters"))
+        else:
+            outcomes.append(None)
+            valid_positions.append(position)
+    
+    results = fast_analyze_batch([pairs[position] for position in valid_positions])
+    for position, result in zip(valid_positions, results):
+        outcomes[position] = (result, False)
+    
+    logger.info(f"⚡ Fast-scored batch of {len(valid_positions)} pairs")
+    return outcomes
@@ -0,0 +1,203 @@
+"""
+Content-addressed cache for analysis results.
+Combines an in-process LRU tier with a MongoDB tier shared by all workers.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.services import database
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+ANALYSIS_CACHE_TTL = database.ANALYSIS_CACHE_TTL
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so that cosmetic differences do not change the cache key.
+    Applies Unicode NFC normalization and collapses all whitespace runs.
+    
+    Args:
+        text: Raw resume or job description text
+        
+    Returns:
+        str: Normalized text
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(
+    resume_text: str,
+    job_description_text: str,
+    model: str,
+    prompt_version: str
+) -> str:
+    """
+    Build the content-addressed cache key for an analysis.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        model: Name of the model producing the analysis
+        prompt_version: Version of the prompt template
+        
+    Returns:
+        str: Hex-encoded SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (
+        normalize_text(resume_text),
+        normalize_text(job_description_text),
+        model,
+        prompt_version
+    ):
+        digest.update(part.encode("utf-8"))
+        # Separator byte keeps ("ab", "c") and ("a", "bc") distinct
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    In-process LRU cache with size- and TTL-based eviction.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global in-process tier and hit/miss counters
+memory_cache = LRUCache(ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_TTL)
+cache_counters: Dict[str, int] = {
+    "memory_hits": 0,
+    "mongo_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "errors": 0
+}
+
+
+def _copy_result(result: Dict) -> Dict:
+    """Copy a result so callers cannot mutate the cached lists."""
+    return {
+        "match_percentage": result["match_percentage"],
+        "missing_skills": list(result["missing_skills"]),
+        "improvement_suggestions": list(result["improvement_suggestions"])
+    }
+
+
+async def get_cached_result(cache_key: str) -> Optional[Dict]:
+    """
+    Look up an analysis result, checking the in-process tier first.
+    A MongoDB hit is promoted into the in-process tier.
+    
+    Args:
+        cache_key: Key built by make_cache_key
+        
+    Returns:
+        Dict: Cached analysis result or None on a miss
+    """
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+    
+    result = memory_cache.get(cache_key)
+    if result is not None:
+        cache_counters["memory_hits"] += 1
+        logger.debug("⚡ Analysis cache hit (memory)")
+        return _copy_result(result)
+    
+    try:
+        result = await database.get_cached_analysis(cache_key)
+    except Exception as e:
+        cache_counters["errors"] += 1
+        logger.warning(f"⚠️ Analysis cache lookup failed: {str(e)}")
+        result = None
+    
+    if result is not None:
+        cache_counters["mongo_hits"] += 1
+        memory_cache.set(cache_key, _copy_result(result))
+        logger.debug("⚡ Analysis cache hit (MongoDB)")
+        return _copy_result(result)
+    
+    cache_counters["misses"] += 1
+    return None
+
+
+async def store_cached_result(cache_key: str, result: Dict) -> None:
+    """
+    Store an analysis result in both cache tiers.
+    Cache write failures are logged and never fail the request.
+    
+    Args:
+        cache_key: Key built by make_cache_key
+        result: Validated analysis result
+    """
+    if not ANALYSIS_CACHE_ENABLED:
+        return
+    
+    memory_cache.set(cache_key, _copy_result(result))
+    cache_counters["stores"] += 1
+    
+    try:
+        await database.save_cached_analysis(cache_key, _copy_result(result))
+    except Exception as e:
+        cache_counters["errors"] += 1
+        logger.warning(f"⚠️ Analysis cache write failed: {str(e)}")
+
+
+def get_cache_stats() -> Dict:
+    """
+    Get hit/miss counters and sizing information for the analysis cache.
+    
+    Returns:
+        Dict: Cache configuration, size and counters
+    """
+    hits = cache_counters["memory_hits"] + cache_counters["mongo_hits"]
+    lookups = hits + cache_counters["misses"]
+    return {
+        "enabled": ANALYSIS_CACHE_ENABLED,
+        "memory_entries": len(memory_cache),
+        "memory_max_entries": ANALYSIS_CACHE_MAX_ENTRIES,
+        "ttl_seconds": ANALYSIS_CACHE_TTL,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        **cache_counters
+    }
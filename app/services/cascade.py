@@ -0,0 +1,162 @@
+"""
+Cheap-model-first routing.
+An analysis is answered by the backend it was routed to, and retried on a
+stronger backend (see LLM_ESCALATION_ROUTES) when the score is borderline
+or the answer is invalid. High-priority requests go to the stronger
+backend directly.
+"""
+
+import os
+import time
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.llm_backends import LLMBackend
+from app.services.llm_service import escalation_backend, InvalidLLMResponse
+from app.services.metrics import llm_route_duration, llm_escalations
+
+logger = logging.getLogger(__name__)
+
+# Scores in this inclusive range ("low-high") are re-checked by the stronger backend
+LLM_ESCALATION_BAND = os.getenv("LLM_ESCALATION_BAND", "40-70")
+
+# Routes, as recorded in the metrics
+CHEAP = "cheap"
+ESCALATED = "escalated"
+DIRECT = "direct"
+
+# Escalation reasons
+BAND = "band"
+INVALID = "invalid"
+HIGH_PRIORITY = "high_priority"
+
+
+def parse_escalation_band(band: str) -> Tuple[int, int]:
+    """
+    Parse a score band such as "40-70".
+    
+    Args:
+        band: Lowest and highest borderline score, separated by "-"
+    
+    Returns:
+        Tuple[int, int]: Inclusive bounds
+    
+    Raises:
+        ValueError: If the band is malformed or outside 0-100
+    """
+    low, _, high = band.partition("-")
+    try:
+        bounds = int(low), int(high)
+    except ValueError:
+        raise ValueError(f"Invalid LLM escalation band '{band}'")
+    if not 0 <= bounds[0] <= bounds[1] <= 100:
+        raise ValueError(f"Invalid LLM escalation band '{band}'")
+    return bounds
+
+
+try:
+    escalation_band = parse_escalation_band(LLM_ESCALATION_BAND)
+except ValueError as e:
+    logger.warning(f"⚠️ Ignoring LLM_ESCALATION_BAND: {str(e)}")
+    escalation_band = (40, 70)
+
+
+def is_borderline(result: Dict) -> bool:
+    """Check whether an analysis score falls in the escalation band."""
+    return escalation_band[0] <= result["match_percentage"] <= escalation_band[1]
+
+
+def cascade_version(backend: LLMBackend, high_priority: bool = False) -> Optional[str]:
+    """
+    Get the routing an analysis runs with, for its cache key.
+    
+    Args:
+        backend: Backend the analysis was routed to
+        high_priority: Whether the request skips the first backend
+    
+    Returns:
+        str: Description of the routing, or None without an escalation backend
+    """
+    stronger = escalation_backend(backend)
+    if stronger is None:
+        return None
+    if high_priority:
+        return f"direct-{stronger.cache_namespace}"
+    return f"escalate-{stronger.cache_namespace}-{escalation_band[0]}-{escalation_band[1]}"
+
+
+def stream_backend(backend: LLMBackend, high_priority: bool = False) -> LLMBackend:
+    """
+    Pick the backend a streamed analysis runs on.
+    Streamed events cannot be taken back, so streams only escalate up front,
+    for high-priority requests.
+    
+    Args:
+        backend: Backend the analysis was routed to
+        high_priority: Whether the request is flagged high-priority
+    
+    Returns:
+        LLMBackend: Stronger backend for high-priority requests, else backend
+    """
+    stronger = escalation_backend(backend)
+    if not high_priority or stronger is None:
+        return backend
+    llm_escalations.labels(backend=backend.name, reason=HIGH_PRIORITY).inc()
+    return stronger
+
+
+async def run_cascade(
+    analyze: Callable[[LLMBackend], Awaitable[Dict]],
+    backend: LLMBackend,
+    high_priority: bool = False
+) -> Dict:
+    """
+    Run an analysis on the routed backend, escalating when needed.
+    
+    Args:
+        analyze: Runs the analysis on a given backend
+        backend: Backend the analysis was routed to
+        high_priority: Send the analysis straight to the stronger backend
+    
+    Returns:
+        dict: Analysis result
+    
+    Raises:
+        InvalidLLMResponse: If the answer is invalid and there is no stronger
+            backend, or the stronger backend's answer is invalid too
+        Exception: Whatever analyze raises
+    """
+    stronger = escalation_backend(backend)
+    if stronger is None or not backend.configured:
+        return await analyze(backend)
+    
+    started = time.perf_counter()
+    if high_priority:
+        llm_escalations.labels(backend=backend.name, reason=HIGH_PRIORITY).inc()
+        result = await analyze(stronger)
+        llm_route_duration.labels(route=DIRECT).observe(time.perf_counter() - started)
+        return result
+    
+    first_result = None
+    try:
+        first_result = await analyze(backend)
+        reason = BAND if is_borderline(first_result) else None
+    except InvalidLLMResponse:
+        reason = INVALID
+    
+    if reason is None:
+        llm_route_duration.labels(route=CHEAP).observe(time.perf_counter() - started)
+        return first_result
+    
+    llm_escalations.labels(backend=backend.name, reason=reason).inc()
+    logger.info(f"⬆️ Escalating analysis from '{backend.name}' to '{stronger.name}' ({reason})")
+    try:
+        result = await analyze(stronger)
+    except Exception as e:
+        if first_result is None:
+            raise
+        # A borderline answer is still a valid answer
+        logger.warning(f"⚠️ Escalation to '{stronger.name}' failed, keeping the first answer: {str(e)}")
+        result = first_result
+    llm_route_duration.labels(route=ESCALATED).observe(time.perf_counter() - started)
+    return result
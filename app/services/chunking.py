@@ -0,0 +1,304 @@
+"""
+Map-reduce analysis for inputs that exceed the model's context window.
+Oversized documents are split into section-aligned chunks, every chunk
+pair is analyzed concurrently and the partial results are merged with a
+deterministic rule.
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.services.compression import split_sections, rank_paragraphs, MIN_DOCUMENT_LENGTH
+from app.services.llm_backends import LLMBackend
+from app.services.llm_service import (
+    analyze_resume_vs_jd,
+    create_analysis_prompt,
+    build_messages,
+    estimate_call_tokens,
+    fits_context
+)
+from app.services.rate_limiter import estimate_tokens, CHARS_PER_TOKEN
+from app.services.skills import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+# Chunking configuration. Each chunk is at most CHUNK_MAX_TOKENS, and one
+# analysis makes at most CHUNKED_MAX_CALLS calls.
+CHUNKED_ANALYSIS_ENABLED = os.getenv("CHUNKED_ANALYSIS_ENABLED", "true").lower() == "true"
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "3000"))
+CHUNKED_MAX_CALLS = int(os.getenv("CHUNKED_MAX_CALLS", "12"))
+
+# Smallest useful chunk. When the context window leaves less than two of
+# them next to the prompt, inputs are compressed instead of chunked.
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "500"))
+
+# Share of the context window chunks may fill; token estimates are approximate
+CONTEXT_SAFETY_FACTOR = 0.9
+
+# The prompt asks for 3-5 missing skills and suggestions; merged results keep the same size
+MERGED_MAX_ITEMS = 5
+
+# Global counters
+chunk_counters: Dict[str, int] = {
+    "analyses": 0,
+    "calls": 0
+}
+
+
+def chunk_space(
+    backend: LLMBackend,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> int:
+    """Get the tokens of the context window left for document text next to the prompt."""
+    overhead = estimate_call_tokens(build_messages(create_analysis_prompt("", "", jd_profile, resume_profile)))
+    return int(backend.context_tokens * CONTEXT_SAFETY_FACTOR) - overhead
+
+
+def needs_chunking(
+    resume_text: str,
+    job_description_text: str,
+    backend: LLMBackend,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> bool:
+    """
+    Check whether an analysis prompt would overflow the backend's context window.
+    
+    Args:
+        resume_text: Resume text to send
+        job_description_text: Job description text to send
+        backend: Backend running the analysis
+        jd_profile: Requirement profile sent instead of the JD, if any
+        resume_profile: Candidate profile sent instead of the resume, if any
+    
+    Returns:
+        bool: True when chunked analysis is enabled, needed and possible
+    """
+    if not CHUNKED_ANALYSIS_ENABLED or not backend.configured:
+        return False
+    prompt = create_analysis_prompt(resume_text, job_description_text, jd_profile, resume_profile)
+    if fits_context(backend, prompt):
+        return False
+    
+    if chunk_space(backend, jd_profile, resume_profile) < 2 * CHUNK_MIN_TOKENS:
+        logger.warning(f"⚠️ Context window of backend '{backend.name}' is too small to chunk - compressing inputs instead")
+        return False
+    return True
+
+
+def _split_long(text: str, max_tokens: int) -> List[str]:
+    """Split a paragraph longer than max_tokens at line, then character boundaries."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """
+    Split a document into chunks of at most about max_tokens.
+    Chunks end at paragraph boundaries where possible, and a chunk that
+    continues a section starts with the section's heading.
+    
+    Args:
+        text: Cleaned document text
+        max_tokens: Token budget per chunk
+    
+    Returns:
+        List[str]: Chunks in document order
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    
+    for heading, paragraphs in split_sections(text):
+        heading_tokens = estimate_tokens(heading) if heading else 0
+        section_open = False
+        for paragraph in paragraphs:
+            for piece in _split_long(paragraph, max(1, max_tokens - heading_tokens)):
+                cost = estimate_tokens(piece) + (0 if section_open else heading_tokens)
+                if current and used + cost > max_tokens:
+                    chunks.append("\n\n".join(current))
+                    current, used, section_open = [], 0, False
+                    cost = estimate_tokens(piece) + heading_tokens
+                if heading and not section_open:
+                    current.append(heading)
+                    section_open = True
+                current.append(piece)
+                used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    
+    # Analyses reject very short documents, so a short tail joins the previous chunk
+    if len(chunks) > 1 and len(chunks[-1]) < MIN_DOCUMENT_LENGTH:
+        tail = chunks.pop()
+        chunks[-1] = f"{chunks[-1]}\n\n{tail}"
+    return chunks
+
+
+def _mentions(text: str, skill: str) -> bool:
+    """Check whether text mentions a skill, literally or by a taxonomy alias."""
+    if re.search(rf"(?<!\w){re.escape(skill.lower())}(?!\w)", text.lower()):
+        return True
+    taxonomy = get_skill_taxonomy()
+    canonical = taxonomy.find_skills(skill)
+    return bool(canonical) and set(canonical) <= set(taxonomy.find_skills(text))
+
+
+def merge_chunk_results(
+    results: List[List[Dict]],
+    jd_weights: List[int],
+    resume_text: str
+) -> Dict:
+    """
+    Merge the analyses of all chunk pairs into one result.
+    
+    For each JD chunk, the best-matching resume chunk gives its score, since
+    any part of the resume can provide the evidence. The match percentage
+    is the average of these scores weighted by JD chunk size. Missing skills
+    and suggestions are deduplicated, case-insensitively, in JD chunk then
+    resume chunk order; a missing skill that the full resume mentions is
+    dropped, as it was only missing from one chunk.
+    
+    Args:
+        results: results[j][i] is the analysis of resume chunk i against JD chunk j
+        jd_weights: Estimated tokens of each JD chunk
+        resume_text: Full resume text sent to the chunks
+    
+    Returns:
+        dict: Analysis result with match_percentage, missing_skills, improvement_suggestions
+    """
+    best_scores = [max(result["match_percentage"] for result in row) for row in results]
+    total_weight = sum(jd_weights)
+    match_percentage = round(sum(weight * score for weight, score in zip(jd_weights, best_scores)) / total_weight)
+    
+    missing_skills: List[str] = []
+    seen = set()
+    for row in results:
+        for result in row:
+            for skill in result["missing_skills"]:
+                key = str(skill).strip().lower()
+                if key and key not in seen and not _mentions(resume_text, str(skill)):
+                    seen.add(key)
+                    missing_skills.append(str(skill).strip())
+    
+    # Suggestions from the best-matching chunk pairs first
+    ranked = sorted(
+        (result for row in results for result in row),
+        key=lambda result: -result["match_percentage"]
+    )
+    improvement_suggestions: List[str] = []
+    seen = set()
+    for result in ranked:
+        for suggestion in result["improvement_suggestions"]:
+            key = str(suggestion).strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                improvement_suggestions.append(str(suggestion).strip())
+    
+    return {
+        "match_percentage": match_percentage,
+        "missing_skills": missing_skills[:MERGED_MAX_ITEMS],
+        "improvement_suggestions": improvement_suggestions[:MERGED_MAX_ITEMS]
+    }
+
+
+async def analyze_chunked(
+    resume_text: str,
+    job_description_text: str,
+    priority: str,
+    backend: LLMBackend,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> Dict:
+    """
+    Analyze a resume and JD pair too large for one call.
+    Documents sent as text are split into chunks sized to fit the context
+    window next to their counterpart; a document replaced by its profile
+    is not split. All chunk pairs are analyzed concurrently, so latency
+    stays close to that of a single call.
+    
+    Args:
+        resume_text: Resume text to send
+        job_description_text: Job description text to send
+        priority: Quota priority class, "interactive" or "batch"
+        backend: Configured backend to call
+        jd_profile: Requirement profile sent instead of the JD, if any
+        resume_profile: Candidate profile sent instead of the resume, if any
+    
+    Returns:
+        dict: Merged analysis result
+    
+    Raises:
+        ValueError: If the context window is too small to chunk, or the JD
+            alone needs more than CHUNKED_MAX_CALLS chunks
+        RateLimitExceeded: If no quota became available in time
+        CircuitOpenError: If the circuit breaker is open
+        Exception: If a chunk call fails
+    """
+    available = chunk_space(backend, jd_profile, resume_profile)
+    if available < 2 * CHUNK_MIN_TOKENS:
+        raise ValueError(f"Context window of backend '{backend.name}' leaves {available} tokens for the documents, too few to chunk them")
+    resume_tokens = estimate_tokens(resume_text) if resume_profile is None else 0
+    jd_tokens = estimate_tokens(job_description_text) if jd_profile is None else 0
+    
+    # The smaller document is sent whole if it leaves room for the other
+    if jd_tokens <= available // 2:
+        resume_budget, jd_budget = min(CHUNK_MAX_TOKENS, available - jd_tokens), jd_tokens
+    elif resume_tokens <= available // 2:
+        resume_budget, jd_budget = resume_tokens, min(CHUNK_MAX_TOKENS, available - resume_tokens)
+    else:
+        resume_budget = jd_budget = min(CHUNK_MAX_TOKENS, available // 2)
+    
+    resume_chunks = split_into_chunks(resume_text, resume_budget) if resume_tokens > resume_budget else [resume_text]
+    jd_chunks = split_into_chunks(job_description_text, jd_budget) if jd_tokens > jd_budget else [job_description_text]
+    if len(jd_chunks) > CHUNKED_MAX_CALLS:
+        raise ValueError(f"Job description is too long: it needs {len(jd_chunks)} chunks, at most {CHUNKED_MAX_CALLS} are allowed")
+    
+    max_resume_chunks = CHUNKED_MAX_CALLS // len(jd_chunks)
+    if len(resume_chunks) > max_resume_chunks:
+        # Keep the resume chunks most relevant to the JD, in document order
+        scores = rank_paragraphs(resume_chunks, job_description_text)
+        keep = sorted(sorted(range(len(resume_chunks)), key=lambda index: (-scores[index], index))[:max_resume_chunks])
+        resume_chunks = [resume_chunks[index] for index in keep]
+    
+    calls = len(resume_chunks) * len(jd_chunks)
+    chunk_counters["analyses"] += 1
+    chunk_counters["calls"] += calls
+    logger.info(f"🧩 Chunked analysis - {len(resume_chunks)} resume x {len(jd_chunks)} JD chunks, {calls} calls")
+    
+    tasks = [
+        asyncio.ensure_future(analyze_resume_vs_jd(resume_chunk, jd_chunk, priority, backend, jd_profile, resume_profile))
+        for jd_chunk in jd_chunks
+        for resume_chunk in resume_chunks
+    ]
+    try:
+        flat = await asyncio.gather(*tasks)
+    except BaseException:
+        # One failed chunk fails the analysis; stop the others spending quota
+        for task in tasks:
+            task.cancel()
+        raise
+    results = [flat[j * len(resume_chunks):(j + 1) * len(resume_chunks)] for j in range(len(jd_chunks))]
+    
+    merged = merge_chunk_results(results, [estimate_tokens(chunk) for chunk in jd_chunks], resume_text)
+    logger.info(f"✓ Chunked analysis merged - Match: {merged['match_percentage']}%")
+    return merged
@@ -0,0 +1,379 @@
+"""
+Prompt compression for long resumes and job descriptions.
+Inputs are cleaned (whitespace normalized, boilerplate sections such as
+benefits and EEO statements removed) and, when the pair still exceeds the
+token budget, the resume's paragraphs are ranked by relevance to the JD
+and only the most relevant ones are sent.
+"""
+
+import os
+import re
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.services.fast_scorer import vectorize
+from app.services.metrics import record_tokens_saved
+from app.services.rate_limiter import estimate_tokens, CHARS_PER_TOKEN
+from app.services.skills import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+# Compression configuration. PROMPT_TOKEN_BUDGET bounds the estimated tokens
+# of resume plus JD; the JD is only cut beyond its share of the budget.
+PROMPT_COMPRESSION_ENABLED = os.getenv("PROMPT_COMPRESSION_ENABLED", "true").lower() == "true"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+PROMPT_JD_BUDGET_SHARE = float(os.getenv("PROMPT_JD_BUDGET_SHARE", "0.4"))
+
+# Bump whenever cleaning or ranking changes so cached results are not reused
+COMPRESSION_VERSION = "v1"
+
+# Analyses reject shorter documents, so compression never cuts below it
+MIN_DOCUMENT_LENGTH = 50
+
+# Headings are short lines that end with a colon, are in capitals or are
+# Markdown headings
+HEADING_MAX_LENGTH = 60
+HEADING_MAX_WORDS = 6
+
+_INLINE_SPACE = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+_BOILERPLATE_HEADING = re.compile(
+    r"\b(benefits|perks|what we offer|equal (employment )?opportunit\w*|eeo|diversity|inclusion"
+    r"|how to apply|application process|accommodations?|privacy|disclaimer|references)\b"
+)
+_BOILERPLATE_PARAGRAPH = re.compile(
+    r"equal opportunity employer|without regard to (race|color|religion|sex|gender|age)"
+    r"|reasonable accommodation|references (are )?available (up)?on request"
+)
+
+
+class CompressedInputs(NamedTuple):
+    """
+    Texts of an analysis after compression.
+    The cleaned texts do not depend on the counterpart document, so they
+    are what profiles are extracted from; the prompt texts are fitted to
+    the token budget for this particular pair.
+    """
+    resume_text: str
+    job_description_text: str
+    resume_prompt_text: str
+    job_description_prompt_text: str
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse runs of spaces, trim lines and limit blank lines to one.
+    
+    Args:
+        text: Raw document text
+    
+    Returns:
+        str: Text with normalized whitespace
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_INLINE_SPACE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def is_heading(line: str) -> bool:
+    """Check whether a normalized line looks like a section heading."""
+    if not line or len(line) > HEADING_MAX_LENGTH:
+        return False
+    if line.startswith("#"):
+        return True
+    if len(line.rstrip(":").split()) > HEADING_MAX_WORDS:
+        return False
+    if line.endswith(":"):
+        return True
+    letters = [char for char in line if char.isalpha()]
+    return len(letters) >= 3 and all(char.isupper() for char in letters)
+
+
+def split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """
+    Split normalized text into sections of paragraphs.
+    
+    Args:
+        text: Text returned by normalize_whitespace
+    
+    Returns:
+        List[Tuple[str, List[str]]]: (heading, paragraphs) pairs in document
+        order; text before the first heading has an empty heading
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    paragraph: List[str] = []
+    
+    def flush() -> None:
+        if paragraph:
+            sections[-1][1].append("\n".join(paragraph))
+            paragraph.clear()
+    
+    for line in text.split("\n"):
+        if is_heading(line):
+            flush()
+            sections.append((line, []))
+        elif line:
+            paragraph.append(line)
+        else:
+            flush()
+    flush()
+    
+    return [section for section in sections if section[0] or section[1]]
+
+
+def join_sections(sections: List[Tuple[str, List[str]]]) -> str:
+    """Render sections back to text."""
+    blocks = []
+    for heading, paragraphs in sections:
+        body = "\n\n".join(paragraphs)
+        blocks.append(f"{heading}\n{body}".strip() if heading else body)
+    return "\n\n".join(block for block in blocks if block)
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Remove boilerplate sections and paragraphs, e.g. benefits, EEO statements
+    and "references available on request".
+    
+    Args:
+        text: Text returned by normalize_whitespace
+    
+    Returns:
+        str: Text without boilerplate
+    """
+    sections = []
+    for heading, paragraphs in split_sections(text):
+        if heading and _BOILERPLATE_HEADING.search(heading.lower()):
+            continue
+        kept = [paragraph for paragraph in paragraphs if not _BOILERPLATE_PARAGRAPH.search(paragraph.lower())]
+        if kept or not paragraphs:
+            sections.append((heading, kept))
+    return join_sections(sections)
+
+
+def clean_document(text: str, document: str) -> str:
+    """
+    Normalize whitespace and strip boilerplate, counting the tokens saved.
+    
+    Args:
+        text: Raw document text
+        document: "resume" or "jd", for the metrics
+    
+    Returns:
+        str: Cleaned text
+    """
+    normalized = normalize_whitespace(text)
+    if len(normalized) < MIN_DOCUMENT_LENGTH:
+        return text
+    record_tokens_saved(document, "whitespace", estimate_tokens(text) - estimate_tokens(normalized))
+    
+    cleaned = strip_boilerplate(normalized)
+    if len(cleaned) < MIN_DOCUMENT_LENGTH:
+        # Never send a document emptied because most of it looked like boilerplate
+        return normalized
+    record_tokens_saved(document, "boilerplate", estimate_tokens(normalized) - estimate_tokens(cleaned))
+    return cleaned
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about max_tokens, at a line boundary where possible.
+    
+    Args:
+        text: Text to cut
+        max_tokens: Token budget
+    
+    Returns:
+        str: Leading part of the text within the budget
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+
+def rank_paragraphs(paragraphs: List[str], job_description_text: str) -> List[float]:
+    """
+    Score paragraphs by relevance to a job description.
+    The score adds the hashed n-gram cosine similarity to the share of the
+    JD's taxonomy skills that the paragraph mentions.
+    
+    Args:
+        paragraphs: Resume paragraphs
+        job_description_text: Job description content
+    
+    Returns:
+        List[float]: Relevance score per paragraph
+    """
+    vectors = vectorize([job_description_text] + paragraphs)
+    similarities = vectors[1:] @ vectors[0]
+    
+    taxonomy = get_skill_taxonomy()
+    jd_skills = set(taxonomy.find_skills(job_description_text))
+    scores = []
+    for paragraph, similarity in zip(paragraphs, similarities):
+        coverage = len(jd_skills.intersection(taxonomy.find_skills(paragraph))) / len(jd_skills) if jd_skills else 0.0
+        scores.append(float(similarity) + coverage)
+    return scores
+
+
+def select_relevant(resume_text: str, job_description_text: str, max_tokens: int) -> str:
+    """
+    Keep the resume paragraphs most relevant to a JD within a token budget.
+    The opening paragraph (contact details and summary) is always kept;
+    kept paragraphs stay in document order under their headings.
+    
+    Args:
+        resume_text: Cleaned resume text
+        job_description_text: Job description content
+        max_tokens: Token budget of the resume
+    
+    Returns:
+        str: Resume text within the budget
+    """
+    sections = split_sections(resume_text)
+    units = [
+        (section_index, paragraph_index, paragraph)
+        for section_index, (_, paragraphs) in enumerate(sections)
+        for paragraph_index, paragraph in enumerate(paragraphs)
+    ]
+    if not units:
+        return truncate_to_tokens(resume_text, max_tokens)
+    
+    scores = rank_paragraphs([paragraph for _, _, paragraph in units], job_description_text)
+    # The opening paragraph first, then by relevance; earlier (more recent) paragraphs win ties
+    order = [0] + sorted(range(1, len(units)), key=lambda index: (-scores[index], index))
+    
+    kept = set()
+    headed = set()
+    used = 0
+    for index in order:
+        section_index, _, paragraph = units[index]
+        heading = sections[section_index][0]
+        cost = estimate_tokens(paragraph)
+        if heading and section_index not in headed:
+            cost += estimate_tokens(heading)
+        if used + cost > max_tokens:
+            continue
+        kept.add(index)
+        headed.add(section_index)
+        used += cost
+    
+    if not kept:
+        return truncate_to_tokens(units[0][2], max_tokens)
+    
+    selected: List[Tuple[str, List[str]]] = [(heading, []) for heading, _ in sections]
+    for index in sorted(kept):
+        section_index, _, paragraph = units[index]
+        selected[section_index][1].append(paragraph)
+    return join_sections([section for section in selected if section[1]])
+
+
+def fit_to_budget(
+    resume_text: str,
+    job_description_text: str,
+    budget: int = PROMPT_TOKEN_BUDGET
+) -> Tuple[str, str]:
+    """
+    Fit a resume and JD pair into a token budget.
+    The JD keeps at least its share of the budget (PROMPT_JD_BUDGET_SHARE)
+    and is cut at the end beyond it; the resume gets the rest and keeps its
+    most relevant paragraphs.
+    
+    Args:
+        resume_text: Cleaned resume text
+        job_description_text: Cleaned job description text
+        budget: Token budget of both texts together
+    
+    Returns:
+        Tuple[str, str]: Resume and JD text within the budget
+    """
+    resume_tokens = estimate_tokens(resume_text)
+    jd_tokens = estimate_tokens(job_description_text)
+    if resume_tokens + jd_tokens <= budget:
+        return resume_text, job_description_text
+    
+    jd_budget = max(int(budget * PROMPT_JD_BUDGET_SHARE), budget - resume_tokens)
+    fitted_jd = truncate_to_tokens(job_description_text, jd_budget)
+    record_tokens_saved("jd", "budget", jd_tokens - estimate_tokens(fitted_jd))
+    
+    fitted_resume = resume_text
+    resume_budget = budget - estimate_tokens(fitted_jd)
+    if resume_tokens > resume_budget:
+        fitted_resume = select_relevant(resume_text, fitted_jd, resume_budget)
+        record_tokens_saved("resume", "budget", resume_tokens - estimate_tokens(fitted_resume))
+    
+    return fitted_resume, fitted_jd
+
+
+def compression_version() -> Optional[str]:
+    """
+    Get the compression settings an analysis runs with, for its cache key.
+    
+    Returns:
+        str: Version and budget, or None when compression is disabled
+    """
+    if not PROMPT_COMPRESSION_ENABLED:
+        return None
+    return f"{COMPRESSION_VERSION}-{PROMPT_TOKEN_BUDGET}"
+
+
+def clean_inputs(resume_text: str, job_description_text: str) -> CompressedInputs:
+    """
+    Clean a resume and JD pair without fitting it to the token budget.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+    
+    Returns:
+        CompressedInputs: Cleaned texts, also as the prompt texts; the
+        inputs unchanged when compression is disabled
+    """
+    if not PROMPT_COMPRESSION_ENABLED:
+        return CompressedInputs(resume_text, job_description_text, resume_text, job_description_text)
+    
+    clean_resume = clean_document(resume_text, "resume")
+    clean_jd = clean_document(job_description_text, "jd")
+    return CompressedInputs(clean_resume, clean_jd, clean_resume, clean_jd)
+
+
+def fit_inputs(inputs: CompressedInputs) -> CompressedInputs:
+    """
+    Fit the prompt texts of cleaned inputs to the prompt token budget.
+    
+    Args:
+        inputs: Inputs returned by clean_inputs
+    
+    Returns:
+        CompressedInputs: The same cleaned texts with fitted prompt texts
+    """
+    if not PROMPT_COMPRESSION_ENABLED:
+        return inputs
+    
+    prompt_resume, prompt_jd = fit_to_budget(inputs.resume_text, inputs.job_description_text)
+    saved = (
+        estimate_tokens(inputs.resume_text) + estimate_tokens(inputs.job_description_text)
+        - estimate_tokens(prompt_resume) - estimate_tokens(prompt_jd)
+    )
+    if saved > 0:
+        logger.info(f"🗜️ Prompt inputs fitted to budget - ~{saved} tokens saved")
+    
+    return inputs._replace(resume_prompt_text=prompt_resume, job_description_prompt_text=prompt_jd)
+
+
+def compress_inputs(resume_text: str, job_description_text: str) -> CompressedInputs:
+    """
+    Clean a resume and JD pair and fit it to the prompt token budget.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+    
+    Returns:
+        CompressedInputs: Cleaned texts and the texts to put in the prompt;
+        all four are the inputs unchanged when compression is disabled
+    """
+    return fit_inputs(clean_inputs(resume_text, job_description_text))
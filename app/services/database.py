@@ -4,15 +4,24 @@ Manages database connection and CRUD operations.
 """
 
 import logging
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timedelta
 from bson.objectid import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+import base64
+import json
 import os
 
+from app.services.rollups import build_bucket_increments
+from app.services.write_behind import WriteBehindQueue
+from app.services.metrics import stage
+
 try:
-    from motor.motor_asyncio import AsyncClient
+    from motor.motor_asyncio import AsyncIOMotorClient
 except ImportError:
-    AsyncClient = None
+    AsyncIOMotorClient = None
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +29,57 @@ logger = logging.getLogger(__name__)
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = "ChecknNext"
 COLLECTION_NAME = "analyses"
+CACHE_COLLECTION_NAME = "analysis_cache"
+STATS_COLLECTION_NAME = "statistics"
+ROLLUPS_COLLECTION_NAME = "rollups"
+JOBS_COLLECTION_NAME = "analysis_jobs"
+PROFILES_COLLECTION_NAME = "profiles"
+
+# ID of the running-counters summary document in the statistics collection
+STATS_SUMMARY_ID = "analyses"
+
+# Seconds between background recomputations of the statistics summary
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+
+# Recomputations tried before giving up when counter updates keep interleaving
+STATS_RECONCILE_ATTEMPTS = 3
+
+# Lifetime of cached analysis results (seconds), enforced by a TTL index
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+
+# Lifetime of cached JD and resume profiles (seconds), enforced by a TTL index
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "2592000"))
+
+# Seconds a claimed job stays invisible to other workers unless its lease is renewed
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+
+# Attempts (claims) per job before it is marked failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Lifetime of finished jobs (seconds), enforced by a TTL index
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "604800"))
+
+# Write-behind persistence: queue analysis documents and insert them in batches
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))
+WRITE_BEHIND_MAX_BACKLOG = int(os.getenv("WRITE_BEHIND_MAX_BACKLOG", "10000"))
+
+# MongoDB duplicate key error code
+DUPLICATE_KEY_ERROR = 11000
 
 # Global database connection
 client: Optional[Any] = None
 db: Optional[Any] = None
 analyses_collection: Optional[Any] = None
+cache_collection: Optional[Any] = None
+stats_collection: Optional[Any] = None
+rollups_collection: Optional[Any] = None
+jobs_collection: Optional[Any] = None
+profiles_collection: Optional[Any] = None
+
+# Background statistics reconciliation task
+stats_reconciler_task: Optional[asyncio.Task] = None
 
 
 async def connect_to_mongo():
@@ -32,15 +87,15 @@ async def connect_to_mongo():
     Establish connection to MongoDB using Motor (async driver).
     Called during application startup.
     """
-    global client, db, analyses_collection
+    global client, db, analyses_collection, cache_collection, stats_collection, rollups_collection, jobs_collection, profiles_collection
     
-    if AsyncClient is None:
+    if AsyncIOMotorClient is None:
         logger.warning("⚠️ Motor not available, MongoDB disabled")
         return
     
     try:
         logger.info(f"🔗 Connecting to MongoDB at {MONGODB_URL}...")
-        client = AsyncClient(MONGODB_URL)
+        client = AsyncIOMotorClient(MONGODB_URL)
         
         # Verify connection
         await client.admin.command('ping')
@@ -49,9 +104,37 @@ async def connect_to_mongo():
         # Initialize database and collection
         db = client[DATABASE_NAME]
         analyses_collection = db[COLLECTION_NAME]
+        cache_collection = db[CACHE_COLLECTION_NAME]
+        stats_collection = db[STATS_COLLECTION_NAME]
+        rollups_collection = db[ROLLUPS_COLLECTION_NAME]
+        jobs_collection = db[JOBS_COLLECTION_NAME]
+        profiles_collection = db[PROFILES_COLLECTION_NAME]
         
         # Create indexes for better query performance
         await analyses_collection.create_index("created_at")
+        # Compound index backing keyset pagination of history
+        await analyses_collection.create_index([("created_at", -1), ("_id", -1)])
+        # Lets statistics find the current min/max score without a scan
+        await analyses_collection.create_index("match_percentage")
+        # Revision chains, looked up by their first analysis
+        await analyses_collection.create_index("revision.root_analysis_id", sparse=True)
+        # Range queries over time-bucketed rollups
+        await rollups_collection.create_index([("granularity", 1), ("bucket_start", 1)])
+        # Job claiming: queued jobs by availability, running jobs by lease expiry
+        await jobs_collection.create_index([("status", 1), ("available_at", 1)])
+        await jobs_collection.create_index([("status", 1), ("lease_until", 1)])
+        # Finished jobs (which hold the submitted texts) expire automatically
+        await jobs_collection.create_index("completed_at", expireAfterSeconds=JOB_RETENTION)
+        
+        # Cached results expire automatically via a TTL index
+        await cache_collection.create_index(
+            "created_at",
+            expireAfterSeconds=ANALYSIS_CACHE_TTL
+        )
+        await profiles_collection.create_index(
+            "created_at",
+            expireAfterSeconds=PROFILE_CACHE_TTL
+        )
         logger.info("✅ Database indexes created")
         
     except Exception as e:
@@ -74,12 +157,66 @@ async def close_mongo_connection():
         logger.error(f"❌ Error closing MongoDB connection: {str(e)}")
 
 
+def build_analysis_document(
+    match_percentage: int,
+    missing_skills: List[str],
+    improvement_suggestions: List[str],
+    resume_length: int,
+    jd_length: int,
+    cached: bool = False,
+    mode: str = "llm",
+    near_duplicate: Optional[Dict] = None,
+    revision: Optional[Dict] = None
+) -> Dict:
+    """
+    Build the MongoDB document stored for an analysis result.
+    
+    Args:
+        match_percentage: Match score (0-100)
+        missing_skills: List of missing skills
+        improvement_suggestions: List of suggestions
+        resume_length: Character count of resume
+        jd_length: Character count of job description
+        cached: Whether the result was served from the analysis cache
+        mode: Scoring mode that produced the result ("llm" or "fast")
+        near_duplicate: Encoded pair signature of a fresh LLM result, used
+            to rebuild the near-duplicate index
+        revision: Revision chain data, including the resume text later
+            revisions are diffed against
+        
+    Returns:
+        Dict: Document ready for insertion
+    """
+    now = datetime.utcnow()
+    
+    document = {
+        "match_percentage": match_percentage,
+        "missing_skills": missing_skills,
+        "improvement_suggestions": improvement_suggestions,
+        "resume_length": resume_length,
+        "jd_length": jd_length,
+        "cached": cached,
+        "mode": mode,
+        "created_at": now,
+        "updated_at": now
+    }
+    if near_duplicate is not None:
+        document["near_duplicate"] = near_duplicate
+    if revision is not None:
+        document["revision"] = revision
+    return document
+
+
 async def save_analysis_result(
     match_percentage: int,
     missing_skills: List[str],
     improvement_suggestions: List[str],
     resume_length: int,
-    jd_length: int
+    jd_length: int,
+    cached: bool = False,
+    mode: str = "llm",
+    near_duplicate: Optional[Dict] = None,
+    revision: Optional[Dict] = None
 ) -> str:
     """
     Save analysis result to MongoDB.
@@ -90,33 +227,78 @@ async def save_analysis_result(
         improvement_suggestions: List of suggestions
         resume_length: Character count of resume
         jd_length: Character count of job description
+        cached: Whether the result was served from the analysis cache
+        mode: Scoring mode that produced the result ("llm" or "fast")
+        near_duplicate: Encoded pair signature of a fresh LLM result
+        revision: Revision chain data of the analysis
         
     Returns:
         str: MongoDB document ID as string
     """
     try:
-        now = datetime.utcnow()
-        
-        document = {
-            "match_percentage": match_percentage,
-            "missing_skills": missing_skills,
-            "improvement_suggestions": improvement_suggestions,
-            "resume_length": resume_length,
-            "jd_length": jd_length,
-            "created_at": now,
-            "updated_at": now
-        }
-        
-        result = await analyses_collection.insert_one(document)
-        logger.info(f"✅ Analysis saved with ID: {result.inserted_id}")
-        
-        return str(result.inserted_id)
-        
+        with stage("mongo_write"):
+            document = build_analysis_document(
+                match_percentage=match_percentage,
+                missing_skills=missing_skills,
+                improvement_suggestions=improvement_suggestions,
+                resume_length=resume_length,
+                jd_length=jd_length,
+                cached=cached,
+                mode=mode,
+                near_duplicate=near_duplicate,
+                revision=revision
+            )
+            
+            if write_behind_queue.running:
+                document["_id"] = ObjectId()
+                await write_behind_queue.put(document)
+                return str(document["_id"])
+            
+            result = await analyses_collection.insert_one(document)
+            logger.info(f"✅ Analysis saved with ID: {result.inserted_id}")
+            
+            await record_inserted_analyses([document])
+            
+            return str(result.inserted_id)
+            
     except Exception as e:
         logger.error(f"❌ Error saving analysis result: {str(e)}")
         raise
 
 
+async def save_analysis_results_bulk(documents: List[Dict]) -> List[str]:
+    """
+    Save many analysis results with a single insert_many round trip.
+    
+    Args:
+        documents: Documents built with build_analysis_document
+        
+    Returns:
+        List[str]: MongoDB document IDs in the same order as documents
+    """
+    if not documents:
+        return []
+    
+    try:
+        with stage("mongo_write"):
+            if write_behind_queue.running:
+                for document in documents:
+                    document["_id"] = ObjectId()
+                    await write_behind_queue.put(document)
+                return [str(document["_id"]) for document in documents]
+            
+            result = await analyses_collection.insert_many(documents, ordered=True)
+            logger.info(f"✅ Saved {len(result.inserted_ids)} analyses in bulk")
+            
+            await record_inserted_analyses(documents)
+            
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+            
+    except Exception as e:
+        logger.error(f"❌ Error saving analysis results in bulk: {str(e)}")
+        raise
+
+
 async def get_analysis_by_id(analysis_id: str) -> Optional[Dict]:
     """
     Retrieve a specific analysis result by ID.
@@ -128,9 +310,13 @@ async def get_analysis_by_id(analysis_id: str) -> Optional[Dict]:
         Dict: Analysis result or None if not found
     """
     try:
-        result = await analyses_collection.find_one(
-            {"_id": ObjectId(analysis_id)}
-        )
+        pending = write_behind_queue.get_pending(analysis_id)
+        if pending is not None:
+            result = dict(pending)
+        else:
+            result = await analyses_collection.find_one(
+                {"_id": ObjectId(analysis_id)}
+            )
         
         if result:
             result["analysis_id"] = str(result.pop("_id"))
@@ -142,32 +328,192 @@ async def get_analysis_by_id(analysis_id: str) -> Optional[Dict]:
         raise
 
 
-async def get_all_analyses(limit: int = 50, skip: int = 0) -> List[Dict]:
+async def flush_analysis_documents(documents: List[Dict]) -> None:
+    """
+    Insert a write-behind batch and update the running statistics.
+    
+    Documents that already exist (from a retried batch that partially
+    succeeded) are skipped so they are not counted twice.
+    
+    Args:
+        documents: Documents with pre-assigned ObjectIds
+    """
+    try:
+        await analyses_collection.insert_many(documents, ordered=False)
+        inserted = documents
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+            raise
+        failed = {error["index"] for error in write_errors}
+        inserted = [document for index, document in enumerate(documents) if index not in failed]
+    
+    logger.info(f"✅ Flushed {len(inserted)} analyses from write-behind queue")
+    await record_inserted_analyses(inserted)
+
+
+write_behind_queue = WriteBehindQueue(
+    flush=flush_analysis_documents,
+    max_batch=WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+    max_backlog=WRITE_BEHIND_MAX_BACKLOG
+)
+
+
+def start_write_behind() -> None:
+    """
+    Start the write-behind flusher if enabled and MongoDB is connected.
+    Called during application startup.
+    """
+    if not WRITE_BEHIND_ENABLED or analyses_collection is None:
+        return
+    write_behind_queue.start()
+    logger.info(
+        f"✅ Write-behind persistence enabled (batch {WRITE_BEHIND_BATCH_SIZE}, "
+        f"interval {WRITE_BEHIND_FLUSH_INTERVAL}s, backlog {WRITE_BEHIND_MAX_BACKLOG})"
+    )
+
+
+async def stop_write_behind() -> None:
+    """
+    Drain the write-behind queue before the MongoDB connection closes.
+    Called during application shutdown.
+    """
+    if not write_behind_queue.running:
+        return
+    backlog = write_behind_queue.stats()["backlog"]
+    logger.info(f"💾 Draining {backlog} queued analyses...")
+    await write_behind_queue.stop()
+
+
+def encode_page_cursor(created_at: datetime, document_id: ObjectId) -> str:
+    """
+    Encode the position of a document in history order as an opaque cursor.
+    
+    Args:
+        created_at: Creation time of the last document on the page
+        document_id: ObjectId of the last document on the page
+        
+    Returns:
+        str: URL-safe cursor string
+    """
+    payload = json.dumps({"t": created_at.isoformat(), "id": str(document_id)})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Decode a cursor produced by encode_page_cursor.
+    
+    Args:
+        cursor: Opaque cursor string
+        
+    Returns:
+        Tuple[datetime, ObjectId]: Position of the last document of the previous page
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+async def get_all_analyses(
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
     """
-    Retrieve all analysis results with pagination.
+    Retrieve analysis results, newest first, with keyset pagination.
+    
+    Pages are located with a (created_at, _id) range query on the compound
+    index, so every page costs the same regardless of depth. skip is only
+    honoured when no cursor is given, for backward compatibility.
     
     Args:
         limit: Maximum number of results
-        skip: Number of results to skip
+        skip: Number of results to skip (deprecated, use cursor)
+        cursor: Cursor returned with the previous page
         
     Returns:
-        List[Dict]: List of analysis results
+        Tuple[List[Dict], Optional[str]]: Results and the cursor of the next
+        page, or None on the last page
+        
+    Raises:
+        ValueError: If the cursor is malformed
     """
     try:
-        cursor = analyses_collection.find().sort("created_at", -1).skip(skip).limit(limit)
-        results = await cursor.to_list(length=limit)
+        query: Dict[str, Any] = {}
+        if cursor:
+            created_at, document_id = decode_page_cursor(cursor)
+            query = {
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": document_id}}
+                ]
+            }
+        
+        # Fetch one extra document to know whether another page exists;
+        # stored resumes are only needed to diff revisions
+        find_cursor = analyses_collection.find(query, {"revision.resume_text": 0}).sort([("created_at", -1), ("_id", -1)])
+        if skip and not cursor:
+            find_cursor = find_cursor.skip(skip)
+        results = await find_cursor.limit(limit + 1).to_list(length=limit + 1)
+        
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_page_cursor(results[-1]["created_at"], results[-1]["_id"])
         
         # Convert ObjectId to string
         for result in results:
             result["analysis_id"] = str(result.pop("_id"))
         
-        return results
+        return results, next_cursor
         
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"❌ Error retrieving analyses: {str(e)}")
         raise
 
 
+async def get_revision_chain(analysis_id: str) -> List[Dict]:
+    """
+    Retrieve every revision in the chain of an analysis, first revision first.
+    
+    Args:
+        analysis_id: MongoDB document ID of any analysis in the chain
+    
+    Returns:
+        List[Dict]: Analyses of the chain, or an empty list if the
+        analysis does not exist
+    """
+    try:
+        analysis = await get_analysis_by_id(analysis_id)
+        if analysis is None:
+            return []
+        root_id = (analysis.get("revision") or {}).get("root_analysis_id") or analysis_id
+        
+        results = await analyses_collection.find(
+            {"$or": [{"_id": ObjectId(root_id)}, {"revision.root_analysis_id": root_id}]},
+            {"revision.resume_text": 0}
+        ).sort([("revision.number", 1), ("created_at", 1)]).to_list(length=None)
+        
+        for result in results:
+            result["analysis_id"] = str(result.pop("_id"))
+        
+        return results
+    
+    except Exception as e:
+        logger.error(f"❌ Error retrieving revision chain: {str(e)}")
+        raise
+
+
 async def delete_analysis(analysis_id: str) -> bool:
     """
     Delete an analysis result by ID.
@@ -179,12 +525,16 @@ async def delete_analysis(analysis_id: str) -> bool:
         bool: True if deleted, False if not found
     """
     try:
-        result = await analyses_collection.delete_one(
+        # A document still in the write-behind queue must land before it can be deleted
+        await write_behind_queue.wait_until_flushed(analysis_id)
+        
+        deleted = await analyses_collection.find_one_and_delete(
             {"_id": ObjectId(analysis_id)}
         )
         
-        if result.deleted_count > 0:
+        if deleted:
             logger.info(f"✅ Analysis deleted: {analysis_id}")
+            await record_deleted_analysis(deleted)
             return True
         
         logger.warning(f"⚠️ Analysis not found: {analysis_id}")
@@ -195,46 +545,671 @@ async def delete_analysis(analysis_id: str) -> bool:
         raise
 
 
+async def record_inserted_analyses(documents: List[Dict]) -> None:
+    """
+    Add newly inserted analyses to the running statistics counters.
+    The summary document is updated atomically with a single upsert, which
+    also bumps its version so a concurrent reconciliation notices it.
+    Failures are logged and left for the reconciliation job to correct.
+    
+    Args:
+        documents: Inserted analysis documents
+    """
+    if stats_collection is None or not documents:
+        return
+    
+    scores = [document["match_percentage"] for document in documents]
+    try:
+        await stats_collection.update_one(
+            {"_id": STATS_SUMMARY_ID},
+            {
+                "$inc": {"count": len(scores), "sum_match": sum(scores), "version": 1},
+                "$min": {"min_match": min(scores)},
+                "$max": {"max_match": max(scores)},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update statistics counters: {str(e)}")
+    
+    await apply_rollup_increments(documents, sign=1)
+
+
+async def record_deleted_analysis(document: Dict) -> None:
+    """
+    Remove a deleted analysis from the running statistics counters.
+    
+    Count and sum are decremented atomically. If the deleted score was the
+    current minimum or maximum, those bounds are flagged as stale and
+    recomputed from the match_percentage index on the next read.
+    
+    Args:
+        document: The deleted analysis document
+    """
+    if stats_collection is None:
+        return
+    
+    score = document["match_percentage"]
+    try:
+        await stats_collection.update_one(
+            {"_id": STATS_SUMMARY_ID},
+            [{
+                "$set": {
+                    "count": {"$add": ["$count", -1]},
+                    "sum_match": {"$add": ["$sum_match", -score]},
+                    "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+                    "bounds_stale": {
+                        "$or": [
+                            {"$ifNull": ["$bounds_stale", False]},
+                            {"$eq": ["$min_match", score]},
+                            {"$eq": ["$max_match", score]}
+                        ]
+                    },
+                    "updated_at": datetime.utcnow()
+                }
+            }]
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update statistics counters: {str(e)}")
+    
+    await apply_rollup_increments([document], sign=-1)
+
+
+async def apply_rollup_increments(documents: List[Dict], sign: int) -> None:
+    """
+    Update the hourly and daily rollup buckets for inserted or deleted analyses.
+    Sends one upsert per touched bucket in a single bulk write.
+    
+    Args:
+        documents: Analysis documents with created_at and match_percentage
+        sign: 1 for inserted documents, -1 for deleted ones
+    """
+    if rollups_collection is None or not documents:
+        return
+    
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$inc": inc,
+                "$setOnInsert": {"granularity": granularity, "bucket_start": start}
+            },
+            upsert=True
+        )
+        for key, (granularity, start, inc) in build_bucket_increments(documents, sign).items()
+    ]
+    try:
+        await rollups_collection.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update statistics rollups: {str(e)}")
+
+
+async def get_rollup_buckets(granularity: str, start: datetime, end: datetime) -> List[Dict]:
+    """
+    Retrieve rollup buckets of one granularity within a time range.
+    
+    Args:
+        granularity: "hour" or "day"
+        start: Inclusive range start (naive UTC)
+        end: Exclusive range end (naive UTC)
+        
+    Returns:
+        List[Dict]: Bucket documents sorted by bucket_start
+    """
+    try:
+        cursor = rollups_collection.find(
+            {"granularity": granularity, "bucket_start": {"$gte": start, "$lt": end}},
+            {"_id": 0}
+        ).sort("bucket_start", 1)
+        return await cursor.to_list(length=None)
+        
+    except Exception as e:
+        logger.error(f"❌ Error retrieving statistics rollups: {str(e)}")
+        raise
+
+
+async def rebuild_rollups_if_empty() -> None:
+    """
+    Backfill the rollup buckets from existing analyses.
+    Runs once, when the rollups collection is empty but analyses exist.
+    Called during application startup.
+    """
+    if rollups_collection is None:
+        return
+    
+    try:
+        if await rollups_collection.find_one({}, {"_id": 1}) is not None:
+            return
+        if await analyses_collection.find_one({}, {"_id": 1}) is None:
+            return
+        
+        logger.info("🔄 Backfilling statistics rollups from analyses...")
+        batch: List[Dict] = []
+        backfilled = 0
+        async for document in analyses_collection.find({}, {"_id": 0, "created_at": 1, "match_percentage": 1}):
+            batch.append(document)
+            if len(batch) >= 5000:
+                await apply_rollup_increments(batch, sign=1)
+                backfilled += len(batch)
+                batch = []
+        await apply_rollup_increments(batch, sign=1)
+        backfilled += len(batch)
+        logger.info(f"✅ Backfilled statistics rollups from {backfilled} analyses")
+        
+    except Exception as e:
+        logger.error(f"❌ Error backfilling statistics rollups: {str(e)}")
+
+
+async def _refresh_score_bounds(summary: Dict) -> Dict:
+    """Recompute min/max from the match_percentage index after deletions."""
+    lowest = await analyses_collection.find_one({}, {"match_percentage": 1}, sort=[("match_percentage", 1)])
+    highest = await analyses_collection.find_one({}, {"match_percentage": 1}, sort=[("match_percentage", -1)])
+    
+    bounds = {
+        "min_match": lowest["match_percentage"] if lowest else 0,
+        "max_match": highest["match_percentage"] if highest else 0,
+        "bounds_stale": False
+    }
+    await stats_collection.update_one({"_id": STATS_SUMMARY_ID}, {"$set": bounds})
+    return {**summary, **bounds}
+
+
+async def reconcile_statistics() -> Dict:
+    """
+    Recompute the statistics summary with a full aggregation.
+    Corrects any drift in the running counters.
+    
+    The result replaces the summary only if its version is unchanged, so
+    counter updates that land during the aggregation are not overwritten;
+    the aggregation is retried instead. After STATS_RECONCILE_ATTEMPTS
+    conflicts the running counters are kept until the next run.
+    
+    Returns:
+        Dict: The recomputed summary document, or the current one if every attempt conflicted
+    """
+    pipeline = [
+        {
+            "$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "sum_match": {"$sum": "$match_percentage"},
+                "min_match": {"$min": "$match_percentage"},
+                "max_match": {"$max": "$match_percentage"}
+            }
+        }
+    ]
+    
+    for attempt in range(STATS_RECONCILE_ATTEMPTS):
+        current = await stats_collection.find_one({"_id": STATS_SUMMARY_ID})
+        stats_result = await analyses_collection.aggregate(pipeline).to_list(1)
+        stats = stats_result[0] if stats_result else {}
+        now = datetime.utcnow()
+        
+        version = current.get("version") if current else None
+        summary = {
+            "count": stats.get("count", 0),
+            "sum_match": stats.get("sum_match", 0),
+            "min_match": stats.get("min_match", 0),
+            "max_match": stats.get("max_match", 0),
+            "bounds_stale": False,
+            "version": (version or 0) + 1,
+            "updated_at": now,
+            "reconciled_at": now
+        }
+        
+        if current is None:
+            try:
+                await stats_collection.insert_one({"_id": STATS_SUMMARY_ID, **summary})
+                replaced = True
+            except DuplicateKeyError:
+                replaced = False
+        else:
+            # A missing version (summaries from before versioning) matches None
+            result = await stats_collection.replace_one({"_id": STATS_SUMMARY_ID, "version": version}, summary)
+            replaced = result.matched_count == 1
+        
+        if replaced:
+            logger.info(f"🔄 Statistics reconciled: {summary['count']} analyses")
+            return summary
+        logger.info(f"🔄 Statistics changed during reconciliation (attempt {attempt + 1}), retrying")
+    
+    logger.warning(f"⚠️ Statistics reconciliation gave up after {STATS_RECONCILE_ATTEMPTS} conflicting attempts")
+    return await stats_collection.find_one({"_id": STATS_SUMMARY_ID})
+
+
+async def reconcile_statistics_if_missing() -> None:
+    """
+    Build the statistics summary from existing analyses if it does not exist.
+    Without it, the first insert after an upgrade would start the counters
+    from that one analysis. Called during application startup, before any
+    analyses are written.
+    """
+    if stats_collection is None:
+        return
+    
+    try:
+        if await stats_collection.find_one({"_id": STATS_SUMMARY_ID}, {"_id": 1}) is None:
+            await reconcile_statistics()
+        
+    except Exception as e:
+        logger.error(f"❌ Error building statistics summary: {str(e)}")
+
+
+async def _statistics_reconciler_loop() -> None:
+    """Periodically reconcile the statistics summary."""
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        try:
+            await reconcile_statistics()
+        except Exception as e:
+            logger.error(f"❌ Statistics reconciliation failed: {str(e)}")
+
+
+def start_statistics_reconciler() -> None:
+    """
+    Start the background statistics reconciliation job.
+    Called during application startup.
+    """
+    global stats_reconciler_task
+    
+    if stats_collection is None or stats_reconciler_task is not None:
+        return
+    
+    stats_reconciler_task = asyncio.create_task(_statistics_reconciler_loop())
+    logger.info(f"✓ Statistics reconciliation scheduled every {STATS_RECONCILE_INTERVAL}s")
+
+
+async def stop_statistics_reconciler() -> None:
+    """
+    Stop the background statistics reconciliation job.
+    Called during application shutdown.
+    """
+    global stats_reconciler_task
+    
+    if stats_reconciler_task is None:
+        return
+    
+    stats_reconciler_task.cancel()
+    try:
+        await stats_reconciler_task
+    except asyncio.CancelledError:
+        pass
+    stats_reconciler_task = None
+
+
 async def get_statistics() -> Dict:
     """
     Get database statistics (total analyses, average match percentage, etc).
     
+    Reads the running-counters summary document, so the cost does not grow
+    with the size of the analyses collection. The summary is built with a
+    full aggregation only if it does not exist yet.
+    
     Returns:
         Dict: Statistics about analyses
     """
     try:
-        total = await analyses_collection.count_documents({})
-        
-        # Calculate average match percentage
-        pipeline = [
-            {
-                "$group": {
-                    "_id": None,
-                    "avg_match": {"$avg": "$match_percentage"},
-                    "min_match": {"$min": "$match_percentage"},
-                    "max_match": {"$max": "$match_percentage"}
-                }
-            }
-        ]
+        summary = await stats_collection.find_one({"_id": STATS_SUMMARY_ID})
         
-        stats_result = await analyses_collection.aggregate(pipeline).to_list(1)
+        if summary is None:
+            summary = await reconcile_statistics()
+        elif summary.get("bounds_stale"):
+            summary = await _refresh_score_bounds(summary)
         
-        if stats_result:
-            stats = stats_result[0]
+        total = summary.get("count", 0)
+        if total <= 0:
             return {
-                "total_analyses": total,
-                "average_match_percentage": round(stats.get("avg_match", 0), 2),
-                "min_match_percentage": stats.get("min_match", 0),
-                "max_match_percentage": stats.get("max_match", 0)
+                "total_analyses": 0,
+                "average_match_percentage": 0,
+                "min_match_percentage": 0,
+                "max_match_percentage": 0
             }
         
         return {
             "total_analyses": total,
-            "average_match_percentage": 0,
-            "min_match_percentage": 0,
-            "max_match_percentage": 0
+            "average_match_percentage": round(summary.get("sum_match", 0) / total, 2),
+            "min_match_percentage": summary.get("min_match", 0),
+            "max_match_percentage": summary.get("max_match", 0)
         }
         
     except Exception as e:
         logger.error(f"❌ Error getting statistics: {str(e)}")
         raise
+
+
+async def get_cached_analysis(cache_key: str) -> Optional[Dict]:
+    """
+    Retrieve a cached analysis result by its content-addressed key.
+    
+    Args:
+        cache_key: Hash of the normalized inputs, model and prompt version
+        
+    Returns:
+        Dict: Cached analysis result or None if not found
+    """
+    if cache_collection is None:
+        return None
+    
+    result = await cache_collection.find_one(
+        {"_id": cache_key},
+        {"_id": 0, "result": 1}
+    )
+    
+    return result["result"] if result else None
+
+
+async def save_cached_analysis(cache_key: str, result: Dict) -> None:
+    """
+    Store an analysis result in the cache collection.
+    Entries are removed by MongoDB once ANALYSIS_CACHE_TTL has elapsed.
+    
+    Args:
+        cache_key: Hash of the normalized inputs, model and prompt version
+        result: Analysis result to cache
+    """
+    if cache_collection is None:
+        return
+    
+    await cache_collection.replace_one(
+        {"_id": cache_key},
+        {"result": result, "created_at": datetime.utcnow()},
+        upsert=True
+    )
+
+
+async def get_near_duplicate_documents(limit: int) -> List[Dict]:
+    """
+    Get the most recent analyses stored with a near-duplicate signature.
+    
+    Args:
+        limit: Maximum number of analyses
+    
+    Returns:
+        List[Dict]: Signatures and results, newest first
+    """
+    if analyses_collection is None:
+        return []
+    
+    cursor = analyses_collection.find(
+        {"near_duplicate": {"$exists": True}},
+        {"_id": 0, "near_duplicate": 1, "match_percentage": 1, "missing_skills": 1, "improvement_suggestions": 1}
+    ).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(limit)
+
+
+async def get_cached_profile(profile_key: str) -> Optional[Dict]:
+    """
+    Retrieve a cached JD or resume profile by its content-addressed key.
+    
+    Args:
+        profile_key: Hash of the normalized text, backend and profile version
+        
+    Returns:
+        Dict: Cached profile or None if not found
+    """
+    if profiles_collection is None:
+        return None
+    
+    result = await profiles_collection.find_one(
+        {"_id": profile_key},
+        {"_id": 0, "profile": 1}
+    )
+    
+    return result["profile"] if result else None
+
+
+async def save_cached_profile(profile_key: str, kind: str, profile: Dict) -> None:
+    """
+    Store a JD or resume profile in the profiles collection.
+    Entries are removed by MongoDB once PROFILE_CACHE_TTL has elapsed.
+    
+    Args:
+        profile_key: Hash of the normalized text, backend and profile version
+        kind: Kind of document the profile describes, "jd" or "resume"
+        profile: Extracted profile
+    """
+    if profiles_collection is None:
+        return
+    
+    await profiles_collection.replace_one(
+        {"_id": profile_key},
+        {"kind": kind, "profile": profile, "created_at": datetime.utcnow()},
+        upsert=True
+    )
+
+
+async def enqueue_job(
+    resume_text: str,
+    job_description_text: str,
+    callback_url: Optional[str] = None,
+    backend: Optional[str] = None,
+    high_priority: bool = False
+) -> str:
+    """
+    Add an analysis job to the queue.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        callback_url: URL notified with the job once it finishes
+        backend: LLM backend requested for the analysis, if any
+        high_priority: Whether the analysis skips to the stronger backend
+        
+    Returns:
+        str: Job ID
+    """
+    now = datetime.utcnow()
+    document = {
+        "status": "queued",
+        "resume_text": resume_text,
+        "job_description_text": job_description_text,
+        "callback_url": callback_url,
+        "backend": backend,
+        "high_priority": high_priority,
+        "attempts": 0,
+        "available_at": now,
+        "lease_until": None,
+        "worker_id": None,
+        "created_at": now,
+        "updated_at": now,
+        "completed_at": None
+    }
+    
+    try:
+        result = await jobs_collection.insert_one(document)
+        logger.info(f"📥 Job queued with ID: {result.inserted_id}")
+        return str(result.inserted_id)
+        
+    except Exception as e:
+        logger.error(f"❌ Error queueing job: {str(e)}")
+        raise
+
+
+async def claim_job(worker_id: str) -> Optional[Dict]:
+    """
+    Lease the oldest available job for a worker.
+    
+    A job is available when it is queued and due, or when it is running
+    under an expired lease (its worker crashed or stalled). Jobs whose
+    lease expired after their last allowed attempt are marked failed.
+    
+    Args:
+        worker_id: ID of the claiming worker
+        
+    Returns:
+        Dict: Claimed job document, or None if no job is available
+    """
+    now = datetime.utcnow()
+    
+    await jobs_collection.update_many(
+        {"status": "running", "lease_until": {"$lt": now}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+        {"$set": {
+            "status": "failed",
+            "error": "Job did not complete within its lease",
+            "lease_until": None,
+            "updated_at": now,
+            "completed_at": now
+        }}
+    )
+    
+    return await jobs_collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "running", "lease_until": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_until": now + timedelta(seconds=JOB_VISIBILITY_TIMEOUT),
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def renew_job_lease(job_id: ObjectId, worker_id: str) -> bool:
+    """
+    Extend the lease of a job the worker is still processing.
+    
+    Args:
+        job_id: Job ObjectId
+        worker_id: ID of the worker holding the lease
+        
+    Returns:
+        bool: False if the lease was lost to another worker
+    """
+    now = datetime.utcnow()
+    result = await jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "worker_id": worker_id},
+        {"$set": {"lease_until": now + timedelta(seconds=JOB_VISIBILITY_TIMEOUT), "updated_at": now}}
+    )
+    return result.matched_count == 1
+
+
+async def finish_job(
+    job_id: ObjectId,
+    worker_id: str,
+    status: str,
+    result: Optional[Dict] = None,
+    analysis_id: Optional[str] = None,
+    error: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Record the outcome of a job, if the worker still holds its lease.
+    
+    Args:
+        job_id: Job ObjectId
+        worker_id: ID of the worker holding the lease
+        status: "succeeded" or "failed"
+        result: Analysis result of a succeeded job
+        analysis_id: History ID of the saved analysis
+        error: Error message of a failed job
+        
+    Returns:
+        Dict: Updated job document, or None if the lease was lost
+    """
+    now = datetime.utcnow()
+    return await jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": "running", "worker_id": worker_id},
+        {"$set": {
+            "status": status,
+            "result": result,
+            "analysis_id": analysis_id,
+            "error": error,
+            "lease_until": None,
+            "updated_at": now,
+            "completed_at": now
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def release_job(job_id: ObjectId, worker_id: str, delay: float = 0) -> None:
+    """
+    Put a leased job back in the queue, to be retried after a delay.
+    
+    Args:
+        job_id: Job ObjectId
+        worker_id: ID of the worker holding the lease
+        delay: Seconds before the job becomes available again
+    """
+    now = datetime.utcnow()
+    await jobs_collection.update_one(
+        {"_id": job_id, "status": "running", "worker_id": worker_id},
+        {"$set": {
+            "status": "queued",
+            "worker_id": None,
+            "lease_until": None,
+            "available_at": now + timedelta(seconds=delay),
+            "updated_at": now
+        }}
+    )
+
+
+async def set_job_callback_status(job_id: ObjectId, callback_status: str) -> None:
+    """Record whether the completion callback of a job was delivered."""
+    await jobs_collection.update_one({"_id": job_id}, {"$set": {"callback_status": callback_status}})
+
+
+async def get_job(job_id: str) -> Optional[Dict]:
+    """
+    Retrieve a job by ID, without the submitted texts.
+    
+    Args:
+        job_id: Job ID
+        
+    Returns:
+        Dict: Job document or None if not found
+    """
+    if not ObjectId.is_valid(job_id):
+        return None
+    
+    try:
+        job = await jobs_collection.find_one(
+            {"_id": ObjectId(job_id)},
+            {"resume_text": 0, "job_description_text": 0}
+        )
+        if job:
+            job["job_id"] = str(job.pop("_id"))
+        return job
+        
+    except Exception as e:
+        logger.error(f"❌ Error retrieving job: {str(e)}")
+        raise
+
+
+async def get_job_queue_stats() -> Dict:
+    """
+    Get the number of jobs per status and the age of the oldest queued job.
+    
+    Returns:
+        Dict: Queue depth and lag
+    """
+    try:
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        async for group in jobs_collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]):
+            counts[group["_id"]] = group["count"]
+        
+        oldest = await jobs_collection.find_one(
+            {"status": "queued"},
+            {"available_at": 1},
+            sort=[("available_at", 1)]
+        )
+        oldest_age = (datetime.utcnow() - oldest["available_at"]).total_seconds() if oldest else 0
+        
+        return {
+            "depth": counts["queued"] + counts["running"],
+            "by_status": counts,
+            "oldest_queued_seconds": round(max(0.0, oldest_age), 1)
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting job queue statistics: {str(e)}")
+        raise
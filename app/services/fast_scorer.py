@@ -0,0 +1,188 @@
+"""
+LLM-free fast scoring of resumes against job descriptions.
+Combines hashed n-gram cosine similarity with taxonomy skill coverage,
+vectorized with NumPy so whole batches score in one matrix operation.
+"""
+
+import os
+import re
+import zlib
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.services.skills import get_skill_taxonomy, suggest_improvements
+
+logger = logging.getLogger(__name__)
+
+# Scoring configuration
+FAST_SCORER_DIM = int(os.getenv("FAST_SCORER_DIM", "4096"))
+FAST_SKILL_WEIGHT = float(os.getenv("FAST_SKILL_WEIGHT", "0.6"))
+# Cosine similarity at which the text component saturates; resumes and JDs
+# share vocabulary but are never near-identical documents
+FAST_COSINE_CEILING = float(os.getenv("FAST_COSINE_CEILING", "0.5"))
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could
+did do does doing for from had has have having he her here his how i if in into is it
+its just may me more most must my no nor not of on once only or other our out over own
+per same she should so some such than that the their them then there these they this
+those through to too under until up very was we were what when where which while who
+whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens, dropping stopwords.
+    
+    Args:
+        text: Raw text
+        
+    Returns:
+        List[str]: Tokens in document order
+    """
+    return [
+        token.rstrip(".")
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def _feature_indices(text: str, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash unigrams and bigrams of text into (indices, signs)."""
+    tokens = tokenize(text)
+    features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    if not features:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    
+    # crc32 is stable across processes, unlike the built-in hash()
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features),
+        dtype=np.int64,
+        count=len(features)
+    )
+    # The top bit picks a sign so that collisions tend to cancel out
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    return hashes % dim, signs
+
+
+def vectorize(texts: Sequence[str], dim: int = FAST_SCORER_DIM) -> np.ndarray:
+    """
+    Embed texts as L2-normalized hashed n-gram vectors.
+    
+    Args:
+        texts: Texts to embed
+        dim: Number of hash buckets
+        
+    Returns:
+        np.ndarray: float32 matrix of shape (len(texts), dim)
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        indices, signs = _feature_indices(text, dim)
+        if len(indices):
+            matrix[row] = np.bincount(indices, weights=signs, minlength=dim)
+    
+    # Sublinear term frequency dampens repeated words, keeping the sign
+    np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def score_pairs(
+    resume_texts: Sequence[str],
+    job_description_texts: Sequence[str]
+) -> Tuple[np.ndarray, List[List[str]]]:
+    """
+    Score resume-JD pairs without calling an LLM.
+    
+    Each distinct text is embedded and scanned for skills only once, so
+    one-resume-many-JDs batches stay cheap. Text similarity for all pairs
+    is computed in a single row-wise dot product.
+    
+    Args:
+        resume_texts: Resumes, one per pair
+        job_description_texts: Job descriptions, one per pair
+        
+    Returns:
+        Tuple[np.ndarray, List[List[str]]]: Integer match percentages and the
+        missing skills of each pair
+    """
+    if len(resume_texts) != len(job_description_texts):
+        raise ValueError("resume_texts and job_description_texts must have the same length")
+    
+    unique_texts = list(dict.fromkeys([*resume_texts, *job_description_texts]))
+    position = {text: index for index, text in enumerate(unique_texts)}
+    vectors = vectorize(unique_texts)
+    
+    resume_rows = np.fromiter((position[text] for text in resume_texts), dtype=np.int64, count=len(resume_texts))
+    jd_rows = np.fromiter((position[text] for text in job_description_texts), dtype=np.int64, count=len(job_description_texts))
+    cosine = np.einsum("ij,ij->i", vectors[resume_rows], vectors[jd_rows])
+    text_scores = np.clip(cosine / FAST_COSINE_CEILING, 0.0, 1.0)
+    
+    # Skill coverage per pair, from one taxonomy scan per distinct text
+    taxonomy = get_skill_taxonomy()
+    skills = {text: taxonomy.find_skills(text) for text in unique_texts}
+    coverage = np.full(len(resume_texts), np.nan)
+    missing_skills = []
+    for pair, (resume_text, jd_text) in enumerate(zip(resume_texts, job_description_texts)):
+        required = skills[jd_text]
+        present = set(skills[resume_text])
+        missing = [skill for skill in required if skill not in present]
+        missing_skills.append(missing)
+        if required:
+            coverage[pair] = 1.0 - len(missing) / len(required)
+    
+    # Without recognizable JD skills the score relies on text similarity alone
+    has_skills = ~np.isnan(coverage)
+    scores = np.where(
+        has_skills,
+        FAST_SKILL_WEIGHT * np.nan_to_num(coverage) + (1.0 - FAST_SKILL_WEIGHT) * text_scores,
+        text_scores
+    )
+    return np.rint(scores * 100).astype(int), missing_skills
+
+
+def fast_analyze_batch(pairs: Sequence[Tuple[str, str]]) -> List[Dict]:
+    """
+    Analyze many resume-JD pairs with the fast scorer.
+    
+    Args:
+        pairs: (resume_text, job_description_text) tuples
+        
+    Returns:
+        List[Dict]: Results compatible with AnalyzeResponse, in input order
+    """
+    if not pairs:
+        return []
+    
+    resume_texts, jd_texts = zip(*pairs)
+    scores, missing_skills = score_pairs(resume_texts, jd_texts)
+    
+    return [
+        {
+            "match_percentage": int(score),
+            "missing_skills": missing[:5],
+            "improvement_suggestions": suggest_improvements(missing)
+        }
+        for score, missing in zip(scores, missing_skills)
+    ]
+
+
+def fast_analyze(resume_text: str, job_description_text: str) -> Dict:
+    """
+    Analyze a single resume-JD pair with the fast scorer.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        
+    Returns:
+        dict: Analysis result with match_percentage, missing_skills, improvement_suggestions
+    """
+    return fast_analyze_batch([(resume_text, job_description_text)])[0]
@@ -0,0 +1,321 @@
+"""
+Worker pool for asynchronous analysis jobs.
+Workers lease jobs from the MongoDB queue, run the analysis and notify
+callback URLs.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+import logging
+import ipaddress
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+
+from app.services import database
+from app.services.analysis_service import run_analysis
+from app.services.llm_service import InvalidLLMResponse
+from app.services.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Number of worker coroutines per process (0 disables job processing here)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Seconds an idle worker waits before polling the queue again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# Base delay (seconds) before a job that hit a transient error is retried
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+
+# Timeout and attempts for delivering completion callbacks
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+JOB_CALLBACK_ATTEMPTS = int(os.getenv("JOB_CALLBACK_ATTEMPTS", "3"))
+
+# Hosts callbacks may be sent to (comma-separated); when empty, any host
+# resolving only to public addresses is allowed
+JOB_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+}
+
+# Identifies this process in job leases
+PROCESS_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+# Running worker tasks, and an event that wakes idle workers on enqueue
+job_workers: List[asyncio.Task] = []
+job_available: Optional[asyncio.Event] = None
+
+
+def notify_job_enqueued() -> None:
+    """Wake idle local workers after a job was enqueued by this process."""
+    if job_available is not None:
+        job_available.set()
+
+
+def serialize_job(job: Dict) -> Dict:
+    """
+    Convert a job document into its JSON representation.
+    
+    Args:
+        job: Job document (with job_id or _id)
+        
+    Returns:
+        Dict: JSON-serializable job status
+    """
+    job_id = job.get("job_id") or str(job.get("_id"))
+    result = job.get("result")
+    if result is not None:
+        result = {**result, "analysis_id": job.get("analysis_id")}
+    
+    def timestamp(field: str) -> Optional[str]:
+        value = job.get(field)
+        return value.isoformat() if value else None
+    
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "created_at": timestamp("created_at"),
+        "updated_at": timestamp("updated_at"),
+        "completed_at": timestamp("completed_at"),
+        "result": result,
+        "error": job.get("error"),
+        "callback_status": job.get("callback_status")
+    }
+
+
+async def validate_callback_url(url: str) -> Optional[str]:
+    """
+    Check that a callback URL is safe for the workers to POST to.
+    
+    Only http(s) URLs are accepted. With JOB_CALLBACK_ALLOWED_HOSTS set, the
+    host must be listed; otherwise it must not resolve to a private,
+    loopback, link-local or otherwise non-public address, so callbacks
+    cannot reach internal services.
+    
+    Args:
+        url: Callback URL of the job
+        
+    Returns:
+        Optional[str]: Checked IP address to connect to, or None for an allowlisted host
+        
+    Raises:
+        ValueError: If the URL is not allowed
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http or https URL")
+    
+    host = parts.hostname.lower()
+    if JOB_CALLBACK_ALLOWED_HOSTS:
+        if host not in JOB_CALLBACK_ALLOWED_HOSTS:
+            raise ValueError(f"callback_url host {host} is not allowed")
+        return None
+    
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, parts.port or None, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError(f"callback_url host {host} could not be resolved")
+    for *_, sockaddr in addresses:
+        if not ipaddress.ip_address(sockaddr[0].split("%")[0]).is_global:
+            raise ValueError(f"callback_url host {host} resolves to a non-public address")
+    return addresses[0][4][0]
+
+
+async def deliver_callback(job: Dict) -> None:
+    """
+    POST the finished job to its callback URL, retrying failed deliveries.
+    
+    Args:
+        job: Finished job document
+    """
+    payload = serialize_job(job)
+    
+    # Checked again on delivery, as the host may resolve differently by now
+    try:
+        address = await validate_callback_url(job["callback_url"])
+    except ValueError as e:
+        logger.warning(f"⚠️ Callback for job {payload['job_id']} not sent: {str(e)}")
+        await database.set_job_callback_status(job["_id"], "rejected")
+        return
+    
+    # Connect to the address just checked rather than resolving the host
+    # again, which a rebinding DNS server could answer with an internal
+    # address. Host header and TLS name still use the original host.
+    url = httpx.URL(job["callback_url"])
+    headers: Dict[str, str] = {}
+    extensions: Dict[str, str] = {}
+    if address is not None:
+        headers["Host"] = url.netloc.decode("ascii")
+        extensions["sni_hostname"] = url.host
+        url = url.copy_with(host=address)
+    
+    # Redirects are not followed, as their target was never checked
+    async with httpx.AsyncClient(timeout=JOB_CALLBACK_TIMEOUT, follow_redirects=False) as http:
+        for attempt in range(JOB_CALLBACK_ATTEMPTS):
+            try:
+                response = await http.post(url, json=payload, headers=headers, extensions=extensions)
+                response.raise_for_status()
+                await database.set_job_callback_status(job["_id"], "delivered")
+                logger.info(f"📨 Callback delivered for job {payload['job_id']}")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Callback attempt {attempt + 1} for job {payload['job_id']} failed: {str(e)}")
+                if attempt + 1 < JOB_CALLBACK_ATTEMPTS:
+                    await asyncio.sleep(backoff_delay(attempt, 1.0, 30.0))
+    
+    await database.set_job_callback_status(job["_id"], "failed")
+
+
+async def _keep_lease(job_id, worker_id: str) -> None:
+    """Renew a job lease until cancelled, well before it expires."""
+    while True:
+        await asyncio.sleep(database.JOB_VISIBILITY_TIMEOUT / 3)
+        if not await database.renew_job_lease(job_id, worker_id):
+            logger.warning(f"⚠️ Lost lease on job {job_id}")
+            return
+
+
+async def process_job(job: Dict, worker_id: str) -> None:
+    """
+    Run one leased job and record its outcome.
+    
+    Invalid input fails the job immediately. Transient errors, including
+    an invalid answer from the model, put it back in the queue with a
+    backoff until its attempts are used up.
+    
+    Args:
+        job: Claimed job document
+        worker_id: ID of the worker holding the lease
+    """
+    job_id = job["_id"]
+    lease_keeper = asyncio.create_task(_keep_lease(job_id, worker_id))
+    
+    try:
+        logger.info(f"⚙️ Worker {worker_id} processing job {job_id} (attempt {job['attempts']})")
+        resume_text = job["resume_text"]
+        jd_text = job["job_description_text"]
+        
+        result, cached = await run_analysis(
+            resume_text,
+            jd_text,
+            priority="batch",
+            backend=job.get("backend"),
+            high_priority=job.get("high_priority", False)
+        )
+        analysis_id = await database.save_analysis_result(
+            match_percentage=result["match_percentage"],
+            missing_skills=result["missing_skills"],
+            improvement_suggestions=result["improvement_suggestions"],
+            resume_length=len(resume_text),
+            jd_length=len(jd_text),
+            cached=cached,
+            near_duplicate=result.pop("near_duplicate", None)
+        )
+        finished = await database.finish_job(
+            job_id, worker_id, "succeeded",
+            result={**result, "cached": cached},
+            analysis_id=analysis_id
+        )
+        
+    except Exception as e:
+        # Invalid input fails for good; an invalid model answer is a
+        # ValueError too, but is retried like any transient error
+        if isinstance(e, ValueError) and not isinstance(e, InvalidLLMResponse):
+            logger.warning(f"❌ Job {job_id} rejected: {str(e)}")
+            finished = await database.finish_job(job_id, worker_id, "failed", error=str(e))
+        
+        # Quota and circuit errors say when to retry; other errors back off linearly
+        elif job["attempts"] < database.JOB_MAX_ATTEMPTS:
+            delay = getattr(e, "retry_after", 0) or JOB_RETRY_DELAY * job["attempts"]
+            logger.warning(f"⚠️ Job {job_id} failed ({str(e)}), retrying in {delay:.0f}s")
+            await database.release_job(job_id, worker_id, delay)
+            return
+        
+        else:
+            logger.error(f"❌ Job {job_id} failed after {job['attempts']} attempts: {str(e)}")
+            finished = await database.finish_job(
+                job_id, worker_id, "failed",
+                error="An error occurred during analysis. Please try again later."
+            )
+        
+    finally:
+        lease_keeper.cancel()
+    
+    if finished is None:
+        logger.warning(f"⚠️ Job {job_id} finished after its lease was lost; outcome discarded")
+        return
+    
+    if finished.get("callback_url"):
+        await deliver_callback(finished)
+
+
+async def _worker_loop(worker_id: str) -> None:
+    """Claim and process jobs until cancelled."""
+    while True:
+        try:
+            job = await database.claim_job(worker_id)
+        except Exception as e:
+            logger.error(f"❌ Worker {worker_id} failed to claim a job: {str(e)}")
+            job = None
+        
+        if job is None:
+            job_available.clear()
+            try:
+                await asyncio.wait_for(job_available.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        try:
+            await process_job(job, worker_id)
+        except asyncio.CancelledError:
+            # Hand the job back instead of waiting for its lease to expire
+            await database.release_job(job["_id"], worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"❌ Worker {worker_id} crashed on job {job['_id']}: {str(e)}")
+
+
+def start_job_workers() -> None:
+    """
+    Start the job worker pool if MongoDB is connected.
+    Called during application startup.
+    """
+    global job_available
+    
+    if JOB_WORKERS <= 0 or database.jobs_collection is None:
+        return
+    
+    job_available = asyncio.Event()
+    for index in range(JOB_WORKERS):
+        worker_id = f"{PROCESS_ID}-{index}"
+        job_workers.append(asyncio.create_task(_worker_loop(worker_id)))
+    logger.info(f"✅ Started {JOB_WORKERS} job workers")
+
+
+async def stop_job_workers() -> None:
+    """
+    Stop the job workers, returning in-progress jobs to the queue.
+    Called during application shutdown.
+    """
+    if not job_workers:
+        return
+    
+    for worker in job_workers:
+        worker.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    job_workers.clear()
+    logger.info("🛑 Job workers stopped")
+
+
+def get_worker_stats() -> Dict:
+    """Get the number of job workers running in this process."""
+    return {
+        "process_id": PROCESS_ID,
+        "workers": sum(1 for worker in job_workers if not worker.done())
+    }
@@ -0,0 +1,203 @@
+"""
+Incremental JSON parser for streamed LLM output.
+Emits each top-level field, and each element of a top-level array,
+as soon as it is complete in the stream.
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple
+
+# Parser states
+_BEFORE_OBJECT = "before_object"
+_EXPECT_KEY = "expect_key"
+_EXPECT_COLON = "expect_colon"
+_EXPECT_VALUE = "expect_value"
+_ARRAY_ITEM_OR_END = "array_item_or_end"
+_ARRAY_AFTER_ITEM = "array_after_item"
+_AFTER_VALUE = "after_value"
+_DONE = "done"
+
+_WHITESPACE = " \t\n\r"
+
+
+class ParseEvent(NamedTuple):
+    """A completed piece of the top-level JSON object."""
+    field: str  # Top-level key the value belongs to
+    value: Any  # Completed scalar value, or one array element
+    is_item: bool  # True when value is an element of an array field
+
+
+class IncrementalJSONParser:
+    """
+    Parse a flat JSON object fed in arbitrary chunks.
+    
+    Any text before the first "{" (for example a sentence or a markdown
+    fence) and anything after the closing "}" is ignored, which matches how
+    models tend to wrap their JSON. Nested values inside a field are
+    decoded whole once complete.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._state = _BEFORE_OBJECT
+        self._key = None
+        self._decoder = json.JSONDecoder()
+        self.result: Dict[str, Any] = {}
+    
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the object has been parsed."""
+        return self._state == _DONE
+    
+    def feed(self, chunk: str) -> List[ParseEvent]:
+        """
+        Add a chunk of text and return the events it completes.
+        
+        Args:
+            chunk: Next piece of the streamed text
+            
+        Returns:
+            List[ParseEvent]: Events completed by this chunk, in order
+            
+        Raises:
+            ValueError: If the stream is not a valid JSON object
+        """
+        if self._state == _DONE:
+            return []
+        
+        self._buffer += chunk
+        events: List[ParseEvent] = []
+        while self._step(events):
+            pass
+        
+        # Drop consumed text so the buffer only holds the pending token
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return events
+    
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing and return the complete object.
+        
+        Returns:
+            Dict: The parsed object
+            
+        Raises:
+            ValueError: If no JSON object was found or it was incomplete
+        """
+        if self._state == _BEFORE_OBJECT:
+            raise ValueError("No JSON found in response")
+        if self._state != _DONE:
+            raise ValueError("Incomplete JSON object in response")
+        return self.result
+    
+    def _skip_whitespace(self) -> bool:
+        """Advance past whitespace; return False if the buffer is exhausted."""
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self._buffer)
+    
+    def _decode_value(self):
+        """
+        Decode the value starting at the cursor.
+        
+        Returns:
+            tuple: (True, value) when complete, (False, None) when more input is needed
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            # Most likely a value cut mid-token; close() reports real errors
+            return False, None
+        
+        # A number or literal touching the end of the buffer may still grow
+        if end == len(self._buffer) and not isinstance(value, (str, list, dict)):
+            return False, None
+        
+        self._pos = end
+        return True, value
+    
+    def _expect(self, allowed: str) -> str:
+        """Consume one structural character from the allowed set."""
+        char = self._buffer[self._pos]
+        if char not in allowed:
+            raise ValueError(f"Invalid JSON in LLM response: unexpected {char!r} at state {self._state}")
+        self._pos += 1
+        return char
+    
+    def _step(self, events: List[ParseEvent]) -> bool:
+        """Advance the state machine by one token; return False when blocked."""
+        if self._state == _DONE:
+            return False
+        
+        if self._state == _BEFORE_OBJECT:
+            start = self._buffer.find("{", self._pos)
+            if start == -1:
+                self._pos = len(self._buffer)
+                return False
+            self._pos = start + 1
+            self._state = _EXPECT_KEY
+            return True
+        
+        if not self._skip_whitespace():
+            return False
+        
+        if self._state == _EXPECT_KEY:
+            if self._buffer[self._pos] == "}":
+                self._pos += 1
+                self._state = _DONE
+                return True
+            if self._buffer[self._pos] != '"':
+                self._expect('"}')
+            complete, key = self._decode_value()
+            if not complete:
+                return False
+            self._key = key
+            self._state = _EXPECT_COLON
+            return True
+        
+        if self._state == _EXPECT_COLON:
+            self._expect(":")
+            self._state = _EXPECT_VALUE
+            return True
+        
+        if self._state == _EXPECT_VALUE:
+            if self._buffer[self._pos] == "[":
+                self._pos += 1
+                self.result[self._key] = []
+                self._state = _ARRAY_ITEM_OR_END
+                return True
+            complete, value = self._decode_value()
+            if not complete:
+                return False
+            self.result[self._key] = value
+            events.append(ParseEvent(self._key, value, False))
+            self._state = _AFTER_VALUE
+            return True
+        
+        if self._state == _ARRAY_ITEM_OR_END:
+            if self._buffer[self._pos] == "]":
+                self._pos += 1
+                self._state = _AFTER_VALUE
+                return True
+            complete, value = self._decode_value()
+            if not complete:
+                return False
+            self.result[self._key].append(value)
+            events.append(ParseEvent(self._key, value, True))
+            self._state = _ARRAY_AFTER_ITEM
+            return True
+        
+        if self._state == _ARRAY_AFTER_ITEM:
+            char = self._expect(",]")
+            self._state = _ARRAY_ITEM_OR_END if char == "," else _AFTER_VALUE
+            return True
+        
+        if self._state == _AFTER_VALUE:
+            char = self._expect(",}")
+            self._state = _EXPECT_KEY if char == "," else _DONE
+            return True
+        
+        return False
@@ -0,0 +1,168 @@
+"""
+LLM backends for the analysis service.
+A backend is one chat-completion endpoint (OpenAI, an OpenAI-compatible
+server such as vLLM or llama.cpp, or the offline stub) with its own
+connection pool, concurrency limit, quota and circuit breaker.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+import httpx
+from openai import AsyncOpenAI
+
+from app.services.rate_limiter import QuotaScheduler, PRIORITIES
+from app.services.resilience import ResilientCaller
+
+logger = logging.getLogger(__name__)
+
+# Backend kinds
+OPENAI = "openai"
+OPENAI_COMPATIBLE = "openai_compatible"
+STUB = "stub"
+
+
+class LLMBackend:
+    """
+    One chat-completion endpoint and the state that belongs to it.
+    
+    Backends without a client (the stub, or OpenAI without an API key)
+    answer with local skill matching, which is never cached.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        model: str,
+        client: Optional[AsyncOpenAI],
+        max_concurrency: int,
+        quota: QuotaScheduler,
+        resilience: ResilientCaller,
+        base_url: Optional[str] = None,
+        context_tokens: int = 0
+    ):
+        self.name = name
+        self.kind = kind
+        self.model = model
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.quota = quota
+        self.resilience = resilience
+        self.base_url = base_url
+        # Context window of the model in tokens; 0 when unknown or unlimited
+        self.context_tokens = context_tokens
+    
+    @property
+    def configured(self) -> bool:
+        """Whether calls go to a real model."""
+        return self.client is not None
+    
+    @property
+    def cache_namespace(self) -> str:
+        """Cache key component, so backends never share cached results."""
+        return f"{self.name}:{self.model}"
+    
+    async def close(self) -> None:
+        """Close the client and its connection pool."""
+        if self.client:
+            await self.client.close()
+            logger.info(f"🔌 LLM backend '{self.name}' closed")
+    
+    def stats(self) -> Dict:
+        """Get configuration, quota and resilience state of the backend."""
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "model": self.model,
+            "base_url": self.base_url,
+            "configured": self.configured,
+            "max_concurrency": self.max_concurrency,
+            "context_tokens": self.context_tokens,
+            "quota": self.quota.stats(),
+            "resilience": self.resilience.stats()
+        }
+
+
+def create_http_client(
+    timeout: float,
+    connect_timeout: float,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float
+) -> httpx.AsyncClient:
+    """
+    Create the pooled HTTP client of a backend.
+    The pool is sized to the backend's concurrency limit so every permitted
+    in-flight call can reuse a keep-alive connection.
+    
+    Args:
+        timeout: Read/write timeout of a call in seconds
+        connect_timeout: Seconds to establish a connection; kept short so a
+            dead host fails fast instead of using up the call timeout
+        max_connections: Upper bound on open connections
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+    
+    Returns:
+        httpx.AsyncClient: Client to pass to AsyncOpenAI
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+    )
+
+
+def parse_backend_routes(routes: str) -> Dict[str, str]:
+    """
+    Parse routing rules such as "batch=local" into priority class -> backend.
+    
+    Args:
+        routes: Comma-separated priority=backend pairs
+    
+    Returns:
+        Dict[str, str]: Backend name per priority class
+    
+    Raises:
+        ValueError: If a rule is malformed or names an unknown priority class
+    """
+    parsed = {}
+    for rule in routes.split(","):
+        if not rule.strip():
+            continue
+        priority, _, backend = rule.partition("=")
+        priority, backend = priority.strip(), backend.strip()
+        if priority not in PRIORITIES or not backend:
+            raise ValueError(f"Invalid LLM backend route '{rule.strip()}'")
+        parsed[priority] = backend
+    return parsed
+
+
+def parse_escalation_routes(routes: str) -> Dict[str, str]:
+    """
+    Parse escalation rules such as "openai=openai-strong" into backend -> stronger backend.
+    
+    Args:
+        routes: Comma-separated backend=backend pairs
+    
+    Returns:
+        Dict[str, str]: Backend escalated to, per first-try backend
+    
+    Raises:
+        ValueError: If a rule is malformed or escalates a backend to itself
+    """
+    parsed = {}
+    for rule in routes.split(","):
+        if not rule.strip():
+            continue
+        source, _, target = rule.partition("=")
+        source, target = source.strip(), target.strip()
+        if not source or not target or source == target:
+            raise ValueError(f"Invalid LLM escalation route '{rule.strip()}'")
+        parsed[source] = target
+    return parsed
@@ -4,24 +4,374 @@ Implements prompt engineering and API communication with GPT models.
 """
 
 import os
-import json
+import time
+import asyncio
 import logging
-from typing import Dict, List
-from openai import OpenAI
-from openai import RateLimitError, APIError
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Any
+from openai import AsyncOpenAI, AsyncStream
+from openai import RateLimitError, APIError, APITimeoutError, APIConnectionError, APIStatusError
+
+from app.services.json_stream import IncrementalJSONParser
+from app.services.llm_backends import (
+    LLMBackend,
+    OPENAI,
+    OPENAI_COMPATIBLE,
+    STUB,
+    create_http_client,
+    parse_backend_routes,
+    parse_escalation_routes
+)
+from app.services.metrics import stage, record_stage, record_llm_usage
+from app.services.rate_limiter import QuotaScheduler, RateLimitExceeded, estimate_tokens
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from app.services.skills import build_local_analysis, prescreen_resume_profile
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client - optional (will work without it for testing)
-api_key = os.getenv("OPENAI_API_KEY")
-if api_key:
-    client = OpenAI(api_key=api_key)
-else:
-    client = None
-    logger.warning("⚠️ OPENAI_API_KEY not set - API calls will fail, but server will run")
+# Concurrency and timeout configuration
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "100"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# OpenAI quota for this worker (0 disables a limit). Calls wait locally for
+# budget for up to LLM_QUOTA_MAX_WAIT seconds before being rejected with a 429.
+LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "3500"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "90000"))
+LLM_QUOTA_BURST_SECONDS = float(os.getenv("LLM_QUOTA_BURST_SECONDS", "10"))
+LLM_QUOTA_MAX_WAIT = float(os.getenv("LLM_QUOTA_MAX_WAIT", "30"))
+
+# Retries of failed calls (timeouts, connection errors, 429s and 5xx),
+# with exponential backoff and full jitter between attempts
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+
+# Circuit breaker: consecutive failures before failing fast, and seconds
+# before a probe call is let through again
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("LLM_BREAKER_RECOVERY_TIMEOUT", "30"))
+
+# Hedged requests: send a second call when the first is slower than this
+# percentile of recent latencies, and use whichever answers first
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+
+# Completion budget per call; OpenAI counts it against TPM up front
+LLM_MAX_COMPLETION_TOKENS = 1000
+
+# Completion budgets of JD and resume profile extractions
+JD_PROFILE_MAX_TOKENS = 400
+RESUME_PROFILE_MAX_TOKENS = 600
+
+# Model used for analysis; GPT-4 gives better quality, gpt-3.5-turbo is cheaper
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+# Context window of OPENAI_MODEL in tokens; larger inputs are analyzed in chunks
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "16385"))
+
+# Stronger OpenAI model, registered as the "openai-strong" backend when set.
+# It has its own quota buckets, sized like OPENAI_MODEL's.
+OPENAI_STRONG_MODEL = os.getenv("OPENAI_STRONG_MODEL", "")
+OPENAI_STRONG_CONTEXT_TOKENS = int(os.getenv("OPENAI_STRONG_CONTEXT_TOKENS", "128000"))
+
+# Self-hosted OpenAI-compatible server (vLLM, llama.cpp, ...), registered
+# as the "local" backend when a base URL is set. It has no quota by default.
+LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "local-model")
+LOCAL_LLM_API_KEY = os.getenv("LOCAL_LLM_API_KEY", "not-needed")
+LOCAL_LLM_MAX_CONCURRENCY = int(os.getenv("LOCAL_LLM_MAX_CONCURRENCY", "32"))
+LOCAL_LLM_RPM_LIMIT = int(os.getenv("LOCAL_LLM_RPM_LIMIT", "0"))
+LOCAL_LLM_TPM_LIMIT = int(os.getenv("LOCAL_LLM_TPM_LIMIT", "0"))
+LOCAL_LLM_CONTEXT_TOKENS = int(os.getenv("LOCAL_LLM_CONTEXT_TOKENS", "8192"))
+
+# Backend used when a request does not name one, and per-priority overrides
+# such as "batch=local" to move high-volume traffic off OpenAI
+LLM_DEFAULT_BACKEND = os.getenv("LLM_DEFAULT_BACKEND", OPENAI)
+LLM_BACKEND_ROUTES = os.getenv("LLM_BACKEND_ROUTES", "")
+
+# Backends whose borderline or invalid answers are retried on a stronger
+# backend, e.g. "openai=openai-strong" or "local=openai"
+LLM_ESCALATION_ROUTES = os.getenv("LLM_ESCALATION_ROUTES", "")
+
+# Bump whenever create_analysis_prompt changes so cached results are not reused
+PROMPT_VERSION = "v1"
+
+# Bump whenever a profile prompt changes so cached profiles are not reused
+JD_PROFILE_VERSION = "v1"
+RESUME_PROFILE_VERSION = "v1"
+
+SYSTEM_PROMPT = "You are an expert recruiter and resume analyst. Analyze resumes against job descriptions and provide structured, JSON-formatted feedback."
+
+# Streaming event names, keyed by the JSON field they come from
+STREAM_EVENTS = {
+    "match_percentage": "match_percentage",
+    "missing_skills": "missing_skill",
+    "improvement_suggestions": "improvement_suggestion"
+}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Check whether a failed LLM call is worth retrying.
+    
+    Args:
+        error: Exception raised by one attempt
+        
+    Returns:
+        bool: True for timeouts, connection errors, 429s and 5xx responses
+    """
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def create_resilience(name: str) -> ResilientCaller:
+    """
+    Create the retry, circuit breaking and hedging policy of a backend.
+    Every backend has its own breaker, so one being down does not fail the others.
+    
+    Args:
+        name: Backend name, used for the breaker
+    
+    Returns:
+        ResilientCaller: Caller wrapping the backend's calls
+    """
+    return ResilientCaller(
+        breaker=CircuitBreaker(
+            failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=LLM_BREAKER_RECOVERY_TIMEOUT,
+            name=name
+        ),
+        is_retryable=is_retryable_error,
+        max_retries=LLM_MAX_RETRIES,
+        base_delay=LLM_RETRY_BASE_DELAY,
+        max_delay=LLM_RETRY_MAX_DELAY,
+        hedge_enabled=LLM_HEDGE_ENABLED,
+        hedge_percentile=LLM_HEDGE_PERCENTILE
+    )
+
+
+def create_chat_client(
+    api_key: str,
+    max_concurrency: int,
+    max_keepalive_connections: int,
+    base_url: Optional[str] = None
+) -> AsyncOpenAI:
+    """
+    Create an async chat client on its own keep-alive connection pool.
+    Retries are handled by the backend's ResilientCaller, so the client's
+    own retries are disabled.
+    
+    Args:
+        api_key: API key sent to the server
+        max_concurrency: Concurrency limit of the backend, used as pool size
+        max_keepalive_connections: Idle connections kept open for reuse
+        base_url: Server URL; None uses OpenAI (or OPENAI_BASE_URL)
+    
+    Returns:
+        AsyncOpenAI: Configured client
+    """
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=LLM_REQUEST_TIMEOUT,
+        max_retries=0,
+        http_client=create_http_client(
+            timeout=LLM_REQUEST_TIMEOUT,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def create_backends() -> Dict[str, LLMBackend]:
+    """
+    Create the configured LLM backends.
+    "openai" and "stub" always exist; "local" exists when LOCAL_LLM_BASE_URL is set.
+    
+    Returns:
+        Dict[str, LLMBackend]: Backends by name
+    """
+    # OpenAI is optional (the server still runs without it, for testing)
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.warning("⚠️ OPENAI_API_KEY not set - API calls will fail, but server will run")
+    
+    backends = {
+        OPENAI: LLMBackend(
+            name=OPENAI,
+            kind=OPENAI,
+            model=OPENAI_MODEL,
+            client=create_chat_client(api_key, LLM_MAX_CONCURRENCY, LLM_MAX_KEEPALIVE_CONNECTIONS) if api_key else None,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            quota=QuotaScheduler(
+                requests_per_minute=LLM_RPM_LIMIT,
+                tokens_per_minute=LLM_TPM_LIMIT,
+                burst_seconds=LLM_QUOTA_BURST_SECONDS,
+                max_wait=LLM_QUOTA_MAX_WAIT
+            ),
+            resilience=create_resilience(OPENAI),
+            context_tokens=LLM_CONTEXT_TOKENS
+        ),
+        STUB: LLMBackend(
+            name=STUB,
+            kind=STUB,
+            model="local-skill-matching",
+            client=None,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            quota=QuotaScheduler(0, 0),
+            resilience=create_resilience(STUB)
+        )
+    }
+    
+    if OPENAI_STRONG_MODEL:
+        backends["openai-strong"] = LLMBackend(
+            name="openai-strong",
+            kind=OPENAI,
+            model=OPENAI_STRONG_MODEL,
+            client=create_chat_client(api_key, LLM_MAX_CONCURRENCY, LLM_MAX_KEEPALIVE_CONNECTIONS) if api_key else None,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            quota=QuotaScheduler(
+                requests_per_minute=LLM_RPM_LIMIT,
+                tokens_per_minute=LLM_TPM_LIMIT,
+                burst_seconds=LLM_QUOTA_BURST_SECONDS,
+                max_wait=LLM_QUOTA_MAX_WAIT
+            ),
+            resilience=create_resilience("openai-strong"),
+            context_tokens=OPENAI_STRONG_CONTEXT_TOKENS
+        )
+        logger.info(f"✓ Strong OpenAI backend configured ({OPENAI_STRONG_MODEL})")
+    
+    if LOCAL_LLM_BASE_URL:
+        # A LAN server gets a keep-alive connection for every permitted call
+        backends["local"] = LLMBackend(
+            name="local",
+            kind=OPENAI_COMPATIBLE,
+            model=LOCAL_LLM_MODEL,
+            client=create_chat_client(LOCAL_LLM_API_KEY, LOCAL_LLM_MAX_CONCURRENCY, LOCAL_LLM_MAX_CONCURRENCY, LOCAL_LLM_BASE_URL),
+            max_concurrency=LOCAL_LLM_MAX_CONCURRENCY,
+            quota=QuotaScheduler(
+                requests_per_minute=LOCAL_LLM_RPM_LIMIT,
+                tokens_per_minute=LOCAL_LLM_TPM_LIMIT,
+                burst_seconds=LLM_QUOTA_BURST_SECONDS,
+                max_wait=LLM_QUOTA_MAX_WAIT
+            ),
+            resilience=create_resilience("local"),
+            base_url=LOCAL_LLM_BASE_URL,
+            context_tokens=LOCAL_LLM_CONTEXT_TOKENS
+        )
+        logger.info(f"✓ Local LLM backend configured at {LOCAL_LLM_BASE_URL} ({LOCAL_LLM_MODEL})")
+    
+    return backends
+
+
+def load_backend_routes(backends: Dict[str, LLMBackend]) -> Tuple[str, Dict[str, str]]:
+    """
+    Read the default backend and the per-priority routes, dropping any that
+    name a backend which does not exist.
+    
+    Args:
+        backends: Configured backends
+    
+    Returns:
+        Tuple[str, Dict[str, str]]: Default backend name and routes
+    """
+    default = LLM_DEFAULT_BACKEND
+    if default not in backends:
+        logger.warning(f"⚠️ Unknown LLM_DEFAULT_BACKEND '{default}' - using {OPENAI}")
+        default = OPENAI
+    
+    try:
+        routes = parse_backend_routes(LLM_BACKEND_ROUTES)
+    except ValueError as e:
+        logger.warning(f"⚠️ Ignoring LLM_BACKEND_ROUTES: {str(e)}")
+        routes = {}
+    for priority, name in list(routes.items()):
+        if name not in backends:
+            logger.warning(f"⚠️ Ignoring LLM backend route {priority}={name}: unknown backend")
+            del routes[priority]
+    
+    return default, routes
+
+
+def load_escalation_routes(backends: Dict[str, LLMBackend]) -> Dict[str, str]:
+    """
+    Read the escalation routes, dropping any that name a backend which does not exist.
+    
+    Args:
+        backends: Configured backends
+    
+    Returns:
+        Dict[str, str]: Backend escalated to, per first-try backend
+    """
+    try:
+        routes = parse_escalation_routes(LLM_ESCALATION_ROUTES)
+    except ValueError as e:
+        logger.warning(f"⚠️ Ignoring LLM_ESCALATION_ROUTES: {str(e)}")
+        return {}
+    for source, target in list(routes.items()):
+        if source not in backends or target not in backends:
+            logger.warning(f"⚠️ Ignoring LLM escalation route {source}={target}: unknown backend")
+            del routes[source]
+    return routes
+
+
+# All backends of this worker, and how requests are routed to them
+llm_backends = create_backends()
+default_backend_name, backend_routes = load_backend_routes(llm_backends)
+escalation_routes = load_escalation_routes(llm_backends)
+
+# Quota and resilience state of the OpenAI backend
+quota_scheduler = llm_backends[OPENAI].quota
+llm_resilience = llm_backends[OPENAI].resilience
+
+
+def select_backend(name: Optional[str] = None, priority: str = "interactive") -> LLMBackend:
+    """
+    Pick the backend for a call: the one named by the request, else the
+    route for its priority class, else the default backend.
+    
+    Args:
+        name: Backend requested by the caller, if any
+        priority: Quota priority class of the call
+    
+    Returns:
+        LLMBackend: Backend to call
+    
+    Raises:
+        ValueError: If the requested backend does not exist
+    """
+    name = name or backend_routes.get(priority) or default_backend_name
+    backend = llm_backends.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown LLM backend '{name}'. Available backends: {', '.join(llm_backends)}")
+    return backend
+
+
+def escalation_backend(backend: LLMBackend) -> Optional[LLMBackend]:
+    """
+    Get the stronger backend a backend's analyses escalate to.
+    
+    Args:
+        backend: Backend that tries first
+    
+    Returns:
+        LLMBackend: Configured backend to escalate to, or None
+    """
+    name = escalation_routes.get(backend.name)
+    target = llm_backends.get(name) if name else None
+    return target if target is not None and target.configured else None
 
 
-def create_analysis_prompt(resume_text: str, job_description_text: str) -> str:
+def create_analysis_prompt(
+    resume_text: str,
+    job_description_text: str,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> str:
     """
     Create a well-structured prompt for resume-JD matching analysis.
     Implements prompt engineering best practices for consistent, structured output.
@@ -29,19 +379,33 @@ def create_analysis_prompt(resume_text: str, job_description_text: str) -> str:
     Args:
         resume_text: Full resume content
         job_description_text: Full job description content
+        jd_profile: Requirement profile of the JD; sent instead of the full JD when given
+        resume_profile: Profile of the resume; sent instead of the full resume,
+            with a local skill pre-screen, when given
         
     Returns:
         str: Formatted prompt for LLM
     """
     
+    if resume_profile is not None:
+        resume_section = (
+            f"CANDIDATE PROFILE (extracted from the resume):\n{format_resume_profile(resume_profile)}\n"
+            f"{format_prescreen(prescreen_resume_profile(resume_profile, job_description_text))}"
+        )
+    else:
+        resume_section = f"RESUME:\n{resume_text}"
+    
+    if jd_profile is not None:
+        job_section = f"JOB REQUIREMENTS (extracted from the job description):\n{format_jd_profile(jd_profile)}"
+    else:
+        job_section = f"JOB DESCRIPTION:\n{job_description_text}"
+    
     prompt = f"""Analyze the following resume against the job description. 
 Provide a structured JSON response with the exact fields specified below.
 
-RESUME:
-{resume_text}
+{resume_section}
 
-JOB DESCRIPTION:
-{job_description_text}
+{job_section}
 
 Analyze and respond in the following JSON format ONLY (no additional text):
 {{
@@ -62,6 +426,385 @@ Focus on technical skills, experience level, and specific domain expertise menti
     return prompt
 
 
+def create_jd_profile_prompt(job_description_text: str) -> str:
+    """
+    Create the prompt that extracts a compact requirement profile from a JD.
+    
+    Args:
+        job_description_text: Full job description content
+    
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    
+    prompt = f"""Extract the hiring requirements from the following job description.
+Ignore company boilerplate, benefits and legal statements.
+
+JOB DESCRIPTION:
+{job_description_text}
+
+Respond in the following JSON format ONLY (no additional text):
+{{
+    "title": "<job title>",
+    "seniority": "<entry, mid, senior, lead or principal>",
+    "domain": "<industry or product domain, a few words>",
+    "min_years_experience": <integer or null>,
+    "required_skills": [<skills and technologies that are required>],
+    "nice_to_have_skills": [<skills described as preferred, a plus or nice to have>],
+    "responsibilities": [<up to 5 key responsibilities, 10 words max each>]
+}}"""
+    
+    return prompt
+
+
+def validate_jd_profile(parsed: Dict) -> Dict:
+    """
+    Validate and normalize an extracted JD requirement profile.
+    
+    Args:
+        parsed: Decoded JSON object from the model
+    
+    Returns:
+        dict: Profile with every field present and of the expected type
+    
+    Raises:
+        ValueError: If the skill lists are missing or not lists
+    """
+    for field in ("required_skills", "nice_to_have_skills"):
+        if not isinstance(parsed.get(field), list):
+            raise ValueError(f"{field} must be a list")
+    
+    years = parsed.get("min_years_experience")
+    return {
+        "title": str(parsed.get("title") or ""),
+        "seniority": str(parsed.get("seniority") or ""),
+        "domain": str(parsed.get("domain") or ""),
+        "min_years_experience": years if isinstance(years, int) and not isinstance(years, bool) else None,
+        "required_skills": [str(skill) for skill in parsed["required_skills"]],
+        "nice_to_have_skills": [str(skill) for skill in parsed["nice_to_have_skills"]],
+        "responsibilities": [str(item) for item in parsed.get("responsibilities") or []][:5]
+    }
+
+
+def format_jd_profile(profile: Dict) -> str:
+    """
+    Render a JD requirement profile as compact prompt text.
+    
+    Args:
+        profile: Profile returned by validate_jd_profile
+    
+    Returns:
+        str: One line per populated field
+    """
+    lines = []
+    if profile["title"]:
+        lines.append(f"Title: {profile['title']}")
+    if profile["seniority"]:
+        lines.append(f"Seniority: {profile['seniority']}")
+    if profile["domain"]:
+        lines.append(f"Domain: {profile['domain']}")
+    if profile["min_years_experience"] is not None:
+        lines.append(f"Minimum experience: {profile['min_years_experience']} years")
+    lines.append(f"Required skills: {', '.join(profile['required_skills']) or 'none stated'}")
+    if profile["nice_to_have_skills"]:
+        lines.append(f"Nice-to-have skills: {', '.join(profile['nice_to_have_skills'])}")
+    if profile["responsibilities"]:
+        lines.append("Key responsibilities:")
+        lines += [f"- {item}" for item in profile["responsibilities"]]
+    return "\n".join(lines)
+
+
+def create_resume_profile_prompt(resume_text: str) -> str:
+    """
+    Create the prompt that extracts a compact candidate profile from a resume.
+    
+    Args:
+        resume_text: Full resume content
+    
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    
+    prompt = f"""Extract a candidate profile from the following resume.
+
+RESUME:
+{resume_text}
+
+Respond in the following JSON format ONLY (no additional text):
+{{
+    "current_title": "<most recent job title>",
+    "titles": [<previous job titles, most recent first, up to 5>],
+    "total_years_experience": <integer or null>,
+    "domains": [<industries or product domains worked in>],
+    "skills": [{{"name": "<skill or technology>", "years": <years of use as a number, or null>}}],
+    "education": "<highest degree and field, or empty>",
+    "highlights": [<up to 5 notable, quantified achievements, 15 words max each>]
+}}"""
+
+    return prompt
+
+
+def validate_resume_profile(parsed: Dict) -> Dict:
+    """
+    Validate and normalize an extracted resume profile.
+    
+    Args:
+        parsed: Decoded JSON object from the model
+    
+    Returns:
+        dict: Profile with every field present and of the expected type
+    
+    Raises:
+        ValueError: If the skill list is missing or not a list
+    """
+    if not isinstance(parsed.get("skills"), list):
+        raise ValueError("skills must be a list")
+    
+    skills = []
+    for skill in parsed["skills"]:
+        if isinstance(skill, dict) and skill.get("name"):
+            years = skill.get("years")
+            valid_years = isinstance(years, (int, float)) and not isinstance(years, bool) and years >= 0
+            skills.append({"name": str(skill["name"]), "years": years if valid_years else None})
+        elif isinstance(skill, str) and skill:
+            skills.append({"name": skill, "years": None})
+    
+    years = parsed.get("total_years_experience")
+    return {
+        "current_title": str(parsed.get("current_title") or ""),
+        "titles": [str(title) for title in parsed.get("titles") or []][:5],
+        "total_years_experience": years if isinstance(years, int) and not isinstance(years, bool) else None,
+        "domains": [str(domain) for domain in parsed.get("domains") or []],
+        "skills": skills,
+        "education": str(parsed.get("education") or ""),
+        "highlights": [str(item) for item in parsed.get("highlights") or []][:5]
+    }
+
+
+def format_years(years: Optional[float]) -> str:
+    """Format years of experience compactly, e.g. "3y" or "1.5y"."""
+    return f"{years:g}y"
+
+
+def format_resume_profile(profile: Dict) -> str:
+    """
+    Render a resume profile as compact prompt text.
+    
+    Args:
+        profile: Profile returned by validate_resume_profile
+    
+    Returns:
+        str: One line per populated field
+    """
+    lines = []
+    if profile["current_title"]:
+        lines.append(f"Current title: {profile['current_title']}")
+    if profile["titles"]:
+        lines.append(f"Previous titles: {', '.join(profile['titles'])}")
+    if profile["total_years_experience"] is not None:
+        lines.append(f"Total experience: {profile['total_years_experience']} years")
+    if profile["domains"]:
+        lines.append(f"Domains: {', '.join(profile['domains'])}")
+    skills = [
+        f"{skill['name']} ({format_years(skill['years'])})" if skill["years"] is not None else skill["name"]
+        for skill in profile["skills"]
+    ]
+    lines.append(f"Skills: {', '.join(skills) or 'none stated'}")
+    if profile["education"]:
+        lines.append(f"Education: {profile['education']}")
+    if profile["highlights"]:
+        lines.append("Highlights:")
+        lines += [f"- {item}" for item in profile["highlights"]]
+    return "\n".join(lines)
+
+
+def format_prescreen(prescreen: Dict) -> str:
+    """
+    Render the local skill pre-screen of a resume profile as prompt text.
+    
+    Args:
+        prescreen: Result of prescreen_resume_profile
+    
+    Returns:
+        str: Matched and missing taxonomy skills of the JD
+    """
+    matched = [
+        f"{skill} ({format_years(years)})" if years is not None else skill
+        for skill, years in prescreen["matched_skills"]
+    ]
+    return (
+        f"Local skill pre-screen - JD skills found in profile: {', '.join(matched) or 'none'}; "
+        f"not found: {', '.join(prescreen['missing_skills']) or 'none'}"
+    )
+
+
+def build_messages(prompt: str) -> List[Dict]:
+    """
+    Build the chat messages sent to the model for an analysis prompt.
+    
+    Args:
+        prompt: Prompt created by create_analysis_prompt
+        
+    Returns:
+        List[Dict]: System and user messages
+    """
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+def estimate_call_tokens(messages: List[Dict], max_tokens: int = LLM_MAX_COMPLETION_TOKENS) -> int:
+    """
+    Estimate the tokens a chat call will be charged against the TPM quota.
+    
+    Args:
+        messages: Chat messages of the call
+        max_tokens: Completion budget of the call
+        
+    Returns:
+        int: Estimated prompt tokens plus the completion budget
+    """
+    prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+    return prompt_tokens + max_tokens
+
+
+def fits_context(backend: LLMBackend, prompt: str, max_tokens: int = LLM_MAX_COMPLETION_TOKENS) -> bool:
+    """
+    Check whether a prompt and its completion budget fit the backend's context window.
+    
+    Args:
+        backend: Backend the call would go to
+        prompt: User prompt of the call
+        max_tokens: Completion budget of the call
+    
+    Returns:
+        bool: True if the estimated call fits, or the context size is unknown
+    """
+    if not backend.context_tokens:
+        return True
+    return estimate_call_tokens(build_messages(prompt), max_tokens) <= backend.context_tokens
+
+
+def record_usage(
+    backend: LLMBackend,
+    estimated_tokens: int,
+    usage: Any,
+    max_tokens: int = LLM_MAX_COMPLETION_TOKENS
+) -> None:
+    """
+    Correct the backend's token budget with the usage reported by the API.
+    Only the prompt estimate is corrected; the completion budget stays
+    charged because OpenAI counts max_tokens when admitting a call.
+    
+    Args:
+        backend: Backend that served the call
+        estimated_tokens: Tokens charged by estimate_call_tokens
+        usage: Usage object of the response, if any
+        max_tokens: Completion budget of the call
+    """
+    record_llm_usage(usage, backend.name)
+    if usage is None or getattr(usage, "prompt_tokens", None) is None:
+        return
+    backend.quota.adjust(estimated_tokens, usage.prompt_tokens + max_tokens)
+
+
+async def complete_chat(
+    backend: LLMBackend,
+    messages: List[Dict],
+    priority: str,
+    max_tokens: int = LLM_MAX_COMPLETION_TOKENS
+) -> str:
+    """
+    Run one chat completion on a backend and return the generated text.
+    
+    The call waits for the backend's quota and a concurrency slot, and runs
+    through its retries, circuit breaker and hedging. Every attempt has its
+    own LLM_REQUEST_TIMEOUT deadline.
+    
+    Args:
+        backend: Configured backend to call
+        messages: Chat messages of the call
+        priority: Quota priority class, "interactive" or "batch"
+        max_tokens: Completion budget of the call
+    
+    Returns:
+        str: Content of the first choice
+    """
+    estimated_tokens = estimate_call_tokens(messages, max_tokens)
+    
+    async def request_completion():
+        # Every attempt (including hedges) is charged against the quota
+        queued = time.perf_counter()
+        await backend.quota.acquire(estimated_tokens, priority)
+        async with backend.semaphore:
+            record_stage("llm_queue_wait", time.perf_counter() - queued)
+            try:
+                with stage("llm_call"):
+                    return await backend.resilience.timed(asyncio.wait_for(
+                        backend.client.chat.completions.create(
+                            model=backend.model,
+                            messages=messages,
+                            temperature=0.3,  # Lower temperature for more consistent, structured output
+                            max_tokens=max_tokens,
+                            top_p=0.9
+                        ),
+                        timeout=LLM_REQUEST_TIMEOUT
+                    ))
+            except RateLimitError:
+                backend.quota.throttle()
+                raise
+    
+    response = await backend.resilience.call(request_completion)
+    record_usage(backend, estimated_tokens, response.usage, max_tokens)
+    return response.choices[0].message.content
+
+
+def validate_analysis_result(parsed: Dict) -> Dict:
+    """
+    Validate the structure of a parsed analysis result.
+    
+    Args:
+        parsed: Decoded JSON object from the model
+        
+    Returns:
+        dict: The same object, once validated
+        
+    Raises:
+        ValueError: If a field is missing or has the wrong type
+    """
+    # Validate required fields
+    required_fields = ["match_percentage", "missing_skills", "improvement_suggestions"]
+    for field in required_fields:
+        if field not in parsed:
+            raise ValueError(f"Missing required field: {field}")
+    
+    # Validate match_percentage is integer between 0-100
+    match_percentage = parsed["match_percentage"]
+    if not isinstance(match_percentage, int) or match_percentage < 0 or match_percentage > 100:
+        raise ValueError(f"Invalid match_percentage: {match_percentage}")
+    
+    # Validate missing_skills is a list
+    if not isinstance(parsed["missing_skills"], list):
+        raise ValueError("missing_skills must be a list")
+    
+    # Validate improvement_suggestions is a list
+    if not isinstance(parsed["improvement_suggestions"], list):
+        raise ValueError("improvement_suggestions must be a list")
+    
+    return parsed
+
+
+class InvalidLLMResponse(ValueError):
+    """Raised when the model's answer is not a valid analysis."""
+
+
 def parse_llm_response(response_text: str) -> Dict:
     """
     Parse and validate LLM response.
@@ -74,64 +817,59 @@ def parse_llm_response(response_text: str) -> Dict:
         dict: Parsed and validated response
         
     Raises:
-        ValueError: If response cannot be parsed or is invalid
+        InvalidLLMResponse: If response cannot be parsed or is invalid
     """
     
     try:
-        # Try to extract JSON from response
-        # Sometimes LLM might include extra text, so we search for JSON block
-        json_start = response_text.find("{")
-        json_end = response_text.rfind("}") + 1
-        
-        if json_start == -1 or json_end == 0:
-            raise ValueError("No JSON found in response")
-        
-        json_str = response_text[json_start:json_end]
-        parsed = json.loads(json_str)
-        
-        # Validate required fields
-        required_fields = ["match_percentage", "missing_skills", "improvement_suggestions"]
-        for field in required_fields:
-            if field not in parsed:
-                raise ValueError(f"Missing required field: {field}")
-        
-        # Validate match_percentage is integer between 0-100
-        match_percentage = parsed["match_percentage"]
-        if not isinstance(match_percentage, int) or match_percentage < 0 or match_percentage > 100:
-            raise ValueError(f"Invalid match_percentage: {match_percentage}")
-        
-        # Validate missing_skills is a list
-        if not isinstance(parsed["missing_skills"], list):
-            raise ValueError("missing_skills must be a list")
+        # The parser skips any text the LLM puts around the JSON object
+        parser = IncrementalJSONParser()
+        parser.feed(response_text)
+        parsed = validate_analysis_result(parser.close())
         
-        # Validate improvement_suggestions is a list
-        if not isinstance(parsed["improvement_suggestions"], list):
-            raise ValueError("improvement_suggestions must be a list")
-        
-        logger.debug(f"✓ Successfully parsed LLM response")
+        logger.debug("✓ Successfully parsed LLM response")
         return parsed
         
-    except json.JSONDecodeError as e:
-        logger.error(f"✗ JSON parsing error: {str(e)}")
-        raise ValueError(f"Invalid JSON in LLM response: {str(e)}")
     except ValueError as e:
         logger.error(f"✗ Validation error: {str(e)}")
-        raise
+        raise InvalidLLMResponse(str(e)) from e
 
 
-def analyze_resume_vs_jd(resume_text: str, job_description_text: str) -> Dict:
+async def analyze_resume_vs_jd(
+    resume_text: str,
+    job_description_text: str,
+    priority: str = "interactive",
+    backend: Optional[LLMBackend] = None,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> Dict:
     """
-    Main function to analyze resume against job description using OpenAI.
+    Main function to analyze resume against job description using an LLM backend.
     Handles API communication and error management.
     
+    The call is awaited on the backend's shared async client, so the event
+    loop keeps serving other requests while the model generates. Each
+    backend caps its in-flight calls; further callers wait for a free slot.
+    Each call first waits for the backend's request and token quota, with
+    interactive calls served before batch calls.
+    
+    Every attempt has its own LLM_REQUEST_TIMEOUT deadline. Retryable
+    failures are retried with jittered backoff, and the call fails fast
+    with CircuitOpenError while the provider is considered down.
+    
     Args:
         resume_text: Full resume content
         job_description_text: Full job description content
+        priority: Quota priority class, "interactive" or "batch"
+        backend: Backend to call; chosen by select_backend when omitted
+        jd_profile: Requirement profile sent instead of the full JD, if any
+        resume_profile: Candidate profile sent instead of the full resume, if any
         
     Returns:
         dict: Analysis result with match_percentage, missing_skills, improvement_suggestions
         
     Raises:
+        RateLimitExceeded: If no quota became available in time
+        CircuitOpenError: If the circuit breaker is open
         Exception: If API call fails or response is invalid
     """
     
@@ -143,50 +881,47 @@ def analyze_resume_vs_jd(resume_text: str, job_description_text: str) -> Dict:
         if not job_description_text or len(job_description_text) < 50:
             raise ValueError("Job description must be at least 50 characters")
         
-        # Check if OpenAI is configured
-        if not client:
-            logger.warning("⚠️ OpenAI API key not configured - using demo response")
-            return get_demo_response()
+        backend = backend or select_backend(None, priority)
+        
+        # The stub, or OpenAI without an API key, answers with local skill matching
+        if not backend.configured:
+            if backend.kind != STUB:
+                logger.warning("⚠️ OpenAI API key not configured - using local skill matching")
+            return build_local_analysis(resume_text, job_description_text)
         
-        logger.info("📤 Sending analysis request to OpenAI API...")
+        logger.info(f"📤 Sending analysis request to LLM backend '{backend.name}'...")
         
         # Create prompt with best practices
-        prompt = create_analysis_prompt(resume_text, job_description_text)
-        
-        # Call OpenAI API with specified parameters
-        # Using GPT-4 for better analysis quality, fallback to gpt-3.5-turbo if needed
-        model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert recruiter and resume analyst. Analyze resumes against job descriptions and provide structured, JSON-formatted feedback."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,  # Lower temperature for more consistent, structured output
-            max_tokens=1000,
-            top_p=0.9
-        )
+        with stage("prompt_build"):
+            prompt = create_analysis_prompt(resume_text, job_description_text, jd_profile, resume_profile)
+            messages = build_messages(prompt)
         
-        # Extract response content
-        response_text = response.choices[0].message.content
-        logger.debug(f"📥 Received response from OpenAI")
+        # Call the backend with specified parameters
+        response_text = await complete_chat(backend, messages, priority)
+        logger.debug(f"📥 Received response from LLM backend '{backend.name}'")
         
         # Parse and validate response
-        analysis_result = parse_llm_response(response_text)
+        with stage("response_parse"):
+            analysis_result = parse_llm_response(response_text)
         
         logger.info(f"✓ Analysis complete - Match: {analysis_result['match_percentage']}%")
         return analysis_result
         
+    except (asyncio.TimeoutError, APITimeoutError):
+        logger.error(f"✗ OpenAI API call timed out after {LLM_REQUEST_TIMEOUT}s")
+        raise Exception("OpenAI API request timed out. Please try again later.")
+    except RateLimitExceeded:
+        logger.warning("⏳ LLM quota exhausted - rejecting call")
+        raise
+    except CircuitOpenError:
+        logger.warning(f"🔌 LLM backend '{backend.name}' circuit open - failing fast")
+        raise
     except RateLimitError as e:
         logger.error(f"✗ OpenAI API rate limit exceeded: {str(e)}")
-        raise Exception("OpenAI API rate limit exceeded. Please try again later.")
+        raise RateLimitExceeded(
+            "OpenAI API rate limit exceeded. Please try again later.",
+            retry_after=LLM_QUOTA_BURST_SECONDS
+        )
     except APIError as e:
         logger.error(f"✗ OpenAI API error: {str(e)}")
         raise Exception(f"OpenAI API error: {str(e)}")
@@ -198,23 +933,355 @@ def analyze_resume_vs_jd(resume_text: str, job_description_text: str) -> Dict:
         raise Exception(f"Failed to analyze resume: {str(e)}")
 
 
-def get_demo_response() -> Dict:
+async def extract_jd_profile(
+    job_description_text: str,
+    backend: LLMBackend,
+    priority: str = "interactive"
+) -> Dict:
     """
-    Return a demo response when OpenAI API is not configured.
-    Useful for testing the API without an API key.
+    Extract a compact requirement profile from a job description.
+    The profile replaces the full JD in analysis prompts, so a JD scored
+    against many resumes is only read by the model once.
+    
+    Args:
+        job_description_text: Full job description content
+        backend: Configured backend to call
+        priority: Quota priority class, "interactive" or "batch"
+    
+    Returns:
+        dict: Profile with title, seniority, domain, min_years_experience,
+        required_skills, nice_to_have_skills and responsibilities
+    
+    Raises:
+        ValueError: If the model's answer is not a valid profile
+        Exception: If the API call fails
     """
-    return {
-        "match_percentage": 75,
-        "missing_skills": [
-            "Docker containerization",
-            "Kubernetes orchestration",
-            "AWS cloud platform expertise"
-        ],
-        "improvement_suggestions": [
-            "Add Docker containerization projects to demonstrate DevOps knowledge",
-            "Include Kubernetes deployment case studies to show orchestration skills",
-            "Highlight AWS certifications and cloud architecture experience",
-            "Document infrastructure-as-code projects using Terraform",
-            "Showcase CI/CD pipeline design and implementation examples"
-        ]
-    }
+    logger.info(f"📤 Extracting JD requirement profile with LLM backend '{backend.name}'...")
+    messages = build_messages(create_jd_profile_prompt(job_description_text))
+    response_text = await complete_chat(backend, messages, priority, JD_PROFILE_MAX_TOKENS)
+    
+    parser = IncrementalJSONParser()
+    parser.feed(response_text)
+    profile = validate_jd_profile(parser.close())
+    
+    logger.info(f"✓ JD profile extracted - {len(profile['required_skills'])} required skills")
+    return profile
+
+
+async def extract_resume_profile(
+    resume_text: str,
+    backend: LLMBackend,
+    priority: str = "interactive"
+) -> Dict:
+    """
+    Extract a compact candidate profile from a resume.
+    The profile replaces the full resume in analysis prompts, so a resume
+    compared against many JDs is only read by the model once.
+    
+    Args:
+        resume_text: Full resume content
+        backend: Configured backend to call
+        priority: Quota priority class, "interactive" or "batch"
+    
+    Returns:
+        dict: Profile with current_title, titles, total_years_experience,
+        domains, skills (name and years), education and highlights
+    
+    Raises:
+        ValueError: If the model's answer is not a valid profile
+        Exception: If the API call fails
+    """
+    logger.info(f"📤 Extracting resume profile with LLM backend '{backend.name}'...")
+    messages = build_messages(create_resume_profile_prompt(resume_text))
+    response_text = await complete_chat(backend, messages, priority, RESUME_PROFILE_MAX_TOKENS)
+    
+    parser = IncrementalJSONParser()
+    parser.feed(response_text)
+    profile = validate_resume_profile(parser.close())
+    
+    logger.info(f"✓ Resume profile extracted - {len(profile['skills'])} skills")
+    return profile
+
+
+def format_section_change(heading: str, old_text: str, new_text: str) -> str:
+    """Render one changed resume section for the revision prompt."""
+    title = f'Section "{heading}"' if heading else "Opening section"
+    if not old_text:
+        return f"{title} (added):\n{new_text}"
+    if not new_text:
+        return f"{title} (removed):\n{old_text}"
+    return f"{title} (changed)\nBefore:\n{old_text}\nAfter:\n{new_text}"
+
+
+def create_revision_prompt(
+    previous_result: Dict,
+    changes: Sequence[Tuple[str, str, str]],
+    job_description_text: str,
+    jd_profile: Optional[Dict] = None
+) -> str:
+    """
+    Create the prompt that updates an analysis after a resume revision.
+    Only the changed sections, the job requirements and the previous result
+    are sent, so the prompt grows with the edit, not with the resume.
+    
+    Args:
+        previous_result: Analysis of the previous revision
+        changes: (heading, old text, new text) of each changed section;
+            old text is empty for added sections, new text for removed ones
+        job_description_text: Job description of the analysis
+        jd_profile: Requirement profile of the JD; sent instead of the JD when given
+    
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    missing_skills = "; ".join(previous_result["missing_skills"]) or "none"
+    suggestions = "\n".join(f"- {suggestion}" for suggestion in previous_result["improvement_suggestions"]) or "- none"
+    sections = "\n\n".join(format_section_change(*change) for change in changes)
+    if jd_profile is not None:
+        job_section = f"JOB REQUIREMENTS (extracted from the job description):\n{format_jd_profile(jd_profile)}"
+    else:
+        job_section = f"JOB DESCRIPTION:\n{job_description_text}"
+    
+    prompt = f"""A resume was analyzed against a job description, then revised.
+Update the analysis to reflect the revision. Sections not listed below are unchanged.
+
+{job_section}
+
+PREVIOUS ANALYSIS:
+Match percentage: {previous_result["match_percentage"]}
+Missing skills: {missing_skills}
+Improvement suggestions:
+{suggestions}
+
+RESUME CHANGES:
+{sections}
+
+Respond in the following JSON format ONLY (no additional text):
+{{
+    "match_percentage": <integer 0-100>,
+    "missing_skills": [<list of 3-5 important skills still not mentioned in the resume>],
+    "improvement_suggestions": [<list of 3-5 specific, actionable suggestions to improve resume for this role>]
+}}
+
+Guidelines:
+1. Adjust the previous match percentage only by how the changes affect the fit with the job
+2. Drop missing skills the changes now cover and add ones a removed section used to cover
+3. Drop suggestions the changes have applied and keep the rest, adding new ones only if needed
+4. Return ONLY valid JSON, no additional text or markdown formatting
+5. All strings in arrays should be clear and concise (10-20 words max)"""
+
+    return prompt
+
+
+async def analyze_revision(
+    previous_result: Dict,
+    changes: Sequence[Tuple[str, str, str]],
+    job_description_text: str,
+    priority: str,
+    backend: LLMBackend,
+    jd_profile: Optional[Dict] = None
+) -> Dict:
+    """
+    Update a previous analysis with the changed sections of a revised resume.
+    
+    Args:
+        previous_result: Analysis of the previous revision
+        changes: (heading, old text, new text) of each changed section
+        job_description_text: Job description of the analysis
+        priority: Quota priority class, "interactive" or "batch"
+        backend: Configured backend to call
+        jd_profile: Requirement profile sent instead of the JD, if any
+    
+    Returns:
+        dict: Updated analysis result
+    
+    Raises:
+        InvalidLLMResponse: If the model's answer is not a valid analysis
+        RateLimitExceeded: If no quota became available in time
+        CircuitOpenError: If the circuit breaker is open
+        Exception: If the API call fails
+    """
+    logger.info(f"📤 Sending revision of {len(changes)} resume sections to LLM backend '{backend.name}'...")
+    with stage("prompt_build"):
+        messages = build_messages(create_revision_prompt(previous_result, changes, job_description_text, jd_profile))
+    response_text = await complete_chat(backend, messages, priority)
+    
+    with stage("response_parse"):
+        result = parse_llm_response(response_text)
+    
+    logger.info(f"✓ Revision analyzed - Match: {previous_result['match_percentage']}% -> {result['match_percentage']}%")
+    return result
+
+
+def iter_result_events(result: Dict) -> List[Tuple[str, Any]]:
+    """
+    Split a complete analysis result into the events a stream would produce.
+    
+    Args:
+        result: Validated analysis result
+        
+    Returns:
+        List[Tuple[str, Any]]: (event, value) pairs in streaming order
+    """
+    events = [("match_percentage", result["match_percentage"])]
+    events += [("missing_skill", skill) for skill in result["missing_skills"]]
+    events += [("improvement_suggestion", suggestion) for suggestion in result["improvement_suggestions"]]
+    return events
+
+
+async def close_stream(stream: AsyncStream) -> None:
+    """Close a streamed completion and release its HTTP connection."""
+    # AsyncStream has no close() in older openai releases
+    close = getattr(stream, "close", None)
+    if close is not None:
+        await close()
+    else:
+        await stream.response.aclose()
+
+
+async def stream_resume_vs_jd(
+    resume_text: str,
+    job_description_text: str,
+    backend: Optional[LLMBackend] = None,
+    jd_profile: Optional[Dict] = None,
+    resume_profile: Optional[Dict] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream an analysis, yielding each field as soon as the model completes it.
+    
+    Yields ("match_percentage", int), then one ("missing_skill", str) per
+    skill and one ("improvement_suggestion", str) per suggestion, in the
+    order the model generates them. The last event is ("result", dict)
+    carrying the complete, validated analysis.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        backend: Backend to call; chosen by select_backend when omitted
+        jd_profile: Requirement profile sent instead of the full JD, if any
+        resume_profile: Candidate profile sent instead of the full resume, if any
+        
+    Raises:
+        Exception: If API call fails or response is invalid
+    """
+    
+    # Validate inputs
+    if not resume_text or len(resume_text) < 50:
+        raise ValueError("Resume text must be at least 50 characters")
+    
+    if not job_description_text or len(job_description_text) < 50:
+        raise ValueError("Job description must be at least 50 characters")
+    
+    backend = backend or select_backend(None, "interactive")
+    if not backend.configured:
+        if backend.kind != STUB:
+            logger.warning("⚠️ OpenAI API key not configured - streaming local skill matching")
+        result = build_local_analysis(resume_text, job_description_text)
+        for event in iter_result_events(result):
+            yield event
+        yield "result", result
+        return
+    
+    try:
+        logger.info(f"📤 Streaming analysis request to LLM backend '{backend.name}'...")
+        with stage("prompt_build"):
+            prompt = create_analysis_prompt(resume_text, job_description_text, jd_profile, resume_profile)
+            messages = build_messages(prompt)
+            estimated_tokens = estimate_call_tokens(messages)
+        parser = IncrementalJSONParser()
+        streaming_started = None
+        
+        async def open_stream():
+            # Quota first, then a concurrency slot, as in complete_chat. On
+            # success the slot stays held until the stream has been read.
+            # Streamed responses carry no usage, so the estimate is kept as charged
+            nonlocal streaming_started
+            queued = time.perf_counter()
+            await backend.quota.acquire(estimated_tokens, "interactive")
+            await backend.semaphore.acquire()
+            record_stage("llm_queue_wait", time.perf_counter() - queued)
+            streaming_started = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    backend.client.chat.completions.create(
+                        model=backend.model,
+                        messages=messages,
+                        temperature=0.3,
+                        max_tokens=LLM_MAX_COMPLETION_TOKENS,
+                        top_p=0.9,
+                        stream=True
+                    ),
+                    timeout=LLM_REQUEST_TIMEOUT
+                )
+            except BaseException as e:
+                backend.semaphore.release()
+                if isinstance(e, RateLimitError):
+                    backend.quota.throttle()
+                raise
+        
+        # Opening the stream is retried; a stream that fails midway is not
+        stream = await backend.resilience.call(open_stream, hedge=False)
+        try:
+            chunks = stream.__aiter__()
+            while True:
+                # The timeout applies to the gap between chunks
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=LLM_REQUEST_TIMEOUT)
+                except StopAsyncIteration:
+                    break
+                
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                
+                for parse_event in parser.feed(delta):
+                    event = STREAM_EVENTS.get(parse_event.field)
+                    if event:
+                        yield event, parse_event.value
+            
+            # The stream is parsed as it arrives, so this includes the parsing
+            record_stage("llm_call", time.perf_counter() - streaming_started)
+        finally:
+            # Closed also when the client disconnects or a chunk times out,
+            # so the connection goes back to the pool right away
+            try:
+                await close_stream(stream)
+            finally:
+                backend.semaphore.release()
+        
+        result = validate_analysis_result(parser.close())
+        logger.info(f"✓ Streamed analysis complete - Match: {result['match_percentage']}%")
+        yield "result", result
+        
+    except (asyncio.TimeoutError, APITimeoutError):
+        logger.error(f"✗ OpenAI API stream timed out after {LLM_REQUEST_TIMEOUT}s")
+        raise Exception("OpenAI API request timed out. Please try again later.")
+    except RateLimitExceeded:
+        logger.warning("⏳ LLM quota exhausted - rejecting call")
+        raise
+    except CircuitOpenError:
+        logger.warning(f"🔌 LLM backend '{backend.name}' circuit open - failing fast")
+        raise
+    except RateLimitError as e:
+        logger.error(f"✗ OpenAI API rate limit exceeded: {str(e)}")
+        raise RateLimitExceeded(
+            "OpenAI API rate limit exceeded. Please try again later.",
+            retry_after=LLM_QUOTA_BURST_SECONDS
+        )
+    except APIError as e:
+        logger.error(f"✗ OpenAI API error: {str(e)}")
+        raise Exception(f"OpenAI API error: {str(e)}")
+    except ValueError as e:
+        logger.error(f"✗ Validation error: {str(e)}")
+        raise
+
+
+async def close_llm_client():
+    """
+    Close the clients and connection pools of all LLM backends.
+    Called during application shutdown.
+    """
+    for backend in llm_backends.values():
+        await backend.close()
@@ -0,0 +1,313 @@
+"""
+Persisted top-k matching index over registered resumes and job descriptions.
+Vectors live in a memory-mapped NumPy matrix plus an append-only operation
+log, so adds and deletes are cheap and survive restarts.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.fast_scorer import vectorize
+
+logger = logging.getLogger(__name__)
+
+# Index configuration
+MATCH_INDEX_DIR = os.getenv("MATCH_INDEX_DIR", "data/match_index")
+MATCH_INDEX_DIM = int(os.getenv("MATCH_INDEX_DIM", "2048"))
+# Number of logged operations after which the log is folded into the matrix
+MATCH_INDEX_COMPACT_THRESHOLD = int(os.getenv("MATCH_INDEX_COMPACT_THRESHOLD", "500"))
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index with incremental add and delete.
+    
+    On disk an index is three files: the compacted vector matrix
+    (<name>.<generation>.npy, opened memory-mapped), a manifest naming it
+    (<name>.json: matrix file, row ids and texts) and an append-only log of
+    later adds and deletes (<name>.log.jsonl). Loading replays the log on
+    top of the matrix, and compact() folds the log into a new matrix whose
+    manifest is swapped in last, so a crash leaves either the old or the
+    new pair in place.
+    
+    The index is owned by one process; run a single worker when it is in use.
+    Its methods block on file I/O and take a lock, so async code calls them
+    in a worker thread.
+    """
+    
+    def __init__(self, name: str, directory: str = MATCH_INDEX_DIR, dim: int = MATCH_INDEX_DIM):
+        self.name = name
+        self.directory = directory
+        self.dim = dim
+        
+        self._base: np.ndarray = np.zeros((0, dim), dtype=np.float32)
+        self._base_ids: List[str] = []
+        self._base_rows: Dict[str, int] = {}
+        self._deleted_rows: set = set()
+        
+        # Rows added since the last compaction, kept in memory
+        self._pending_ids: List[str] = []
+        self._pending_vectors: List[np.ndarray] = []
+        
+        self._texts: Dict[str, str] = {}
+        self._log_entries = 0
+        self._generation = 0
+        self._lock = threading.RLock()
+    
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.name}{suffix}")
+    
+    def load(self) -> None:
+        """Load the compacted matrix and replay the operation log."""
+        with self._lock:
+            self._load()
+    
+    def _load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        rebuilt = False
+        
+        matrix_file = None
+        if os.path.exists(self._path(".json")):
+            with open(self._path(".json"), "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            # Manifests written before generations existed name no matrix
+            matrix_file = meta.get("matrix", f"{self.name}.npy")
+            self._generation = meta.get("generation", 0)
+            matrix_path = os.path.join(self.directory, matrix_file)
+            try:
+                base = np.load(matrix_path, mmap_mode="r")
+            except (OSError, ValueError):
+                base = None
+            
+            if base is not None and meta["dim"] == self.dim and base.shape == (len(meta["ids"]), self.dim):
+                self._base = base
+                self._base_ids = meta["ids"]
+                self._base_rows = {item_id: row for row, item_id in enumerate(self._base_ids)}
+                self._texts = meta["texts"]
+            else:
+                found = "missing" if base is None else f"shaped {base.shape}"
+                logger.warning(
+                    f"⚠️ Index {self.name} matrix is {found}, expected {len(meta['ids'])} rows of dim {self.dim}; "
+                    f"rebuilding from texts"
+                )
+                for item_id, text in meta["texts"].items():
+                    self._add(item_id, text)
+                rebuilt = True
+        self._remove_stale_matrices(matrix_file)
+        
+        if os.path.exists(self._path(".log.jsonl")):
+            with open(self._path(".log.jsonl"), "r", encoding="utf-8") as log_file:
+                for line in log_file:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry["op"] == "add":
+                        self._add(entry["id"], entry["text"])
+                    else:
+                        self._delete(entry["id"])
+                    self._log_entries += 1
+        
+        # Persist the rebuilt vectors, or every restart would rebuild them again
+        if rebuilt:
+            self.compact()
+        
+        logger.info(f"✓ Loaded match index '{self.name}' with {len(self)} documents")
+    
+    def _remove_stale_matrices(self, keep: Optional[str]) -> None:
+        """Delete matrix files not named by the manifest, e.g. left by a crashed compaction."""
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith(f"{self.name}.") and file_name.endswith(".npy") and file_name != keep:
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError as e:
+                    # Windows refuses to delete a file that is still memory-mapped
+                    logger.debug(f"Could not remove stale matrix {file_name}: {str(e)}")
+    
+    def _append_log(self, entry: Dict) -> None:
+        """Persist one operation before applying it."""
+        with open(self._path(".log.jsonl"), "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+        self._log_entries += 1
+    
+    def _add(self, item_id: str, text: str) -> None:
+        self._delete(item_id)
+        self._pending_ids.append(item_id)
+        self._pending_vectors.append(vectorize([text], self.dim)[0])
+        self._texts[item_id] = text
+    
+    def _delete(self, item_id: str) -> bool:
+        if item_id not in self._texts:
+            return False
+        
+        row = self._base_rows.get(item_id)
+        if row is not None and row not in self._deleted_rows:
+            self._deleted_rows.add(row)
+        elif item_id in self._pending_ids:
+            position = self._pending_ids.index(item_id)
+            del self._pending_ids[position]
+            del self._pending_vectors[position]
+        
+        del self._texts[item_id]
+        return True
+    
+    def add(self, item_id: str, text: str) -> None:
+        """
+        Add or replace a document.
+        
+        Args:
+            item_id: Caller-chosen identifier
+            text: Document text
+        """
+        with self._lock:
+            self._append_log({"op": "add", "id": item_id, "text": text})
+            self._add(item_id, text)
+            if self._log_entries >= MATCH_INDEX_COMPACT_THRESHOLD:
+                self.compact()
+    
+    def delete(self, item_id: str) -> bool:
+        """
+        Delete a document.
+        
+        Args:
+            item_id: Identifier of the document
+            
+        Returns:
+            bool: True if deleted, False if not found
+        """
+        with self._lock:
+            if item_id not in self._texts:
+                return False
+            
+            self._append_log({"op": "delete", "id": item_id})
+            return self._delete(item_id)
+    
+    def get_text(self, item_id: str) -> Optional[str]:
+        """Get the stored text of a document."""
+        return self._texts.get(item_id)
+    
+    def search(self, text: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Find the k documents most similar to a text.
+        
+        Args:
+            text: Query text
+            k: Number of results
+            
+        Returns:
+            List[Tuple[str, float]]: (item_id, cosine similarity), best first
+        """
+        query = vectorize([text], self.dim)[0]
+        with self._lock:
+            return self._search(query, k)
+    
+    def _search(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        ids = self._base_ids + self._pending_ids
+        if not ids:
+            return []
+        
+        scores = np.empty(len(ids), dtype=np.float32)
+        scores[:len(self._base_ids)] = self._base @ query
+        if self._pending_vectors:
+            scores[len(self._base_ids):] = np.stack(self._pending_vectors) @ query
+        if self._deleted_rows:
+            scores[list(self._deleted_rows)] = -np.inf
+        
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[row], float(scores[row])) for row in top]
+    
+    def compact(self) -> None:
+        """Fold the operation log into a new memory-mapped matrix."""
+        with self._lock:
+            self._compact()
+    
+    def _compact(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        
+        live_rows = [row for row in range(len(self._base_ids)) if row not in self._deleted_rows]
+        parts = [np.asarray(self._base[live_rows], dtype=np.float32)]
+        if self._pending_vectors:
+            parts.append(np.stack(self._pending_vectors))
+        matrix = np.concatenate(parts) if parts else np.zeros((0, self.dim), dtype=np.float32)
+        ids = [self._base_ids[row] for row in live_rows] + self._pending_ids
+        
+        # The new matrix gets a new file name; swapping in the manifest that
+        # names it is the single atomic step. Replaying the log again after
+        # a crash before it is truncated is harmless.
+        generation = self._generation + 1
+        matrix_file = f"{self.name}.{generation}.npy"
+        np.save(os.path.join(self.directory, matrix_file), matrix)
+        with open(self._path(".tmp.json"), "w", encoding="utf-8") as meta_file:
+            json.dump({"dim": self.dim, "generation": generation, "matrix": matrix_file, "ids": ids, "texts": self._texts}, meta_file)
+        os.replace(self._path(".tmp.json"), self._path(".json"))
+        open(self._path(".log.jsonl"), "w").close()
+        
+        self._generation = generation
+        self._base = np.load(os.path.join(self.directory, matrix_file), mmap_mode="r")
+        self._remove_stale_matrices(matrix_file)
+        self._base_ids = ids
+        self._base_rows = {item_id: row for row, item_id in enumerate(ids)}
+        self._deleted_rows = set()
+        self._pending_ids = []
+        self._pending_vectors = []
+        self._log_entries = 0
+        logger.info(f"🗜️ Compacted match index '{self.name}' ({len(ids)} documents)")
+    
+    def __len__(self) -> int:
+        return len(self._texts)
+    
+    def stats(self) -> Dict:
+        """Get size information for the index."""
+        return {
+            "documents": len(self),
+            "compacted_rows": len(self._base_ids),
+            "pending_rows": len(self._pending_ids),
+            "deleted_rows": len(self._deleted_rows),
+            "log_entries": self._log_entries,
+            "dim": self.dim
+        }
+
+
+# Global indexes for the two sides of a match
+resume_index = VectorIndex("resumes")
+job_index = VectorIndex("jobs")
+
+
+def get_match_index(kind: str) -> VectorIndex:
+    """
+    Get the index for a document kind.
+    
+    Args:
+        kind: "resumes" or "jobs"
+        
+    Returns:
+        VectorIndex: The matching index
+    """
+    return resume_index if kind == "resumes" else job_index
+
+
+def load_match_indexes() -> None:
+    """
+    Load both match indexes from disk.
+    Called during application startup.
+    """
+    resume_index.load()
+    job_index.load()
+
+
+def compact_match_indexes() -> None:
+    """
+    Fold pending operations into the on-disk matrices.
+    Called during application shutdown.
+    """
+    for index in (resume_index, job_index):
+        if index.stats()["log_entries"]:
+            index.compact()
@@ -0,0 +1,177 @@
+"""
+Prometheus metrics and per-request stage timing.
+Stage durations feed both the /metrics histograms and the Server-Timing
+header of the request they belong to.
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages, in the order they run for an analysis
+STAGES = [
+    "validation",
+    "cache_lookup",
+    "near_duplicate_lookup",
+    "revision_diff",
+    "compression",
+    "profiles",
+    "prompt_build",
+    "llm_queue_wait",
+    "llm_call",
+    "response_parse",
+    "mongo_write"
+]
+
+# LLM calls take seconds, the other stages milliseconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60)
+
+stage_duration = Histogram(
+    "checknnext_stage_duration_seconds",
+    "Duration of each analysis pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+
+http_request_duration = Histogram(
+    "checknnext_http_request_duration_seconds",
+    "HTTP request duration by route",
+    ["method", "route"],
+    buckets=STAGE_BUCKETS
+)
+
+http_requests = Counter(
+    "checknnext_http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "route", "status"]
+)
+
+http_errors = Counter(
+    "checknnext_http_errors_total",
+    "HTTP responses with status >= 400 (or unhandled exceptions) by route",
+    ["method", "route", "status"]
+)
+
+llm_tokens = Counter(
+    "checknnext_llm_tokens_total",
+    "Tokens reported by the LLM API",
+    ["backend", "kind"]
+)
+
+llm_route_duration = Histogram(
+    "checknnext_llm_route_duration_seconds",
+    "Analysis duration by cascade route: answered by the first backend, escalated, or sent straight to the stronger backend",
+    ["route"],
+    buckets=STAGE_BUCKETS
+)
+
+llm_escalations = Counter(
+    "checknnext_llm_escalations_total",
+    "Analyses escalated to a stronger backend by first-try backend and reason",
+    ["backend", "reason"]
+)
+
+prompt_tokens_saved = Counter(
+    "checknnext_prompt_tokens_saved_total",
+    "Estimated prompt tokens removed by input compression",
+    ["document", "step"]
+)
+
+# Stage timings of the current request; None outside of a request
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """
+    Start collecting stage timings for the current request.
+    Tasks spawned by the request share the returned list.
+    
+    Returns:
+        List[Tuple[str, float]]: (stage, seconds) pairs, filled as stages finish
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """
+    Record the duration of a pipeline stage.
+    
+    Args:
+        name: Stage name, one of STAGES
+        seconds: Duration of the stage
+    """
+    stage_duration.labels(stage=name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total: float) -> str:
+    """
+    Build a Server-Timing header value from stage timings.
+    Repeated stages (retries, batch items) are summed.
+    
+    Args:
+        timings: (stage, seconds) pairs of a request
+        total: Total request duration in seconds
+    
+    Returns:
+        str: Header value, durations in milliseconds
+    """
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def record_llm_usage(usage, backend: str) -> None:
+    """
+    Count the prompt and completion tokens of an LLM response.
+    
+    Args:
+        usage: Usage object of the response, if any
+        backend: Name of the backend that served the call
+    """
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        llm_tokens.labels(backend=backend, kind="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        llm_tokens.labels(backend=backend, kind="completion").inc(completion_tokens)
+
+
+def record_tokens_saved(document: str, step: str, tokens: int) -> None:
+    """
+    Count the estimated tokens a compression step removed from a document.
+    
+    Args:
+        document: "resume" or "jd"
+        step: Compression step, "whitespace", "boilerplate" or "budget",
+            or "revision" for resume text left out of a delta re-analysis
+        tokens: Tokens removed; nothing is recorded unless positive
+    """
+    if tokens > 0:
+        prompt_tokens_saved.labels(document=document, step=step).inc(tokens)
@@ -0,0 +1,282 @@
+"""
+Near-duplicate index over analyzed resume-JD pairs.
+Each document is reduced to a 64-bit SimHash; a pair whose resume and JD
+are both within a few bits of an earlier analyzed pair (a changed phone
+number, an extra line) reuses that analysis instead of calling the LLM.
+Lookups go through banded hash tables, so they take a handful of
+dictionary probes however many pairs are indexed.
+"""
+
+import os
+import hashlib
+import logging
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services import database
+from app.services.fast_scorer import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate configuration. Two pairs match when the SimHashes of both
+# their resumes and their JDs differ in at most NEAR_DUPLICATE_MAX_DISTANCE
+# of 64 bits.
+NEAR_DUPLICATE_ENABLED = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "100000"))
+
+SIMHASH_BITS = 64
+
+
+class PairSignature(NamedTuple):
+    """
+    SimHashes of an analyzed pair.
+    Only analyses with the same scope (backend and prompt version) are
+    compared with each other.
+    """
+    resume: int
+    jd: int
+    scope: str
+
+
+def simhash(text: str) -> int:
+    """
+    Compute the 64-bit SimHash of a document.
+    Features are the word unigrams and bigrams used by the fast scorer,
+    weighted by count, so a small edit flips only a few bits.
+    
+    Args:
+        text: Document text
+    
+    Returns:
+        int: Unsigned 64-bit fingerprint
+    """
+    tokens = tokenize(text)
+    features = Counter(tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])])
+    if not features:
+        return 0
+    
+    # blake2b is stable across processes, unlike the built-in hash()
+    digests = b"".join(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest() for feature in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), SIMHASH_BITS)
+    weights = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+    totals = weights @ (bits * 2.0 - 1.0)
+    return int.from_bytes(np.packbits(totals > 0).tobytes(), "big")
+
+
+def hamming_distance(first: int, second: int) -> int:
+    """Count the bits in which two fingerprints differ."""
+    return bin(first ^ second).count("1")
+
+
+def pair_signature(resume_text: str, job_description_text: str, scope: str) -> PairSignature:
+    """
+    Fingerprint a resume-JD pair.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        scope: Backend and prompt version the pair is analyzed with
+    
+    Returns:
+        PairSignature: SimHashes of both documents
+    """
+    return PairSignature(simhash(resume_text), simhash(job_description_text), scope)
+
+
+def signature_document(signature: PairSignature) -> Dict:
+    """Encode a signature for MongoDB, which has no unsigned 64-bit integers."""
+    return {
+        "resume_simhash": f"{signature.resume:016x}",
+        "jd_simhash": f"{signature.jd:016x}",
+        "scope": signature.scope
+    }
+
+
+def parse_signature_document(document: Dict) -> PairSignature:
+    """Decode a signature stored by signature_document."""
+    return PairSignature(int(document["resume_simhash"], 16), int(document["jd_simhash"], 16), document["scope"])
+
+
+class NearDuplicateIndex:
+    """
+    Banded SimHash index of analysis results.
+    
+    Each fingerprint is cut into max_distance + 1 bands. Two fingerprints
+    within max_distance bits agree exactly on at least one band, so a pair
+    is filed under every combination of one resume band and one JD band,
+    and a lookup probes the same combinations. Candidates are then checked
+    against the exact distances. Beyond max_entries, the oldest pairs are
+    evicted.
+    """
+    
+    def __init__(
+        self,
+        max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+        max_entries: int = NEAR_DUPLICATE_MAX_ENTRIES
+    ):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        
+        band_count = max_distance + 1
+        widths = [SIMHASH_BITS // band_count + (1 if band < SIMHASH_BITS % band_count else 0) for band in range(band_count)]
+        offsets = np.cumsum([0] + widths[:-1])
+        self._bands = [(int(offset), (1 << width) - 1) for offset, width in zip(offsets, widths)]
+        
+        self._entries: "OrderedDict[PairSignature, Dict]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[PairSignature]] = {}
+    
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> offset) & mask for offset, mask in self._bands]
+    
+    def _bucket_keys(self, signature: PairSignature) -> List[Tuple]:
+        jd_bands = self._band_values(signature.jd)
+        return [
+            (signature.scope, resume_band, resume_value, jd_band, jd_value)
+            for resume_band, resume_value in enumerate(self._band_values(signature.resume))
+            for jd_band, jd_value in enumerate(jd_bands)
+        ]
+    
+    def add(self, signature: PairSignature, result: Dict) -> None:
+        """
+        Index an analysis result, replacing any result with the same signature.
+        
+        Args:
+            signature: Fingerprint of the analyzed pair
+            result: Analysis result
+        """
+        if signature in self._entries:
+            self._entries.move_to_end(signature)
+        else:
+            for key in self._bucket_keys(signature):
+                self._buckets.setdefault(key, set()).add(signature)
+        self._entries[signature] = result
+        
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            for key in self._bucket_keys(evicted):
+                bucket = self._buckets[key]
+                bucket.discard(evicted)
+                if not bucket:
+                    del self._buckets[key]
+    
+    def lookup(self, signature: PairSignature) -> Optional[Dict]:
+        """
+        Find the result of the nearest indexed pair within max_distance.
+        
+        Args:
+            signature: Fingerprint of the pair to analyze
+        
+        Returns:
+            Dict: Analysis result of the nearest pair, or None
+        """
+        best = None
+        best_distance = None
+        for key in self._bucket_keys(signature):
+            for candidate in self._buckets.get(key, ()):
+                resume_distance = hamming_distance(signature.resume, candidate.resume)
+                jd_distance = hamming_distance(signature.jd, candidate.jd)
+                if resume_distance > self.max_distance or jd_distance > self.max_distance:
+                    continue
+                if best_distance is None or resume_distance + jd_distance < best_distance:
+                    best, best_distance = candidate, resume_distance + jd_distance
+        return self._entries[best] if best is not None else None
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._buckets.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global index and counters
+near_duplicate_index = NearDuplicateIndex()
+near_duplicate_counters: Dict[str, int] = {
+    "lookups": 0,
+    "hits": 0,
+    "inserts": 0
+}
+
+
+def find_near_duplicate(signature: PairSignature) -> Optional[Dict]:
+    """
+    Look up the analysis of a near-identical pair.
+    
+    Args:
+        signature: Fingerprint of the pair to analyze
+    
+    Returns:
+        Dict: Copy of the earlier analysis result, or None on a miss
+    """
+    near_duplicate_counters["lookups"] += 1
+    result = near_duplicate_index.lookup(signature)
+    if result is None:
+        return None
+    
+    near_duplicate_counters["hits"] += 1
+    return {
+        "match_percentage": result["match_percentage"],
+        "missing_skills": list(result["missing_skills"]),
+        "improvement_suggestions": list(result["improvement_suggestions"])
+    }
+
+
+def record_near_duplicate(signature: PairSignature, result: Dict) -> None:
+    """
+    Index a freshly computed analysis result.
+    
+    Args:
+        signature: Fingerprint of the analyzed pair
+        result: Validated analysis result
+    """
+    near_duplicate_index.add(signature, {
+        "match_percentage": result["match_percentage"],
+        "missing_skills": list(result["missing_skills"]),
+        "improvement_suggestions": list(result["improvement_suggestions"])
+    })
+    near_duplicate_counters["inserts"] += 1
+
+
+async def rebuild_near_duplicate_index() -> None:
+    """
+    Rebuild the index from the signatures stored with past analyses.
+    Called during application startup.
+    """
+    if not NEAR_DUPLICATE_ENABLED:
+        return
+    
+    try:
+        documents = await database.get_near_duplicate_documents(NEAR_DUPLICATE_MAX_ENTRIES)
+    except Exception as e:
+        logger.error(f"❌ Error rebuilding near-duplicate index: {str(e)}")
+        return
+    
+    near_duplicate_index.clear()
+    # Documents come newest first; insert oldest first so eviction order holds
+    for document in reversed(documents):
+        near_duplicate_index.add(parse_signature_document(document["near_duplicate"]), {
+            "match_percentage": document["match_percentage"],
+            "missing_skills": document["missing_skills"],
+            "improvement_suggestions": document["improvement_suggestions"]
+        })
+    logger.info(f"✓ Rebuilt near-duplicate index with {len(near_duplicate_index)} pairs")
+
+
+def get_near_duplicate_stats() -> Dict:
+    """
+    Get configuration and counters of the near-duplicate index.
+    
+    Returns:
+        Dict: Configuration, size and lookup counters
+    """
+    return {
+        "enabled": NEAR_DUPLICATE_ENABLED,
+        "max_distance": NEAR_DUPLICATE_MAX_DISTANCE,
+        "entries": len(near_duplicate_index),
+        "max_entries": NEAR_DUPLICATE_MAX_ENTRIES,
+        **near_duplicate_counters
+    }
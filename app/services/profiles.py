@@ -0,0 +1,260 @@
+"""
+Cached structured profiles of job descriptions and resumes.
+A document is condensed into a compact profile once per backend; analyses
+comparing it against any number of counterparts then send the profile
+instead of the full text.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.services import database
+from app.services.cache import LRUCache, normalize_text
+from app.services.singleflight import SingleFlight
+from app.services.llm_backends import LLMBackend
+from app.services.rate_limiter import RateLimitExceeded
+from app.services.resilience import CircuitOpenError
+from app.services.llm_service import (
+    extract_jd_profile,
+    extract_resume_profile,
+    create_jd_profile_prompt,
+    create_resume_profile_prompt,
+    fits_context,
+    JD_PROFILE_VERSION,
+    RESUME_PROFILE_VERSION,
+    JD_PROFILE_MAX_TOKENS,
+    RESUME_PROFILE_MAX_TOKENS
+)
+
+logger = logging.getLogger(__name__)
+
+# Profile configuration. Profiles are off by default: extracting one is an
+# extra model call before the analysis, which only pays off when the same
+# document is analyzed again. Documents shorter than the minimum length
+# are already compact and are sent as-is.
+JD_PROFILE_ENABLED = os.getenv("JD_PROFILE_ENABLED", "false").lower() == "true"
+JD_PROFILE_MIN_LENGTH = int(os.getenv("JD_PROFILE_MIN_LENGTH", "800"))
+RESUME_PROFILE_ENABLED = os.getenv("RESUME_PROFILE_ENABLED", "false").lower() == "true"
+RESUME_PROFILE_MIN_LENGTH = int(os.getenv("RESUME_PROFILE_MIN_LENGTH", "1500"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "1024"))
+
+# Profile kinds
+JD = "jd"
+RESUME = "resume"
+
+# Global in-process tier (shared by both kinds) and per-kind counters
+profile_memory_cache = LRUCache(PROFILE_CACHE_MAX_ENTRIES, database.PROFILE_CACHE_TTL)
+profile_counters: Dict[str, Dict[str, int]] = {
+    kind: {
+        "memory_hits": 0,
+        "mongo_hits": 0,
+        "extractions": 0,
+        "failures": 0
+    }
+    for kind in (JD, RESUME)
+}
+
+# Concurrent analyses of the same document share one extraction
+profile_flight = SingleFlight()
+
+
+def make_profile_key(kind: str, text: str, backend: LLMBackend, version: str) -> str:
+    """
+    Build the content-addressed key of a profile.
+    Any change to the text (beyond whitespace) yields a new key, so an
+    edited document is never scored against its old profile.
+    
+    Args:
+        kind: Kind of document, "jd" or "resume"
+        text: Document text
+        backend: Backend extracting the profile
+        version: Version of the extraction prompt
+    
+    Returns:
+        str: Hex-encoded SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (kind, normalize_text(text), backend.cache_namespace, version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def uses_jd_profile(job_description_text: str, backend: LLMBackend) -> bool:
+    """
+    Check whether analyses of a JD are scored against its profile.
+    
+    Args:
+        job_description_text: Full job description content
+        backend: Backend running the analysis
+    
+    Returns:
+        bool: True when profiles are enabled, the backend calls a real
+        model and the JD is long enough to be worth condensing but not too
+        long for the extraction call
+    """
+    return (
+        JD_PROFILE_ENABLED
+        and backend.configured
+        and len(job_description_text) >= JD_PROFILE_MIN_LENGTH
+        and fits_context(backend, create_jd_profile_prompt(job_description_text), JD_PROFILE_MAX_TOKENS)
+    )
+
+
+def uses_resume_profile(resume_text: str, backend: LLMBackend) -> bool:
+    """
+    Check whether analyses of a resume send its profile instead of the text.
+    
+    Args:
+        resume_text: Full resume content
+        backend: Backend running the analysis
+    
+    Returns:
+        bool: True when resume profiles are enabled, the backend calls a
+        real model and the resume is long enough to be worth condensing but
+        not too long for the extraction call
+    """
+    return (
+        RESUME_PROFILE_ENABLED
+        and backend.configured
+        and len(resume_text) >= RESUME_PROFILE_MIN_LENGTH
+        and fits_context(backend, create_resume_profile_prompt(resume_text), RESUME_PROFILE_MAX_TOKENS)
+    )
+
+
+async def _extract_and_store(
+    kind: str,
+    profile_key: str,
+    extract: Callable[[], Awaitable[Dict]]
+) -> Dict:
+    """Extract a profile and populate both cache tiers."""
+    profile = await extract()
+    profile_counters[kind]["extractions"] += 1
+    profile_memory_cache.set(profile_key, profile)
+    
+    try:
+        await database.save_cached_profile(profile_key, kind, profile)
+    except Exception as e:
+        logger.warning(f"⚠️ {kind} profile cache write failed: {str(e)}")
+    
+    return profile
+
+
+async def _get_profile(
+    kind: str,
+    profile_key: str,
+    extract: Callable[[], Awaitable[Dict]]
+) -> Optional[Dict]:
+    """
+    Look a profile up in the in-process tier, then MongoDB, and extract it
+    on a miss. Extraction failures other than quota or circuit breaker
+    rejections return None so the analysis falls back to the full text.
+    """
+    counters = profile_counters[kind]
+    profile = profile_memory_cache.get(profile_key)
+    if profile is not None:
+        counters["memory_hits"] += 1
+        return profile
+    
+    try:
+        profile = await database.get_cached_profile(profile_key)
+    except Exception as e:
+        logger.warning(f"⚠️ {kind} profile cache lookup failed: {str(e)}")
+        profile = None
+    
+    if profile is not None:
+        counters["mongo_hits"] += 1
+        profile_memory_cache.set(profile_key, profile)
+        return profile
+    
+    try:
+        return await profile_flight.do(profile_key, lambda: _extract_and_store(kind, profile_key, extract))
+    except (RateLimitExceeded, CircuitOpenError):
+        raise
+    except Exception as e:
+        counters["failures"] += 1
+        logger.warning(f"⚠️ {kind} profile extraction failed, sending the full text: {str(e)}")
+        return None
+
+
+async def get_jd_profile(
+    job_description_text: str,
+    backend: LLMBackend,
+    priority: str = "interactive"
+) -> Optional[Dict]:
+    """
+    Get the requirement profile of a JD, extracting it on the first use.
+    
+    Args:
+        job_description_text: Full job description content
+        backend: Backend running the analysis
+        priority: Quota priority class of the extraction call
+    
+    Returns:
+        Dict: Profile, or None when the full JD should be sent
+    
+    Raises:
+        RateLimitExceeded: If no quota became available in time
+        CircuitOpenError: If the backend's circuit breaker is open
+    """
+    if not uses_jd_profile(job_description_text, backend):
+        return None
+    
+    profile_key = make_profile_key(JD, job_description_text, backend, JD_PROFILE_VERSION)
+    return await _get_profile(
+        JD,
+        profile_key,
+        lambda: extract_jd_profile(job_description_text, backend, priority)
+    )
+    
+    
+async def get_resume_profile(
+    resume_text: str,
+    backend: LLMBackend,
+    priority: str = "interactive"
+) -> Optional[Dict]:
+    """
+    Get the structured profile of a resume, extracting it on the first use.
+    A resume compared against many JDs is parsed by the model only once.
+    
+    Args:
+        resume_text: Full resume content
+        backend: Backend running the analysis
+        priority: Quota priority class of the extraction call
+    
+    Returns:
+        Dict: Profile, or None when the full resume should be sent
+    
+    Raises:
+        RateLimitExceeded: If no quota became available in time
+        CircuitOpenError: If the backend's circuit breaker is open
+    """
+    if not uses_resume_profile(resume_text, backend):
+        return None
+    
+    profile_key = make_profile_key(RESUME, resume_text, backend, RESUME_PROFILE_VERSION)
+    return await _get_profile(
+        RESUME,
+        profile_key,
+        lambda: extract_resume_profile(resume_text, backend, priority)
+    )
+
+
+def get_profile_stats() -> Dict:
+    """
+    Get configuration and counters of the profile cache.
+    
+    Returns:
+        Dict: Configuration, in-process size and per-kind counters
+    """
+    return {
+        "jd_profile_enabled": JD_PROFILE_ENABLED,
+        "jd_profile_min_length": JD_PROFILE_MIN_LENGTH,
+        "resume_profile_enabled": RESUME_PROFILE_ENABLED,
+        "resume_profile_min_length": RESUME_PROFILE_MIN_LENGTH,
+        "memory_entries": len(profile_memory_cache),
+        JD: dict(profile_counters[JD]),
+        RESUME: dict(profile_counters[RESUME])
+    }
@@ -0,0 +1,222 @@
+"""
+Token-bucket scheduler for the OpenAI request and token quotas.
+Calls wait locally for budget instead of being sent and rejected with 429s.
+"""
+
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Rough characters-per-token ratio for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot get quota within the allowed wait."""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text from its length.
+    
+    Args:
+        text: Prompt or message text
+    
+    Returns:
+        int: Approximate token count (at least 1)
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a fixed rate.
+    
+    The balance may go negative when a call is charged more than was
+    reserved; later calls then wait until it is paid back.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst_seconds: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated: Optional[float] = None
+    
+    def refill(self, now: float) -> None:
+        """Add the tokens accrued since the last refill."""
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def time_until(self, amount: float) -> float:
+        """Seconds until the bucket holds amount tokens (after a refill)."""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class QuotaScheduler:
+    """
+    Grants LLM calls against requests-per-minute and tokens-per-minute budgets.
+    
+    Waiting calls are served strictly by priority class and then arrival
+    order, so batch work only runs on budget that interactive calls leave
+    unused. A limit of 0 disables that bucket.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        burst_seconds: float = 10.0,
+        max_wait: float = 30.0
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        self.max_wait = max_wait
+        
+        self._waiters: List = []
+        self._sequence = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.counters: Dict[str, int] = {"granted": 0, "rejected": 0, "throttled": 0}
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether any budget is enforced."""
+        return self.request_bucket is not None or self.token_bucket is not None
+    
+    def _buckets(self) -> List[TokenBucket]:
+        return [bucket for bucket in (self.request_bucket, self.token_bucket) if bucket is not None]
+    
+    async def acquire(self, tokens: int, priority: str = "interactive") -> None:
+        """
+        Wait until one request and the given tokens fit in the budget.
+        
+        Args:
+            tokens: Estimated token cost of the call
+            priority: "interactive" or "batch"
+        
+        Raises:
+            RateLimitExceeded: If the call would wait longer than max_wait
+        """
+        if not self.enabled:
+            return
+        
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(priority, 1), next(self._sequence), tokens, granted))
+        self._ensure_dispatcher()
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if granted.done() and not granted.cancelled():
+                return
+            granted.cancel()
+            self.counters["rejected"] += 1
+            raise RateLimitExceeded(
+                "LLM quota exhausted. Please try again later.",
+                retry_after=self.max_wait
+            )
+        except asyncio.CancelledError:
+            granted.cancel()
+            raise
+    
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Dispatcher state belongs to the event loop it was created on
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = None
+            self._waiters = [waiter for waiter in self._waiters if waiter[3].get_loop() is loop]
+            heapq.heapify(self._waiters)
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+    
+    async def _dispatch(self) -> None:
+        """Grant waiting calls in priority order as the buckets refill."""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            _, _, tokens, granted = self._waiters[0]
+            if granted.done():
+                heapq.heappop(self._waiters)
+                continue
+            
+            now = loop.time()
+            for bucket in self._buckets():
+                bucket.refill(now)
+            
+            delay = 0.0
+            if self.request_bucket is not None:
+                delay = max(delay, self.request_bucket.time_until(1))
+            if self.token_bucket is not None:
+                delay = max(delay, self.token_bucket.time_until(tokens))
+            
+            if delay <= 0:
+                heapq.heappop(self._waiters)
+                if self.request_bucket is not None:
+                    self.request_bucket.tokens -= 1
+                if self.token_bucket is not None:
+                    self.token_bucket.tokens -= tokens
+                self.counters["granted"] += 1
+                granted.set_result(None)
+                continue
+            
+            # Sleep until the head fits, or until a higher-priority call arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    def adjust(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct the token budget once the real usage of a call is known.
+        
+        Args:
+            estimated_tokens: Tokens charged when the call was granted
+            actual_tokens: Tokens reported by the API
+        """
+        if self.token_bucket is not None:
+            self.token_bucket.tokens += estimated_tokens - actual_tokens
+    
+    def throttle(self) -> None:
+        """
+        Empty the buckets after the API rejected a call with a 429.
+        Waiting calls resume as the budget refills instead of retrying at once.
+        """
+        self.counters["throttled"] += 1
+        for bucket in self._buckets():
+            bucket.tokens = min(bucket.tokens, 0.0)
+    
+    def stats(self) -> Dict:
+        """Get queue depth per priority class, remaining budget and counters."""
+        queued = {name: 0 for name in PRIORITIES}
+        names = {value: name for name, value in PRIORITIES.items()}
+        for priority, _, _, granted in self._waiters:
+            if not granted.done():
+                queued[names.get(priority, "batch")] += 1
+        
+        return {
+            "enabled": self.enabled,
+            "queued": queued,
+            "requests_available": round(self.request_bucket.tokens, 1) if self.request_bucket else None,
+            "tokens_available": round(self.token_bucket.tokens) if self.token_bucket else None,
+            **self.counters
+        }
@@ -0,0 +1,292 @@
+"""
+Resilience primitives for calls to an unreliable upstream provider.
+Provides retries with jittered backoff, a circuit breaker and hedged requests.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Get the delay before a retry using exponential backoff with full jitter.
+    
+    Args:
+        attempt: Number of the failed attempt, starting at 0
+        base_delay: Delay ceiling for the first retry (seconds)
+        max_delay: Upper bound on the delay ceiling (seconds)
+        
+    Returns:
+        float: Random delay between 0 and the attempt's ceiling
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies."""
+    
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        """Add the latency of a successful call."""
+        self.samples.append(seconds)
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get a latency percentile of the window, or None if it is empty."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker driven by consecutive failures.
+    
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected. Once recovery_timeout seconds have passed, a single probe
+    call is let through (half-open): its success closes the circuit, its
+    failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, name: str = "llm"):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.name = name
+        
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions: Dict[str, int] = {}
+    
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning(f"🔌 Circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+    
+    def retry_after(self) -> float:
+        """Seconds until the open circuit lets a probe through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+    
+    def allow(self) -> bool:
+        """Check whether a call may proceed, claiming the probe slot if half-open."""
+        if self.state == OPEN and self.retry_after() <= 0:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+    
+    def record_success(self) -> None:
+        """Record a call the provider answered."""
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self._transition(CLOSED)
+    
+    def record_failure(self) -> None:
+        """Record a call that failed because the provider is degraded."""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._transition(OPEN)
+    
+    def release(self) -> None:
+        """Give back a probe slot for a call that says nothing about the provider."""
+        self._probe_in_flight = False
+    
+    def stats(self) -> Dict:
+        """Get the current state and transition counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1),
+            "transitions": dict(self.transitions)
+        }
+
+
+class ResilientCaller:
+    """
+    Runs calls through a circuit breaker with retries and optional hedging.
+    
+    Calls are zero-argument coroutine factories so that each retry or hedge
+    starts a fresh request. Each call should carry its own deadline; a
+    timeout counts as a retryable failure when is_retryable says so. Calls
+    wrap their provider request in timed() to feed the hedge delay.
+    """
+    
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        is_retryable: Callable[[BaseException], bool],
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20
+    ):
+        self.breaker = breaker
+        self.is_retryable = is_retryable
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "hedges": 0,
+            "hedges_won": 0
+        }
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before a hedged request is sent, or None if hedging is off."""
+        if not self.hedge_enabled or len(self.latency.samples) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+    
+    async def call(self, fn: Callable[[], Awaitable[Any]], hedge: bool = True) -> Any:
+        """
+        Run a call, retrying retryable failures with jittered backoff.
+        
+        Args:
+            fn: Coroutine factory performing one request
+            hedge: Whether this call may be hedged
+            
+        Returns:
+            Any: Result of the first successful attempt
+            
+        Raises:
+            CircuitOpenError: If the circuit breaker rejects the call
+            Exception: The last error once retries are exhausted, or any
+                non-retryable error immediately
+        """
+        self.counters["calls"] += 1
+        
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self.counters["short_circuited"] += 1
+                raise CircuitOpenError(
+                    "LLM provider is unavailable. Please try again later.",
+                    retry_after=self.breaker.retry_after()
+                )
+            
+            self.counters["attempts"] += 1
+            try:
+                result = await self._attempt(fn, hedge)
+            except Exception as e:
+                if not self.is_retryable(e):
+                    self.breaker.release()
+                    raise
+                
+                self.breaker.record_failure()
+                if attempt == self.max_retries or self.breaker.state == OPEN:
+                    self.counters["failures"] += 1
+                    raise
+                
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                self.counters["retries"] += 1
+                logger.warning(f"🔁 Attempt {attempt + 1} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            
+            self.breaker.record_success()
+            return result
+    
+    async def timed(self, request: Awaitable[Any]) -> Any:
+        """
+        Await the upstream request of an attempt, recording its latency.
+        The hedge delay is derived from these samples, so callers wrap only
+        the provider call, not their own queueing before it.
+        
+        Args:
+            request: Awaitable sending the request to the provider
+            
+        Returns:
+            Any: Result of the request
+        """
+        started = time.monotonic()
+        result = await request
+        self.latency.record(time.monotonic() - started)
+        return result
+    
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]], hedge: bool) -> Any:
+        """Run one attempt, sending a hedged request if the first is slow."""
+        delay = self.hedge_delay() if hedge else None
+        if delay is None:
+            return await fn()
+        
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        try:
+            # Inside the try, so a caller cancelled while waiting cancels the request too
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            
+            self.counters["hedges"] += 1
+            backup = asyncio.ensure_future(fn())
+            pending = {primary, backup}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.counters["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def stats(self) -> Dict:
+        """Get breaker state, retry/hedge counters and recent latency percentiles."""
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.stats(),
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "hedge_delay": self.hedge_delay(),
+            **self.counters
+        }
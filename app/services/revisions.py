@@ -0,0 +1,223 @@
+"""
+Incremental re-analysis of revised resumes.
+Analyses that opt into revision tracking keep the resume they scored, so
+a later revision of it can be diffed section by section; only the changed
+sections, the job requirements and the previous result are sent to the
+model. Analyses are linked into revision chains.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.services.cache import normalize_text
+from app.services.compression import (
+    normalize_whitespace,
+    split_sections,
+    clean_document,
+    truncate_to_tokens,
+    PROMPT_COMPRESSION_ENABLED,
+    PROMPT_TOKEN_BUDGET,
+    PROMPT_JD_BUDGET_SHARE
+)
+from app.services.analysis_service import run_analysis
+from app.services.llm_service import analyze_revision, select_backend
+from app.services.profiles import get_jd_profile
+from app.services.metrics import stage, record_tokens_saved
+from app.services.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Revision configuration. Edits touching more than REVISION_DELTA_MAX_SHARE
+# of the resume's tokens are re-analyzed in full.
+REVISIONS_ENABLED = os.getenv("REVISIONS_ENABLED", "true").lower() == "true"
+REVISION_DELTA_MAX_SHARE = float(os.getenv("REVISION_DELTA_MAX_SHARE", "0.5"))
+
+# How a revision was analyzed
+FULL = "full"
+DELTA = "delta"
+UNCHANGED = "unchanged"
+
+# Global counters
+revision_counters: Dict[str, int] = {
+    FULL: 0,
+    DELTA: 0,
+    UNCHANGED: 0
+}
+
+
+class SectionChange(NamedTuple):
+    """
+    A resume section that differs between two revisions.
+    old_text is empty for an added section, new_text for a removed one.
+    """
+    heading: str
+    old_text: str
+    new_text: str
+
+
+def jd_digest(job_description_text: str) -> str:
+    """Hash a job description, ignoring whitespace, to tell whether revisions share it."""
+    return hashlib.sha256(normalize_text(job_description_text).encode("utf-8")).hexdigest()
+
+
+def _keyed_sections(text: str) -> Dict[Tuple[str, int], Tuple[str, str]]:
+    """Map (heading, occurrence) to (heading, body), in document order."""
+    sections: Dict[Tuple[str, int], Tuple[str, str]] = {}
+    occurrences: Dict[str, int] = {}
+    for heading, paragraphs in split_sections(normalize_whitespace(text)):
+        name = heading.lower().strip("#: ")
+        occurrences[name] = occurrences.get(name, 0) + 1
+        sections[(name, occurrences[name])] = (heading, "\n\n".join(paragraphs))
+    return sections
+
+
+def diff_sections(old_text: str, new_text: str) -> List[SectionChange]:
+    """
+    Find the sections that differ between two revisions of a resume.
+    Sections are matched by heading (the n-th "Experience" with the n-th
+    "Experience"); whitespace-only edits are not changes.
+    
+    Args:
+        old_text: Resume of the previous revision
+        new_text: Revised resume
+    
+    Returns:
+        List[SectionChange]: Changed and added sections in the revised
+        resume's order, then removed sections
+    """
+    old_sections = _keyed_sections(old_text)
+    new_sections = _keyed_sections(new_text)
+    
+    changes = []
+    for key, (heading, body) in new_sections.items():
+        if key not in old_sections:
+            changes.append(SectionChange(heading, "", body or heading))
+        elif body != old_sections[key][1]:
+            changes.append(SectionChange(heading, old_sections[key][1], body))
+    for key, (heading, body) in old_sections.items():
+        if key not in new_sections:
+            changes.append(SectionChange(heading, body or heading, ""))
+    return changes
+
+
+def new_revision(resume_text: str, job_description_text: str) -> Optional[Dict]:
+    """
+    Build the revision data stored with a first analysis that tracks revisions.
+    
+    Args:
+        resume_text: Analyzed resume
+        job_description_text: Analyzed job description
+    
+    Returns:
+        Dict: Revision data, or None when revisions are disabled
+    """
+    if not REVISIONS_ENABLED:
+        return None
+    return {
+        "number": 1,
+        "mode": FULL,
+        "previous_analysis_id": None,
+        "root_analysis_id": None,
+        "changed_sections": [],
+        "resume_text": resume_text,
+        "jd_digest": jd_digest(job_description_text)
+    }
+
+
+async def run_revision_analysis(
+    resume_text: str,
+    job_description_text: str,
+    previous: Dict,
+    backend: Optional[str] = None,
+    high_priority: bool = False
+) -> Tuple[Dict, bool, Dict]:
+    """
+    Analyze a revised resume against the JD of a previous analysis.
+    
+    An unchanged resume reuses the previous result, flagged with
+    "reused_previous". Small edits are sent to the model as a delta of the
+    changed sections, next to the JD profile (or the JD itself) so fit can
+    be judged again; large edits, the local backend without a model, and
+    high-priority requests get a full analysis.
+    
+    Args:
+        resume_text: Revised resume
+        job_description_text: Job description, the same as the previous analysis's
+        previous: Stored previous analysis, with its analysis_id
+        backend: LLM backend name; routed by priority when omitted
+        high_priority: Re-analyze in full on the stronger backend
+    
+    Returns:
+        Tuple[Dict, bool, Dict]: Analysis result, whether it was served from
+        cache, and the revision data to store with the analysis
+    
+    Raises:
+        ValueError: If revisions are disabled, the previous analysis has no
+            stored resume or was for another job description, or the
+            backend does not exist
+    """
+    if not REVISIONS_ENABLED:
+        raise ValueError("Revision tracking is disabled")
+    base = previous.get("revision")
+    if not base or "resume_text" not in base:
+        raise ValueError(f"Analysis {previous['analysis_id']} has no stored resume to revise")
+    if base["jd_digest"] != jd_digest(job_description_text):
+        raise ValueError("The revised analysis must use the job description of the previous analysis")
+    
+    with stage("revision_diff"):
+        changes = diff_sections(base["resume_text"], resume_text)
+    changed_tokens = sum(estimate_tokens(change.old_text) + estimate_tokens(change.new_text) for change in changes)
+    llm_backend = select_backend(backend, "interactive")
+    
+    if not changes:
+        mode = UNCHANGED
+        result = {
+            "match_percentage": previous["match_percentage"],
+            "missing_skills": list(previous["missing_skills"]),
+            "improvement_suggestions": list(previous["improvement_suggestions"]),
+            "reused_previous": True
+        }
+        cached = False
+    elif high_priority or not llm_backend.configured or changed_tokens > REVISION_DELTA_MAX_SHARE * estimate_tokens(resume_text):
+        mode = FULL
+        result, cached = await run_analysis(
+            resume_text, job_description_text, backend=backend, high_priority=high_priority
+        )
+    else:
+        mode = DELTA
+        # Cleaned as for full analyses, so the JD profile they cached is reused
+        jd_text = clean_document(job_description_text, "jd") if PROMPT_COMPRESSION_ENABLED else job_description_text
+        jd_profile = await get_jd_profile(jd_text, llm_backend, "interactive")
+        if jd_profile is None:
+            jd_text = truncate_to_tokens(jd_text, int(PROMPT_TOKEN_BUDGET * PROMPT_JD_BUDGET_SHARE))
+        result = await analyze_revision(previous, changes, jd_text, "interactive", llm_backend, jd_profile)
+        record_tokens_saved("resume", "revision", estimate_tokens(resume_text) - changed_tokens)
+        cached = False
+    
+    revision_counters[mode] += 1
+    logger.info(f"📝 Revision analyzed ({mode}) - {len(changes)} sections changed")
+    return result, cached, {
+        "number": base.get("number", 1) + 1,
+        "mode": mode,
+        "previous_analysis_id": previous["analysis_id"],
+        "root_analysis_id": base.get("root_analysis_id") or previous["analysis_id"],
+        "changed_sections": [change.heading for change in changes],
+        "resume_text": resume_text,
+        "jd_digest": base["jd_digest"]
+    }
+
+
+def get_revision_stats() -> Dict:
+    """
+    Get configuration and counters of incremental re-analysis.
+    
+    Returns:
+        Dict: Configuration and analyses per mode
+    """
+    return {
+        "enabled": REVISIONS_ENABLED,
+        "delta_max_share": REVISION_DELTA_MAX_SHARE,
+        **revision_counters
+    }
@@ -0,0 +1,164 @@
+"""
+Time-bucketed rollups of analysis results.
+Builds the per-hour and per-day bucket updates applied on every write,
+and merges stored buckets into distribution statistics for a date range.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GRANULARITIES = ("hour", "day")
+
+# Scores are integers 0-100, so every bucket keeps an exact count per score;
+# histograms with coarser bins and exact percentiles are derived from it
+SCORE_SLOTS = 101
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+def bucket_start(created_at: datetime, granularity: str) -> datetime:
+    """
+    Truncate a timestamp to the start of its bucket.
+    
+    Args:
+        created_at: Naive UTC timestamp
+        granularity: "hour" or "day"
+        
+    Returns:
+        datetime: Start of the bucket
+    """
+    if granularity == "hour":
+        return created_at.replace(minute=0, second=0, microsecond=0)
+    return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_id(granularity: str, start: datetime) -> str:
+    """Build the document ID of a bucket."""
+    return f"{granularity}:{start.isoformat()}"
+
+
+def build_bucket_increments(
+    documents: Iterable[Dict],
+    sign: int = 1
+) -> Dict[str, Tuple[str, datetime, Dict[str, int]]]:
+    """
+    Aggregate analysis documents into per-bucket counter increments.
+    Documents falling into the same bucket produce a single update.
+    
+    Args:
+        documents: Analysis documents with created_at and match_percentage
+        sign: 1 for inserted documents, -1 for deleted ones
+        
+    Returns:
+        Dict: bucket ID -> (granularity, bucket start, $inc document)
+    """
+    increments: Dict[str, Tuple[str, datetime, Dict[str, int]]] = {}
+    
+    for document in documents:
+        score = document["match_percentage"]
+        for granularity in GRANULARITIES:
+            start = bucket_start(document["created_at"], granularity)
+            key = bucket_id(granularity, start)
+            if key not in increments:
+                increments[key] = (granularity, start, {})
+            inc = increments[key][2]
+            inc["count"] = inc.get("count", 0) + sign
+            inc["sum_match"] = inc.get("sum_match", 0) + sign * score
+            inc[f"scores.{score}"] = inc.get(f"scores.{score}", 0) + sign
+    
+    return increments
+
+
+def _score_counts(bucket: Dict) -> List[int]:
+    """Read the per-score counts of a stored bucket."""
+    counts = [0] * SCORE_SLOTS
+    for score, count in (bucket.get("scores") or {}).items():
+        counts[int(score)] += count
+    return counts
+
+
+def percentile(score_counts: List[int], q: float) -> Optional[int]:
+    """
+    Nearest-rank percentile of a score distribution.
+    
+    Args:
+        score_counts: Count of analyses per score 0-100
+        q: Percentile between 0 and 100
+        
+    Returns:
+        int: Score at the percentile, or None for an empty distribution
+    """
+    total = sum(score_counts)
+    if total <= 0:
+        return None
+    
+    rank = max(1, -(-q * total // 100))  # ceil(q/100 * total)
+    running = 0
+    for score, count in enumerate(score_counts):
+        running += count
+        if running >= rank:
+            return score
+    return SCORE_SLOTS - 1
+
+
+def summarize_buckets(
+    buckets: List[Dict],
+    bin_width: int = 10,
+    percentiles: Iterable[float] = DEFAULT_PERCENTILES
+) -> Dict:
+    """
+    Merge stored buckets into distribution statistics.
+    
+    Args:
+        buckets: Bucket documents sorted by bucket_start
+        bin_width: Width of the score histogram bins
+        percentiles: Percentiles to report
+        
+    Returns:
+        Dict: Totals, score percentiles, histogram and per-bucket volume series
+    """
+    merged = [0] * SCORE_SLOTS
+    total = 0
+    sum_match = 0
+    series = []
+    
+    for bucket in buckets:
+        count = bucket.get("count", 0)
+        if count <= 0:
+            continue
+        for score, score_count in enumerate(_score_counts(bucket)):
+            merged[score] += score_count
+        total += count
+        sum_match += bucket.get("sum_match", 0)
+        series.append({
+            "bucket_start": bucket["bucket_start"],
+            "count": count,
+            "average_match_percentage": round(bucket.get("sum_match", 0) / count, 2)
+        })
+    
+    present = [score for score, count in enumerate(merged) if count > 0]
+    # The last bin also holds a perfect score of 100
+    lows = list(range(0, SCORE_SLOTS - 1, bin_width))
+    histogram = []
+    for position, low in enumerate(lows):
+        high = SCORE_SLOTS - 1 if position == len(lows) - 1 else low + bin_width - 1
+        histogram.append({
+            "min_score": low,
+            "max_score": high,
+            "count": sum(merged[low:high + 1])
+        })
+    
+    return {
+        "total_analyses": total,
+        "average_match_percentage": round(sum_match / total, 2) if total else 0,
+        "min_match_percentage": present[0] if present else 0,
+        "max_match_percentage": present[-1] if present else 0,
+        "percentiles": {f"p{q:g}": percentile(merged, q) for q in percentiles},
+        "histogram": histogram,
+        "series": series
+    }
+
+
+def choose_granularity(start: datetime, end: datetime) -> str:
+    """Pick hourly buckets for ranges up to a week and daily buckets beyond."""
+    return "hour" if end - start <= timedelta(days=7) else "day"
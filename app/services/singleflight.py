@@ -0,0 +1,84 @@
+"""
+Single-flight coalescing of identical in-flight async calls.
+Later callers for a key await the call already running instead of starting their own.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call shared by every caller of the same key."""
+    
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+    
+    The work runs in its own task, so cancelling one caller does not affect
+    the others. The task is cancelled only when every caller has gone away.
+    Results and exceptions are delivered to all callers alike.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.counters: Dict[str, int] = {"executions": 0, "coalesced": 0}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn for key, or join the identical call already in flight.
+        
+        Args:
+            key: Identity of the call
+            fn: Zero-argument coroutine factory performing the work
+            
+        Returns:
+            Any: Result of the shared call
+            
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+            logger.debug(f"🔗 Joining in-flight call for key {key[:12]}")
+        
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            # Only reachable with a pending task if this caller was cancelled
+            if call.waiters == 0 and not call.task.done():
+                logger.debug(f"🛑 All callers left, cancelling call for key {key[:12]}")
+                # Forget it now, so a new caller starts afresh instead of joining the cancelled task
+                self._forget(key, call)
+                call.task.cancel()
+    
+    def _forget(self, key: str, call: _Call) -> None:
+        """Drop a finished call so the next caller starts a fresh one."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved when nobody is left to observe it
+        if call.task.done() and not call.task.cancelled():
+            call.task.exception()
+    
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
+    
+    def stats(self) -> Dict:
+        """Get execution and coalescing counters."""
+        return {"in_flight": self.in_flight(), **self.counters}
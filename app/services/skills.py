@@ -0,0 +1,286 @@
+"""
+Local skill-matching engine.
+Detects skills from a loadable taxonomy with an Aho-Corasick automaton
+and computes the job description skills missing from a resume.
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Taxonomy mapping canonical skill names to their aliases
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "skill_taxonomy.json")
+)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher.
+    Finds every occurrence of every pattern in a single linear pass over the text.
+    """
+    
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        # Node 0 is the root; each node has goto edges, a failure link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for index, pattern in enumerate(self.patterns):
+            self._add(pattern, index)
+        self._build_failure_links()
+    
+    def _add(self, pattern: str, index: int) -> None:
+        """Insert a pattern into the trie."""
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append(index)
+    
+    def _build_failure_links(self) -> None:
+        """Compute failure links breadth-first and merge their outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+    
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Scan text for all pattern occurrences.
+        
+        Args:
+            text: Text to scan
+            
+        Yields:
+            Tuple[int, int]: (start offset, pattern index) for each occurrence
+        """
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for index in self._output[node]:
+                yield position - len(self.patterns[index]) + 1, index
+
+
+def _is_word_char(char: str) -> bool:
+    """Characters that may not directly surround a skill mention."""
+    return char.isalnum()
+
+
+class SkillTaxonomy:
+    """
+    Canonical skills and their aliases, compiled into an Aho-Corasick automaton.
+    """
+    
+    def __init__(self, skills: Dict[str, List[str]]):
+        """
+        Args:
+            skills: Mapping of canonical skill name to its lowercase aliases;
+                an empty alias list matches the canonical name itself
+        """
+        aliases: Dict[str, str] = {}
+        for canonical, skill_aliases in skills.items():
+            # Listed aliases are authoritative so ambiguous names ("Go") can be left out
+            for alias in skill_aliases or [canonical]:
+                aliases.setdefault(" ".join(alias.lower().split()), canonical)
+        
+        self.skills = list(skills)
+        self._canonical = list(aliases.values())
+        self._automaton = AhoCorasick(aliases.keys())
+    
+    @classmethod
+    def from_file(cls, path: str) -> "SkillTaxonomy":
+        """
+        Load a taxonomy from a JSON file mapping canonical names to aliases.
+        
+        Args:
+            path: Path to the taxonomy JSON file
+            
+        Returns:
+            SkillTaxonomy: Compiled taxonomy
+        """
+        with open(path, "r", encoding="utf-8") as taxonomy_file:
+            return cls(json.load(taxonomy_file))
+    
+    def find_skills(self, text: str) -> List[str]:
+        """
+        Find the canonical skills mentioned in a text.
+        
+        Args:
+            text: Resume or job description text
+            
+        Returns:
+            List[str]: Canonical skill names in order of first mention
+        """
+        normalized = " ".join(text.lower().split())
+        first_mention: Dict[str, int] = {}
+        
+        for start, index in self._automaton.iter_matches(normalized):
+            end = start + len(self._automaton.patterns[index])
+            # Only accept whole-word mentions ("java" must not match "javascript")
+            if start > 0 and _is_word_char(normalized[start - 1]) and _is_word_char(normalized[start]):
+                continue
+            if end < len(normalized) and _is_word_char(normalized[end]) and _is_word_char(normalized[end - 1]):
+                continue
+            canonical = self._canonical[index]
+            first_mention[canonical] = min(start, first_mention.get(canonical, start))
+        
+        # Occurrences are reported by end offset, so order by start offset
+        return sorted(first_mention, key=first_mention.get)
+    
+    def __len__(self) -> int:
+        return len(self.skills)
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    Get the global skill taxonomy, loading it on first use.
+    
+    Returns:
+        SkillTaxonomy: Compiled taxonomy from SKILL_TAXONOMY_PATH
+    """
+    global _taxonomy
+    
+    if _taxonomy is None:
+        _taxonomy = SkillTaxonomy.from_file(SKILL_TAXONOMY_PATH)
+        logger.info(f"✓ Loaded skill taxonomy with {len(_taxonomy)} skills")
+    
+    return _taxonomy
+
+
+def match_skills(resume_text: str, job_description_text: str) -> Dict[str, List[str]]:
+    """
+    Compare the skills of a resume with those required by a job description.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        
+    Returns:
+        Dict: required_skills, matched_skills and missing_skills, in JD order
+    """
+    taxonomy = get_skill_taxonomy()
+    required = taxonomy.find_skills(job_description_text)
+    present = set(taxonomy.find_skills(resume_text))
+    
+    return {
+        "required_skills": required,
+        "matched_skills": [skill for skill in required if skill in present],
+        "missing_skills": [skill for skill in required if skill not in present]
+    }
+
+
+def prescreen_resume_profile(resume_profile: Dict, job_description_text: str) -> Dict[str, List]:
+    """
+    Compare the skills of a resume profile with those of a job description.
+    The profile's skill names are canonicalized through the taxonomy, so
+    "k8s" in the profile matches "Kubernetes" in the JD.
+    
+    Args:
+        resume_profile: Profile returned by validate_resume_profile
+        job_description_text: Full job description content
+    
+    Returns:
+        Dict: matched_skills as (skill, years or None) pairs and
+        missing_skills, in JD order
+    """
+    taxonomy = get_skill_taxonomy()
+    years: Dict[str, Optional[float]] = {}
+    for skill in resume_profile["skills"]:
+        for canonical in taxonomy.find_skills(skill["name"]):
+            if years.get(canonical) is None:
+                years[canonical] = skill["years"]
+    
+    required = taxonomy.find_skills(job_description_text)
+    return {
+        "matched_skills": [(skill, years[skill]) for skill in required if skill in years],
+        "missing_skills": [skill for skill in required if skill not in years]
+    }
+
+
+def find_missing_skills(resume_text: str, job_description_text: str) -> List[str]:
+    """
+    Get the job description skills that are not mentioned in the resume.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        
+    Returns:
+        List[str]: Missing canonical skills in JD order
+    """
+    return match_skills(resume_text, job_description_text)["missing_skills"]
+
+
+def suggest_improvements(missing_skills: List[str], limit: int = 5) -> List[str]:
+    """
+    Build improvement suggestions for a list of missing skills.
+    
+    Args:
+        missing_skills: Missing canonical skills, most important first
+        limit: Maximum number of suggestions
+        
+    Returns:
+        List[str]: Actionable suggestions
+    """
+    suggestions = [
+        f"Add concrete projects or experience demonstrating {skill}"
+        for skill in missing_skills[:limit]
+    ]
+    if len(suggestions) < limit:
+        suggestions.append("Quantify achievements with metrics such as scale, performance or impact")
+    if len(suggestions) < limit:
+        suggestions.append("Mirror the job description's terminology for skills you already have")
+    return suggestions[:limit]
+
+
+def build_local_analysis(resume_text: str, job_description_text: str) -> Dict:
+    """
+    Analyze a resume against a job description without calling an LLM.
+    The score is the share of JD skills found in the resume.
+    
+    Args:
+        resume_text: Full resume content
+        job_description_text: Full job description content
+        
+    Returns:
+        dict: Analysis result with match_percentage, missing_skills, improvement_suggestions
+    """
+    skills = match_skills(resume_text, job_description_text)
+    required = skills["required_skills"]
+    
+    if required:
+        match_percentage = round(100 * len(skills["matched_skills"]) / len(required))
+    else:
+        # Nothing recognizable to compare against; report a neutral score
+        match_percentage = 50
+    
+    return {
+        "match_percentage": match_percentage,
+        "missing_skills": skills["missing_skills"][:5],
+        "improvement_suggestions": suggest_improvements(skills["missing_skills"])
+    }
@@ -0,0 +1,158 @@
+"""
+Write-behind queue for batched MongoDB persistence.
+Documents are queued in memory and flushed in batches by a background task.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marker put on the queue to stop the flusher once everything before it is written
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-memory queue flushed in batches.
+    
+    A batch is flushed once it reaches max_batch documents or flush_interval
+    seconds after its first document arrived, whichever comes first. When
+    max_backlog documents are waiting, put() blocks until the flusher catches
+    up, which applies backpressure to the callers. Documents must carry their
+    own "_id" so they can be looked up before they are flushed.
+    """
+    
+    def __init__(
+        self,
+        flush: Callable[[List[Dict]], Awaitable[None]],
+        max_batch: int = 500,
+        flush_interval: float = 0.5,
+        max_backlog: int = 10000,
+        max_retries: int = 3
+    ):
+        self._flush = flush
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.max_retries = max_retries
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Queued or in-flight documents by ID, for read-your-writes lookups
+        self._pending: Dict[str, Dict] = {}
+        # Set (and replaced) each time a batch finishes
+        self._batch_done: Optional[asyncio.Event] = None
+        self.counters: Dict[str, int] = {"queued": 0, "flushed": 0, "batches": 0, "dropped": 0}
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is active."""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_backlog)
+        self._batch_done = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def put(self, document: Dict) -> None:
+        """
+        Queue a document, waiting while the backlog is full.
+        
+        Args:
+            document: Document with a pre-assigned "_id"
+        """
+        self._pending[str(document["_id"])] = document
+        await self._queue.put(document)
+        self.counters["queued"] += 1
+    
+    def get_pending(self, document_id: str) -> Optional[Dict]:
+        """Get a document that has been queued but not yet flushed."""
+        return self._pending.get(document_id)
+    
+    async def wait_until_flushed(self, document_id: str) -> None:
+        """Wait until a queued document has been written (or dropped)."""
+        while document_id in self._pending and self.running:
+            await self._batch_done.wait()
+    
+    async def stop(self) -> None:
+        """Flush every queued document, then stop the flusher."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        
+        # Documents queued behind the stop marker while it was being processed
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            await self._flush_batch(leftover)
+    
+    async def _run(self) -> None:
+        """Collect batches and flush them until the stop marker is reached."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush_batch(batch)
+    
+    async def _flush_batch(self, batch: List[Dict]) -> None:
+        """Write one batch, retrying with backoff before giving up."""
+        started = time.perf_counter()
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self._flush(batch)
+                self.counters["flushed"] += len(batch)
+                self.counters["batches"] += 1
+                logger.debug(f"💾 Flushed {len(batch)} documents in {time.perf_counter() - started:.3f}s")
+                break
+            except Exception as e:
+                logger.warning(f"⚠️ Write-behind flush attempt {attempt} failed: {str(e)}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+        else:
+            self.counters["dropped"] += len(batch)
+            logger.error(f"❌ Dropped {len(batch)} documents after {self.max_retries} failed flushes")
+        
+        for document in batch:
+            self._pending.pop(str(document["_id"]), None)
+        
+        batch_done, self._batch_done = self._batch_done, asyncio.Event()
+        batch_done.set()
+    
+    def stats(self) -> Dict:
+        """Get backlog size and flush counters."""
+        return {
+            "running": self.running,
+            "backlog": self._queue.qsize() if self._queue else 0,
+            "max_backlog": self.max_backlog,
+            "pending": len(self._pending),
+            **self.counters
+        }
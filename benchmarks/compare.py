@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Compare two benchmark result files.
+Exits with status 1 when the candidate regresses beyond the threshold.
+Run with: python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_KEYS = ["p50", "p95", "p99"]
+
+
+def change(baseline: Optional[float], candidate: Optional[float]) -> Optional[float]:
+    """Relative change in percent, or None if either side is missing or zero."""
+    if not baseline or candidate is None:
+        return None
+    return (candidate - baseline) / baseline * 100
+
+
+def compare_section(name: str, baseline: Dict, candidate: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Compare the throughput, error rate and latency of one endpoint (or overall).
+    
+    Returns:
+        Tuple[List[str], List[str]]: Report lines and regression descriptions
+    """
+    lines = []
+    regressions = []
+    
+    def row(metric: str, old, new, delta: Optional[float], worse: bool) -> None:
+        delta_text = f"{delta:+.1f}%" if delta is not None else "n/a"
+        flag = "  ⚠️" if worse else ""
+        lines.append(f"  {metric:<16} {str(old):>12} {str(new):>12} {delta_text:>10}{flag}")
+        if worse:
+            regressions.append(f"{name} {metric} {delta_text}")
+    
+    old_rps, new_rps = baseline.get("throughput_rps"), candidate.get("throughput_rps")
+    delta = change(old_rps, new_rps)
+    row("throughput_rps", old_rps, new_rps, delta, delta is not None and delta < -threshold)
+    
+    old_errors, new_errors = baseline.get("error_rate", 0.0), candidate.get("error_rate", 0.0)
+    # Error rates are compared in percentage points
+    points = (new_errors - old_errors) * 100
+    row("error_rate", f"{old_errors:.2%}", f"{new_errors:.2%}", None, points > threshold / 10)
+    
+    for key in LATENCY_KEYS:
+        old = baseline.get("latency_ms", {}).get(key)
+        new = candidate.get("latency_ms", {}).get(key)
+        delta = change(old, new)
+        row(f"latency_{key}_ms", old, new, delta, delta is not None and delta > threshold)
+    
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Regression threshold: percent for latency/throughput, tenths of it in points for error rate"
+    )
+    args = parser.parse_args()
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    
+    print(f"Baseline:  {baseline['git']['commit'][:8]} {baseline['git']['subject']} {baseline.get('label', '')}")
+    print(f"Candidate: {candidate['git']['commit'][:8]} {candidate['git']['subject']} {candidate.get('label', '')}")
+    if baseline.get("config") != candidate.get("config"):
+        print("⚠️ The runs used different configurations")
+    
+    regressions = []
+    sections = [("overall", baseline["overall"], candidate["overall"])]
+    for name in baseline["endpoints"]:
+        if name in candidate["endpoints"]:
+            sections.append((name, baseline["endpoints"][name], candidate["endpoints"][name]))
+    
+    for name, old, new in sections:
+        print(f"\n{name}")
+        print(f"  {'metric':<16} {'baseline':>12} {'candidate':>12} {'change':>10}")
+        lines, found = compare_section(name, old, new, args.threshold)
+        print("\n".join(lines))
+        regressions += found
+    
+    old_lag = baseline.get("loop_lag_ms", {}).get("p99")
+    new_lag = candidate.get("loop_lag_ms", {}).get("p99")
+    print(f"\nevent loop lag p99: {old_lag}ms -> {new_lag}ms")
+    
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold}%:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
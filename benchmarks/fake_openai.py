@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Stub OpenAI-compatible server for benchmarks.
+Serves /v1/chat/completions with configurable latency and error rates.
+Run with: python -m benchmarks.fake_openai --port 9100 --latency-median 2.0
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import hashlib
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SKILL_POOL = ["Docker", "Kubernetes", "Terraform", "AWS", "GraphQL", "Kafka", "Redis", "CI/CD"]
+
+# Defaults can be set through the environment when the app is served by uvicorn directly
+config = {
+    "latency_median": float(os.getenv("FAKE_OPENAI_LATENCY_MEDIAN", "2.0")),
+    "latency_sigma": float(os.getenv("FAKE_OPENAI_LATENCY_SIGMA", "0.5")),
+    "latency_max": float(os.getenv("FAKE_OPENAI_LATENCY_MAX", "60")),
+    "error_rate": float(os.getenv("FAKE_OPENAI_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("FAKE_OPENAI_RATE_LIMIT_RATE", "0")),
+    "stream_chunks": int(os.getenv("FAKE_OPENAI_STREAM_CHUNKS", "20"))
+}
+
+counters = {"requests": 0, "errors": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0}
+
+app = FastAPI(title="Fake OpenAI")
+
+
+def sample_latency() -> float:
+    """Draw a response time from a log-normal distribution around the median."""
+    if config["latency_median"] <= 0:
+        return 0.0
+    latency = random.lognormvariate(0, config["latency_sigma"]) * config["latency_median"]
+    return min(latency, config["latency_max"])
+
+
+def build_content(prompt: str) -> str:
+    """Build a deterministic analysis for a prompt, so identical prompts get identical answers."""
+    digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+    if '"total_years_experience"' in prompt:
+        # Resume profile extraction
+        return json.dumps({
+            "current_title": "Software Engineer",
+            "titles": ["Junior Developer"],
+            "total_years_experience": 2 + digest % 8,
+            "domains": ["software"],
+            "skills": [
+                {"name": SKILL_POOL[(digest >> (4 * i)) % len(SKILL_POOL)], "years": 1 + (digest >> (4 * i)) % 6}
+                for i in range(5)
+            ],
+            "education": "BSc Computer Science",
+            "highlights": ["Reduced API latency by 40%"]
+        })
+    
+    if '"required_skills"' in prompt:
+        # JD requirement profile extraction
+        return json.dumps({
+            "title": "Backend Engineer",
+            "seniority": "senior",
+            "domain": "software",
+            "min_years_experience": 3 + digest % 5,
+            "required_skills": [SKILL_POOL[(digest >> (4 * i)) % len(SKILL_POOL)] for i in range(4)],
+            "nice_to_have_skills": [SKILL_POOL[(digest >> (4 * i + 16)) % len(SKILL_POOL)] for i in range(2)],
+            "responsibilities": ["Design and operate backend services"]
+        })
+    
+    missing = [SKILL_POOL[(digest >> (4 * i)) % len(SKILL_POOL)] for i in range(3)]
+    return json.dumps({
+        "match_percentage": digest % 101,
+        "missing_skills": list(dict.fromkeys(missing)),
+        "improvement_suggestions": [f"Highlight hands-on experience with {skill}" for skill in dict.fromkeys(missing)]
+    })
+
+
+def error_response(status_code: int, message: str, error_type: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+        headers={"retry-after": "1"} if status_code == 429 else None
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    counters["in_flight"] += 1
+    counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+    
+    try:
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            counters["rate_limited"] += 1
+            return error_response(429, "Rate limit reached", "requests")
+        
+        latency = sample_latency()
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            # Failures take a while too, like a real upstream timing out internally
+            await asyncio.sleep(latency / 2)
+            counters["errors"] += 1
+            return error_response(500, "The server had an error while processing your request", "server_error")
+        
+        prompt = "".join(message.get("content", "") for message in body.get("messages", []))
+        content = build_content(prompt)
+        model = body.get("model", "gpt-3.5-turbo")
+        created = int(time.time())
+        prompt_tokens = max(1, len(prompt) // 4)
+        
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(content, model, created, latency),
+                media_type="text/event-stream"
+            )
+        
+        await asyncio.sleep(latency)
+        return {
+            "id": f"chatcmpl-{counters['requests']}",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4
+            }
+        }
+        
+    finally:
+        counters["in_flight"] -= 1
+
+
+async def stream_chunks(content: str, model: str, created: int, latency: float):
+    """Send the content in evenly spaced chunks over the sampled latency."""
+    pieces = max(1, config["stream_chunks"])
+    size = max(1, len(content) // pieces + 1)
+    for start in range(0, len(content), size):
+        await asyncio.sleep(latency / pieces)
+        chunk = {
+            "id": "chatcmpl-stream",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/stats")
+async def stats():
+    """Request counters, used by the benchmark runner."""
+    return counters
+
+
+def main():
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-median", type=float, default=config["latency_median"], help="Median response time (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=config["latency_sigma"], help="Log-normal sigma; 0 gives a fixed latency")
+    parser.add_argument("--latency-max", type=float, default=config["latency_max"], help="Upper bound on response time (seconds)")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="Fraction of calls answered with a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=config["rate_limit_rate"], help="Fraction of calls answered with a 429")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    config.update(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        latency_max=args.latency_max,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate
+    )
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
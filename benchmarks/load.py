@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+"""
+Open-loop load generator for the API.
+Sends requests at a target rate and reports throughput, latency percentiles
+and event-loop lag of the server.
+Run against a running server with: python -m benchmarks.load --rps 20 --duration 30
+"""
+
+import json
+import math
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+import httpx
+
+RESUME = (
+    "Senior Software Engineer with 7 years of Python experience building FastAPI and Django "
+    "services on AWS. Designed event-driven microservices with Kafka and PostgreSQL, "
+    "containerized with Docker and deployed through GitHub Actions CI/CD pipelines."
+)
+
+JOB_DESCRIPTION = (
+    "We are hiring a Senior Backend Engineer. Required: Python, FastAPI, AWS, Docker, "
+    "Kubernetes and PostgreSQL. Nice to have: Terraform, Kafka, Redis and GraphQL. "
+    "You will design scalable APIs and mentor other engineers."
+)
+
+# Endpoint name -> (method, path, whether it needs an analysis payload)
+ENDPOINTS = {
+    "analyze": ("POST", "/api/v1/analyze", True),
+    "analyze_fast": ("POST", "/api/v1/analyze?mode=fast", True),
+    "analyses": ("GET", "/api/v1/analyses?limit=20", False),
+    "statistics": ("GET", "/api/v1/statistics", False)
+}
+
+DEFAULT_MIX = "analyze=8,analyses=1,statistics=1"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse an endpoint mix such as "analyze=8,statistics=1" into weights.
+    
+    Raises:
+        ValueError: If an endpoint is unknown or a weight is invalid
+    """
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}', expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+        if weights[name] < 0:
+            raise ValueError(f"Negative weight for '{name}'")
+    return weights
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank p50/p95/p99 plus mean and max of a list of milliseconds."""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(samples)
+    
+    def rank(q: float) -> float:
+        return round(ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)], 2)
+    
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2)
+    }
+
+
+class LoopLagProbe:
+    """
+    Estimates the server's event-loop lag by timing a trivial endpoint.
+    
+    /health does no I/O, so once the idle baseline is subtracted its
+    response time is dominated by how long the request waits for the loop.
+    """
+    
+    def __init__(self, base_url: str, interval: float = 0.1):
+        self.base_url = base_url
+        self.interval = interval
+        self.baseline = 0.0
+        self.samples: List[float] = []
+    
+    async def _measure(self, http: httpx.AsyncClient) -> float:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await http.get("/health")
+        return (loop.time() - started) * 1000
+    
+    async def calibrate(self, count: int = 20) -> None:
+        """Measure the idle response time of /health."""
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=10) as http:
+            samples = []
+            for _ in range(count):
+                samples.append(await self._measure(http))
+                await asyncio.sleep(self.interval / 2)
+        self.baseline = sorted(samples)[len(samples) // 2]
+    
+    async def run(self, stop: asyncio.Event) -> None:
+        """Sample until stop is set."""
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=60) as http:
+            while not stop.is_set():
+                try:
+                    self.samples.append(max(0.0, await self._measure(http) - self.baseline))
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(self.interval)
+    
+    def report(self) -> Dict:
+        stats = percentiles(self.samples)
+        return {"baseline_ms": round(self.baseline, 2), "samples": len(self.samples), **stats}
+
+
+async def run_load(
+    base_url: str,
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    warmup: float = 5.0,
+    max_in_flight: int = 1000,
+    repeat_ratio: float = 0.0,
+    poisson: bool = True,
+    seed: int = 42
+) -> Dict:
+    """
+    Drive the API at a target request rate and collect results.
+    
+    Requests are scheduled open-loop: each has an intended start time and
+    its latency is measured from that time, so a slow server is not hidden
+    by the generator waiting on it. Requests that would exceed max_in_flight
+    are dropped and counted.
+    
+    Args:
+        base_url: API base URL
+        rps: Target requests per second
+        duration: Measured seconds (after warmup)
+        mix: Endpoint weights from parse_mix
+        warmup: Seconds of load before measurement starts
+        max_in_flight: Cap on outstanding requests
+        repeat_ratio: Fraction of analyses that reuse an earlier payload (cache hits)
+        poisson: Use exponential inter-arrival times instead of a fixed interval
+        seed: Random seed for arrivals, the endpoint mix and payloads
+    
+    Returns:
+        Dict: Per-endpoint and overall throughput, latency and status codes,
+        plus event-loop lag and dropped requests
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    loop = asyncio.get_running_loop()
+    
+    results: Dict[str, Dict] = {name: {"latencies": [], "status_codes": {}, "errors": 0} for name in names}
+    in_flight = 0
+    dropped = 0
+    
+    probe = LoopLagProbe(base_url)
+    await probe.calibrate()
+    
+    async def fire(http: httpx.AsyncClient, name: str, scheduled: float, sequence: int, measured: bool) -> None:
+        nonlocal in_flight
+        method, path, needs_payload = ENDPOINTS[name]
+        payload = None
+        if needs_payload:
+            variant = rng.randrange(max(1, sequence)) if rng.random() < repeat_ratio else sequence
+            payload = {
+                "resume_text": f"{RESUME} Candidate reference {variant}.",
+                "job_description_text": JOB_DESCRIPTION
+            }
+        
+        in_flight += 1
+        try:
+            response = await http.request(method, path, json=payload)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            in_flight -= 1
+        
+        if measured:
+            entry = results[name]
+            entry["latencies"].append((loop.time() - scheduled) * 1000)
+            entry["status_codes"][status] = entry["status_codes"].get(status, 0) + 1
+            if not status.startswith("2"):
+                entry["errors"] += 1
+    
+    stop_probe = asyncio.Event()
+    tasks = []
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as http:
+        started = loop.time()
+        measure_from = started + warmup
+        end = measure_from + duration
+        probe_task = None
+        
+        scheduled = started
+        sequence = 0
+        while scheduled < end:
+            if probe_task is None and scheduled >= measure_from:
+                probe_task = asyncio.create_task(probe.run(stop_probe))
+            
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+            if in_flight >= max_in_flight:
+                if scheduled >= measure_from:
+                    dropped += 1
+            else:
+                name = rng.choices(names, weights)[0]
+                tasks.append(asyncio.create_task(fire(http, name, scheduled, sequence, scheduled >= measure_from)))
+            
+            sequence += 1
+            scheduled += rng.expovariate(rps) if poisson else 1.0 / rps
+        
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - measure_from
+        stop_probe.set()
+        if probe_task is not None:
+            await probe_task
+    
+    endpoints = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for name, entry in results.items():
+        count = len(entry["latencies"])
+        all_latencies += entry["latencies"]
+        total_errors += entry["errors"]
+        endpoints[name] = {
+            "requests": count,
+            "errors": entry["errors"],
+            "error_rate": round(entry["errors"] / count, 4) if count else 0.0,
+            "throughput_rps": round((count - entry["errors"]) / elapsed, 2),
+            "status_codes": entry["status_codes"],
+            "latency_ms": percentiles(entry["latencies"])
+        }
+    
+    return {
+        "overall": {
+            "requests": len(all_latencies),
+            "errors": total_errors,
+            "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+            "throughput_rps": round((len(all_latencies) - total_errors) / elapsed, 2),
+            "dropped": dropped,
+            "latency_ms": percentiles(all_latencies)
+        },
+        "endpoints": endpoints,
+        "loop_lag_ms": probe.report()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Endpoint weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="Fraction of analyses reusing an earlier payload")
+    parser.add_argument("--fixed-interval", action="store_true", help="Send at a fixed interval instead of Poisson arrivals")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    results = asyncio.run(run_load(
+        base_url=args.base_url,
+        rps=args.rps,
+        duration=args.duration,
+        mix=parse_mix(args.mix),
+        warmup=args.warmup,
+        max_in_flight=args.max_in_flight,
+        repeat_ratio=args.repeat_ratio,
+        poisson=not args.fixed_interval,
+        seed=args.seed
+    ))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
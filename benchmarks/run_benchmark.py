@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Benchmark runner.
+Starts the fake OpenAI server, an optional local mongod and the API, drives
+the API with the load generator and stores the results as JSON.
+Run with: python -m benchmarks.run_benchmark --rps 20 --duration 30
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import platform
+import tempfile
+import argparse
+import subprocess
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import httpx
+
+from benchmarks.load import run_load, parse_mix, DEFAULT_MIX
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def git_info() -> Dict:
+    """Commit and dirty state of the working tree, to label results."""
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))
+    }
+
+
+def wait_for_http(url: str, timeout: float = 30.0) -> None:
+    """Poll a URL until it answers, or raise after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    """Wait until a local TCP port accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Port {port} did not open within {timeout:.0f}s")
+
+
+def start_process(command: List[str], env: Optional[Dict[str, str]] = None, log_path: Optional[str] = None) -> subprocess.Popen:
+    """Start a child process, sending its output to a log file."""
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: Optional[subprocess.Popen]) -> None:
+    """Terminate a child process, killing it if it does not exit."""
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API benchmark against a fake OpenAI server")
+    parser.add_argument("--rps", type=float, default=20, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Endpoint weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="Fraction of analyses reusing an earlier payload")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-median", type=float, default=2.0, help="Fake OpenAI median latency (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Fake OpenAI log-normal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake OpenAI 500 rate")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fake OpenAI 429 rate")
+    parser.add_argument("--mongod", default=None, help="Path to mongod (default: found on PATH)")
+    parser.add_argument("--mongo-url", default=None, help="Use an existing MongoDB instead of starting mongod")
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--mongo-port", type=int, default=27027)
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the API")
+    parser.add_argument("--label", default="", help="Free-form label stored with the results")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+    
+    mix = parse_mix(args.mix)
+    mongod = None if args.mongo_url else (args.mongod or shutil.which("mongod"))
+    if not args.mongo_url and not mongod:
+        parser.error("mongod not found on PATH; pass --mongod or point --mongo-url at a running MongoDB")
+    
+    workdir = tempfile.mkdtemp(prefix="checknnext-bench-")
+    processes: List[subprocess.Popen] = []
+    succeeded = False
+    
+    try:
+        print(f"🧪 Starting fake OpenAI server on port {args.fake_port}...")
+        processes.append(start_process([
+            sys.executable, "-m", "benchmarks.fake_openai",
+            "--port", str(args.fake_port),
+            "--latency-median", str(args.latency_median),
+            "--latency-sigma", str(args.latency_sigma),
+            "--error-rate", str(args.error_rate),
+            "--rate-limit-rate", str(args.rate_limit_rate),
+            "--seed", str(args.seed)
+        ], log_path=os.path.join(workdir, "fake_openai.log")))
+        wait_for_http(f"http://127.0.0.1:{args.fake_port}/stats")
+        
+        mongo_url = args.mongo_url or f"mongodb://127.0.0.1:{args.mongo_port}"
+        if mongod:
+            # A throwaway database directory, so every run starts empty
+            print(f"🗄️  Starting mongod on port {args.mongo_port}...")
+            dbpath = os.path.join(workdir, "db")
+            os.makedirs(dbpath)
+            processes.append(start_process([
+                mongod, "--dbpath", dbpath, "--port", str(args.mongo_port), "--bind_ip", "127.0.0.1", "--quiet"
+            ], log_path=os.path.join(workdir, "mongod.log")))
+            wait_for_port(args.mongo_port)
+        
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "sk-benchmark",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+            "MONGODB_URL": mongo_url,
+            "MATCH_INDEX_DIR": os.path.join(workdir, "match_index"),
+            # The fake server has no quota; use --app-env to benchmark the scheduler
+            "LLM_RPM_LIMIT": "0",
+            "LLM_TPM_LIMIT": "0"
+        }
+        for item in args.app_env:
+            key, _, value = item.partition("=")
+            env[key] = value
+        
+        print(f"🚀 Starting API on port {args.api_port}...")
+        processes.append(start_process([
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(args.api_port), "--log-level", "warning"
+        ], env=env, log_path=os.path.join(workdir, "api.log")))
+        base_url = f"http://127.0.0.1:{args.api_port}"
+        wait_for_http(f"{base_url}/health")
+        
+        print(f"📈 Running {args.rps} rps for {args.duration}s (+{args.warmup}s warmup), mix {args.mix}...")
+        results = asyncio.run(run_load(
+            base_url=base_url,
+            rps=args.rps,
+            duration=args.duration,
+            mix=mix,
+            warmup=args.warmup,
+            max_in_flight=args.max_in_flight,
+            repeat_ratio=args.repeat_ratio,
+            seed=args.seed
+        ))
+        results["upstream"] = httpx.get(f"http://127.0.0.1:{args.fake_port}/stats").json()
+        
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "label": args.label,
+            "git": git_info(),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "mongodb": "external" if args.mongo_url else "mongod"
+            },
+            "config": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "label", "mongod", "mongo_url")
+            },
+            **results
+        }
+        
+        output = args.output
+        if output is None:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            output = os.path.join(RESULTS_DIR, f"{stamp}-{report['git']['commit'][:8] or 'nogit'}.json")
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        
+        overall = results["overall"]
+        latency = overall["latency_ms"]
+        print(
+            f"✅ {overall['requests']} requests, {overall['throughput_rps']} ok/s, "
+            f"errors {overall['error_rate']:.1%}, p50 {latency['p50']}ms, p95 {latency['p95']}ms, "
+            f"p99 {latency['p99']}ms, loop lag p99 {results['loop_lag_ms']['p99']}ms"
+        )
+        print(f"💾 Results written to {output}")
+        succeeded = True
+    
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+        if succeeded:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"❌ Benchmark failed - process logs kept in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
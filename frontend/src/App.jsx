@@ -3,7 +3,7 @@ import Header from './components/Header'
 import AnalysisForm from './components/AnalysisForm'
 import ResultsDisplay from './components/ResultsDisplay'
 import History from './components/History'
-import { analyzeResume } from './services/api'
+import { analyzeResumeStream } from './services/api'
 
 function App() {
   const [results, setResults] = useState(null)
@@ -15,14 +15,29 @@ function App() {
   const handleAnalyze = async (resumeText, jobDescriptionText) => {
     setLoading(true)
     setError(null)
+    setResults(null)
     
+    const baseResults = {
+      resumeText: resumeText,
+      jobDescriptionText: jobDescriptionText,
+      timestamp: new Date().toLocaleString()
+    }
+
     try {
-      const response = await analyzeResume(resumeText, jobDescriptionText)
+      // Show each field as soon as the server streams it
+      const response = await analyzeResumeStream(resumeText, jobDescriptionText, (event, data) => {
+        setLoading(false)
+        setResults(prev => {
+          const partial = prev ?? { ...baseResults, missing_skills: [], improvement_suggestions: [] }
+          if (event === 'match_percentage') return { ...partial, match_percentage: data.value }
+          if (event === 'missing_skill') return { ...partial, missing_skills: [...partial.missing_skills, data.value] }
+          if (event === 'improvement_suggestion') return { ...partial, improvement_suggestions: [...partial.improvement_suggestions, data.value] }
+          return partial
+        })
+      })
       setResults({
         ...response,
-        resumeText: resumeText,
-        jobDescriptionText: jobDescriptionText,
-        timestamp: new Date().toLocaleString()
+        ...baseResults
       })
       
       // Add to history
@@ -43,6 +43,63 @@ export const analyzeResume = async (resumeText, jobDescriptionText) => {
   }
 }
 
+/**
+ * Analyze resume against job description, streaming results as they are generated.
+ * onEvent(event, data) is called for every Server-Sent Event; resolves with the
+ * data of the final "complete" event.
+ */
+export const analyzeResumeStream = async (resumeText, jobDescriptionText, onEvent) => {
+  let response
+  try {
+    response = await fetch(`${API_URL}/analyze/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        resume_text: resumeText,
+        job_description_text: jobDescriptionText,
+      }),
+    })
+  } catch (error) {
+    throw new Error('Network error: Could not connect to server. Make sure the backend is running on http://localhost:8000')
+  }
+
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}))
+    throw new Error(data.detail || data.error || `Server error: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    // Messages are separated by a blank line
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      const payload = data ? JSON.parse(data) : null
+
+      if (event === 'error') throw new Error(payload?.detail || 'Failed to analyze resume')
+      if (event === 'complete') return payload
+      onEvent(event, payload)
+    }
+  }
+
+  throw new Error('Analysis stream ended unexpectedly')
+}
+
 /**
  * Get specific analysis by ID
  */
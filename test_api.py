@@ -3,9 +3,61 @@ Test file for API endpoints.
 Run with: pytest test_api.py -v
 """
 
+import os
+import json
+import socket
+import asyncio
+import httpx
 import pytest
+from types import SimpleNamespace
+from datetime import datetime
+from bson.objectid import ObjectId
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.cache import LRUCache, make_cache_key, get_cached_result, cache_counters
+from app.services.singleflight import SingleFlight
+from app.services.write_behind import WriteBehindQueue
+from app.services.rate_limiter import QuotaScheduler, RateLimitExceeded
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+from app.services.json_stream import IncrementalJSONParser
+from app.services.llm_service import (
+    parse_llm_response,
+    select_backend,
+    analyze_resume_vs_jd,
+    stream_resume_vs_jd,
+    create_analysis_prompt,
+    validate_jd_profile,
+    validate_resume_profile
+)
+from app.services.llm_backends import parse_backend_routes, parse_escalation_routes
+from app.services.llm_service import InvalidLLMResponse
+from app.services.cascade import run_cascade, parse_escalation_band
+from app.services import cascade
+from app.services.near_duplicates import (
+    NearDuplicateIndex,
+    simhash,
+    hamming_distance,
+    pair_signature,
+    signature_document,
+    rebuild_near_duplicate_index,
+    near_duplicate_index
+)
+from app.services import database
+from app.services.revisions import diff_sections, run_revision_analysis, new_revision
+from app.services.llm_service import create_revision_prompt
+from app.services import revisions
+from app.services.skills import AhoCorasick, SkillTaxonomy, prescreen_resume_profile
+from app.services.fast_scorer import fast_analyze_batch, vectorize
+from app.services.match_index import VectorIndex
+from app.services.database import encode_page_cursor, decode_page_cursor
+from app.services.rollups import build_bucket_increments, summarize_buckets
+from app.services.metrics import stage, start_request_timing, format_server_timing, prompt_tokens_saved
+from app.services.compression import compress_inputs, fit_to_budget, strip_boilerplate, normalize_whitespace
+from app.services.chunking import split_into_chunks, merge_chunk_results, analyze_chunked
+from app.services.rate_limiter import estimate_tokens
+from app.services import chunking
+from app.services import job_queue, profiles, analysis_service
+from app.routes import analyze, matching
 
 client = TestClient(app)
 
@@ -69,6 +121,437 @@ class TestAnalyzeEndpoint:
         assert response.status_code == 422
 
 
+class TestBatchAnalyzeEndpoint:
+    """Test batch analysis endpoint."""
+    
+    RESUME = "Senior Software Engineer with 10 years Python experience including FastAPI, Django, and microservices."
+    JD = "Senior Python Developer needed with 5+ years experience. Required: FastAPI, AWS, Docker."
+    
+    def test_batch_results_in_input_order(self):
+        """Test that a short item fails alone and results keep input order."""
+        payload = {
+            "resume_text": self.RESUME,
+            "job_description_texts": [self.JD, "Too short", self.JD]
+        }
+        response = client.post("/api/v1/analyze/batch", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert [item["index"] for item in data["results"]] == [0, 1, 2]
+        assert data["results"][1]["error"]
+        assert data["results"][1]["result"] is None
+    
+    def test_batch_requires_one_list_side(self):
+        """Test validation of the batch shape."""
+        payload = {
+            "resume_texts": [self.RESUME],
+            "job_description_texts": [self.JD]
+        }
+        response = client.post("/api/v1/analyze/batch", json=payload)
+        assert response.status_code == 422
+
+
+class TestStreamingAnalysis:
+    """Test incremental parsing and the streaming endpoint."""
+    
+    RESUME = "Senior Software Engineer with 10 years Python experience including FastAPI, Django, and microservices."
+    JD = "Senior Python Developer needed with 5+ years experience. Required: FastAPI, AWS, Docker."
+    RESPONSE = 'Here you go:\n{"match_percentage": 82, "missing_skills": ["Docker", "Go, \\"Golang\\""], "improvement_suggestions": ["Add [metrics]"]}'
+    
+    class FakeStream:
+        """Streamed completion yielding the given content deltas."""
+        
+        def __init__(self, texts):
+            self.texts = texts
+            self.closed = False
+        
+        async def __aiter__(self):
+            for text in self.texts:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        
+        async def close(self):
+            self.closed = True
+    
+    def test_parser_emits_fields_as_they_complete(self):
+        """Test that byte-by-byte feeding yields events in order."""
+        parser = IncrementalJSONParser()
+        events = []
+        for char in self.RESPONSE:
+            events += parser.feed(char)
+        
+        assert events[0] == ("match_percentage", 82, False)
+        assert [e.value for e in events if e.field == "missing_skills"] == ["Docker", 'Go, "Golang"']
+        assert parser.close()["improvement_suggestions"] == ["Add [metrics]"]
+    
+    def test_parser_waits_for_complete_numbers(self):
+        """Test that a number split across chunks is not emitted early."""
+        parser = IncrementalJSONParser()
+        assert parser.feed('{"match_percentage": 7') == []
+        assert parser.feed("5,") == [("match_percentage", 75, False)]
+    
+    def test_parse_llm_response_rejects_incomplete_json(self):
+        """Test that parse_llm_response still validates whole responses."""
+        assert parse_llm_response(self.RESPONSE)["match_percentage"] == 82
+        with pytest.raises(ValueError):
+            parse_llm_response('{"match_percentage": 82, "missing_skills": [')
+    
+    def test_stream_endpoint_sends_match_percentage_first(self):
+        """Test that the SSE stream starts with the match percentage."""
+        payload = {
+            "resume_text": "Senior Software Engineer with 10 years Python experience including FastAPI, Django, and microservices.",
+            "job_description_text": "Senior Python Developer needed with 5+ years experience. Required: FastAPI, AWS, Docker."
+        }
+        response = client.post("/api/v1/analyze/stream", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith("event: match_percentage\n")
+    
+    def test_stream_waits_for_quota_before_taking_a_slot(self):
+        """Test that a stream holds no concurrency slot while waiting for quota."""
+        async def scenario():
+            semaphore = asyncio.Semaphore(1)
+            slot_free_during_quota = []
+            
+            async def acquire(tokens, priority):
+                slot_free_during_quota.append(not semaphore.locked())
+            
+            async def create(**kwargs):
+                return self.FakeStream(['{"match_percentage": 70, ', '"missing_skills": [], "improvement_suggestions": []}'])
+            
+            backend = SimpleNamespace(
+                name="fake",
+                kind="openai",
+                model="fake-model",
+                configured=True,
+                semaphore=semaphore,
+                quota=SimpleNamespace(acquire=acquire, throttle=lambda: None),
+                client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))),
+                resilience=TestResilience.make_caller()
+            )
+            timings = start_request_timing()
+            events = [event async for event in stream_resume_vs_jd(self.RESUME, self.JD, backend)]
+            return events, [name for name, _ in timings], semaphore.locked(), slot_free_during_quota
+        
+        events, stages, slot_held, slot_free_during_quota = asyncio.run(scenario())
+        assert events[-1] == ("result", {"match_percentage": 70, "missing_skills": [], "improvement_suggestions": []})
+        assert slot_free_during_quota == [True]
+        assert stages.count("llm_queue_wait") == 1
+        assert not slot_held
+    
+    def test_disconnect_closes_upstream_stream(self):
+        """Test that a stream abandoned midway is closed and frees its slot."""
+        async def scenario():
+            semaphore = asyncio.Semaphore(1)
+            upstream = self.FakeStream(['{"match_percentage": 70, ', '"missing_skills": [', '"Go"]}'])
+            
+            async def create(**kwargs):
+                return upstream
+            
+            async def acquire(tokens, priority):
+                pass
+            
+            backend = SimpleNamespace(
+                name="fake",
+                kind="openai",
+                model="fake-model",
+                configured=True,
+                semaphore=semaphore,
+                quota=SimpleNamespace(acquire=acquire, throttle=lambda: None),
+                client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))),
+                resilience=TestResilience.make_caller()
+            )
+            events = stream_resume_vs_jd(self.RESUME, self.JD, backend)
+            first = await events.__anext__()
+            await events.aclose()
+            return first, upstream.closed, semaphore.locked()
+        
+        assert asyncio.run(scenario()) == (("match_percentage", 70), True, False)
+
+
+class TestSkillMatching:
+    """Test the local skill-matching engine."""
+    
+    def test_automaton_finds_overlapping_patterns(self):
+        """Test that every occurrence is reported in one pass."""
+        automaton = AhoCorasick(["he", "she", "hers"])
+        matches = sorted((start, automaton.patterns[index]) for start, index in automaton.iter_matches("ushers"))
+        assert matches == [(1, "she"), (2, "he"), (2, "hers")]
+    
+    def test_aliases_and_word_boundaries(self):
+        """Test alias mapping and that partial words do not match."""
+        taxonomy = SkillTaxonomy({
+            "Kubernetes": ["kubernetes", "k8s"],
+            "Java": ["java"],
+            "JavaScript": ["javascript"]
+        })
+        assert taxonomy.find_skills("Deployed on K8s using JavaScript") == ["Kubernetes", "JavaScript"]
+    
+    def test_skills_match_endpoint(self):
+        """Test the local skill matching endpoint."""
+        payload = {
+            "resume_text": "Backend engineer with Python, FastAPI and Docker experience across several products.",
+            "job_description_text": "Looking for Python and k8s experience; Terraform is a plus for this platform role."
+        }
+        response = client.post("/api/v1/skills/match", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["matched_skills"] == ["Python"]
+        assert data["missing_skills"] == ["Kubernetes", "Terraform"]
+
+
+class TestFastScoring:
+    """Test the LLM-free fast scorer."""
+    
+    RESUME = "Senior Software Engineer with 10 years Python experience including FastAPI, Django, and microservices. Expert in AWS and Docker."
+    
+    def test_vectors_are_normalized_and_stable(self):
+        """Test that embeddings are unit length and deterministic."""
+        vectors = vectorize([self.RESUME, self.RESUME, ""])
+        assert abs(float((vectors[0] ** 2).sum()) - 1.0) < 1e-5
+        assert (vectors[0] == vectors[1]).all()
+        assert not vectors[2].any()
+    
+    def test_relevant_jd_scores_higher(self):
+        """Test that a matching JD outranks an unrelated one."""
+        results = fast_analyze_batch([
+            (self.RESUME, "Python developer with FastAPI, AWS and Docker experience; Kubernetes is a plus."),
+            (self.RESUME, "Registered nurse for ICU night shifts, patient care, BLS certification and charting.")
+        ])
+        assert results[0]["match_percentage"] > results[1]["match_percentage"]
+        assert results[0]["missing_skills"] == ["Kubernetes"]
+    
+    def test_fast_batch_endpoint(self):
+        """Test fast mode on the batch endpoint."""
+        payload = {
+            "resume_text": self.RESUME,
+            "job_description_texts": ["Python developer with FastAPI, AWS and Docker experience; Kubernetes is a plus."] * 3,
+            "mode": "fast"
+        }
+        response = client.post("/api/v1/analyze/batch", json=payload)
+        assert response.status_code == 200
+        assert response.json()["succeeded"] == 3
+
+
+class TestMatchIndex:
+    """Test the persisted top-k matching index."""
+    
+    def test_search_add_delete_and_reload(self, tmp_path):
+        """Test incremental updates and that they survive a reload."""
+        index = VectorIndex("jobs", str(tmp_path), dim=512)
+        index.load()
+        index.add("python", "Python developer with FastAPI, AWS and Docker experience")
+        index.add("nurse", "Registered nurse for ICU night shifts and patient care")
+        index.compact()
+        index.add("java", "Java engineer with Spring Boot and Kafka microservices")
+        index.delete("nurse")
+        
+        hits = index.search("Senior Python engineer, FastAPI and Docker", k=2)
+        assert hits[0][0] == "python"
+        assert "nurse" not in [item_id for item_id, _ in hits]
+        
+        reloaded = VectorIndex("jobs", str(tmp_path), dim=512)
+        reloaded.load()
+        assert len(reloaded) == 2
+        assert reloaded.search("Senior Python engineer, FastAPI and Docker", k=1) == hits[:1]
+    
+    def test_dimension_change_rebuild_is_persisted(self, tmp_path):
+        """Test that vectors rebuilt for a new dimension are compacted to disk."""
+        index = VectorIndex("jobs", str(tmp_path), dim=512)
+        index.load()
+        index.add("python", "Python developer with FastAPI, AWS and Docker experience")
+        index.compact()
+        index.add("java", "Java engineer with Spring Boot and Kafka microservices")
+        
+        resized = VectorIndex("jobs", str(tmp_path), dim=256)
+        resized.load()
+        assert len(resized) == 2
+        assert resized.stats()["compacted_rows"] == 2
+        assert resized.stats()["log_entries"] == 0
+        
+        reloaded = VectorIndex("jobs", str(tmp_path), dim=256)
+        reloaded.load()
+        assert reloaded.stats()["compacted_rows"] == 2
+        assert reloaded.search("Python FastAPI developer", k=1)[0][0] == "python"
+    
+    def test_crash_during_compaction_keeps_consistent_pair(self, tmp_path, monkeypatch):
+        """Test that a compaction interrupted before the manifest swap leaves the old pair usable."""
+        index = VectorIndex("jobs", str(tmp_path), dim=512)
+        index.load()
+        index.add("python", "Python developer with FastAPI, AWS and Docker experience")
+        index.compact()
+        index.add("java", "Java engineer with Spring Boot and Kafka microservices")
+        index.delete("python")
+        
+        def crash(source, target):
+            raise OSError("simulated crash")
+        
+        monkeypatch.setattr(os, "replace", crash)
+        with pytest.raises(OSError):
+            index.compact()
+        monkeypatch.undo()
+        
+        reloaded = VectorIndex("jobs", str(tmp_path), dim=512)
+        reloaded.load()
+        assert len(reloaded) == 1
+        assert reloaded.search("Java Spring Boot Kafka", k=2)[0][0] == "java"
+        assert sorted(name for name in os.listdir(tmp_path) if name.endswith(".npy")) == ["jobs.1.npy"]
+    
+    def test_manifest_not_matching_matrix_is_rebuilt(self, tmp_path):
+        """Test that a matrix whose rows do not match the stored ids is rebuilt from texts."""
+        index = VectorIndex("jobs", str(tmp_path), dim=512)
+        index.load()
+        index.add("python", "Python developer with FastAPI, AWS and Docker experience")
+        index.compact()
+        
+        manifest_path = tmp_path / "jobs.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["ids"].append("java")
+        manifest["texts"]["java"] = "Java engineer with Spring Boot and Kafka microservices"
+        manifest_path.write_text(json.dumps(manifest))
+        
+        reloaded = VectorIndex("jobs", str(tmp_path), dim=512)
+        reloaded.load()
+        assert reloaded.stats()["compacted_rows"] == 2
+        assert reloaded.search("Java Spring Boot Kafka", k=1)[0][0] == "java"
+    
+    def test_rerank_skips_candidates_deleted_after_search(self, monkeypatch):
+        """Test that a candidate deleted between search and re-ranking is dropped."""
+        class RacingIndex:
+            def search(self, text, k):
+                return [("kept", 0.9), ("deleted", 0.8)]
+            
+            def get_text(self, item_id):
+                return "Python developer with FastAPI, AWS and Docker experience" if item_id == "kept" else None
+        
+        analyzed = []
+        
+        async def fake_batch(pairs):
+            analyzed.extend(pairs)
+            return [({"match_percentage": 80, "missing_skills": [], "improvement_suggestions": []}, False) for _ in pairs]
+        
+        monkeypatch.setattr(matching, "get_match_index", lambda kind: RacingIndex())
+        monkeypatch.setattr(matching, "run_batch_analysis", fake_batch)
+        response = client.post("/api/v1/match/jobs", json={
+            "text": "Senior Python engineer with FastAPI and Docker experience across many years.",
+            "rerank": True
+        })
+        assert response.status_code == 200
+        assert [c["item_id"] for c in response.json()["candidates"]] == ["kept"]
+        assert [jd for _, jd in analyzed] == ["Python developer with FastAPI, AWS and Docker experience"]
+
+
+class TestStatisticsRollups:
+    """Test time-bucketed rollups."""
+    
+    def _stored_buckets(self, documents, granularity):
+        """Apply increments the way MongoDB's $inc would."""
+        buckets = {}
+        for key, (bucket_granularity, start, inc) in build_bucket_increments(documents).items():
+            if bucket_granularity != granularity:
+                continue
+            bucket = buckets.setdefault(key, {"bucket_start": start, "count": 0, "sum_match": 0, "scores": {}})
+            for field, value in inc.items():
+                if field.startswith("scores."):
+                    score = field.split(".")[1]
+                    bucket["scores"][score] = bucket["scores"].get(score, 0) + value
+                else:
+                    bucket[field] += value
+        return sorted(buckets.values(), key=lambda bucket: bucket["bucket_start"])
+    
+    def test_one_update_per_bucket(self):
+        """Test that documents in the same hour share one bucket update."""
+        documents = [
+            {"match_percentage": 40, "created_at": datetime(2026, 1, 28, 10, 5)},
+            {"match_percentage": 80, "created_at": datetime(2026, 1, 28, 10, 55)},
+            {"match_percentage": 60, "created_at": datetime(2026, 1, 28, 11, 0)}
+        ]
+        increments = build_bucket_increments(documents)
+        assert len(increments) == 3  # two hours and one day
+        assert increments["day:2026-01-28T00:00:00"][2]["count"] == 3
+    
+    def test_summary_percentiles_and_histogram(self):
+        """Test merged distribution statistics over hourly buckets."""
+        documents = [
+            {"match_percentage": score, "created_at": datetime(2026, 1, 28, hour)}
+            for hour, score in enumerate([10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+        ]
+        summary = summarize_buckets(self._stored_buckets(documents, "hour"), bin_width=50)
+        assert summary["total_analyses"] == 10
+        assert summary["percentiles"]["p50"] == 50
+        assert summary["percentiles"]["p90"] == 90
+        assert [b["count"] for b in summary["histogram"]] == [4, 6]
+        assert len(summary["series"]) == 10
+
+
+
+class TestStatisticsReconciliation:
+    """Test rebuilding the running statistics summary."""
+    
+    class FakeStatsCollection:
+        """Summary collection honouring the version filter of replace_one."""
+        
+        def __init__(self, summary=None):
+            self.summary = summary
+        
+        async def find_one(self, query, projection=None):
+            return dict(self.summary) if self.summary else None
+        
+        async def insert_one(self, document):
+            if self.summary is not None:
+                raise database.DuplicateKeyError("duplicate")
+            self.summary = document
+        
+        async def replace_one(self, query, document):
+            if self.summary is None or self.summary.get("version") != query["version"]:
+                return SimpleNamespace(matched_count=0)
+            self.summary = {"_id": query["_id"], **document}
+            return SimpleNamespace(matched_count=1)
+    
+    def make_analyses(self, stats, during_aggregate=None):
+        """Analyses collection whose aggregation returns stats and may run a concurrent update."""
+        calls = []
+        
+        class Aggregation:
+            async def to_list(self, length):
+                calls.append(1)
+                if during_aggregate and len(calls) == 1:
+                    during_aggregate()
+                return [stats]
+        
+        return SimpleNamespace(aggregate=lambda pipeline: Aggregation()), calls
+    
+    def test_counter_update_during_aggregation_is_not_lost(self, monkeypatch):
+        """Test that a summary changed mid-aggregation is recomputed instead of overwritten."""
+        collection = self.FakeStatsCollection({"_id": database.STATS_SUMMARY_ID, "count": 10, "sum_match": 500, "version": 4})
+        
+        def concurrent_insert():
+            collection.summary = {**collection.summary, "count": 11, "sum_match": 560, "version": 5}
+        
+        analyses, calls = self.make_analyses(
+            {"count": 11, "sum_match": 560, "min_match": 20, "max_match": 90}, concurrent_insert
+        )
+        monkeypatch.setattr(database, "stats_collection", collection)
+        monkeypatch.setattr(database, "analyses_collection", analyses)
+        
+        summary = asyncio.run(database.reconcile_statistics())
+        assert len(calls) == 2
+        assert summary["count"] == 11
+        assert collection.summary["version"] == 6
+    
+    def test_missing_summary_is_built_at_startup(self, monkeypatch):
+        """Test that startup builds a missing summary from all existing analyses."""
+        collection = self.FakeStatsCollection()
+        analyses, calls = self.make_analyses({"count": 250, "sum_match": 15000, "min_match": 5, "max_match": 99})
+        monkeypatch.setattr(database, "stats_collection", collection)
+        monkeypatch.setattr(database, "analyses_collection", analyses)
+        
+        asyncio.run(database.reconcile_statistics_if_missing())
+        assert collection.summary["count"] == 250
+        
+        asyncio.run(database.reconcile_statistics_if_missing())
+        assert len(calls) == 1
+
+
 class TestDataRetrieval:
     """Test data retrieval endpoints."""
     
@@ -88,6 +571,16 @@ class TestDataRetrieval:
         assert "count" in data
         assert "analyses" in data
     
+    def test_page_cursor_round_trip(self):
+        """Test that history cursors decode to the encoded position."""
+        position = (datetime(2026, 1, 28, 10, 30, 0, 123000), ObjectId())
+        assert decode_page_cursor(encode_page_cursor(*position)) == position
+    
+    def test_get_analyses_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/api/v1/analyses?cursor=not-a-cursor")
+        assert response.status_code == 400
+    
     def test_get_invalid_analysis_id(self):
         """Test retrieving non-existent analysis."""
         response = client.get("/api/v1/analyses/invalid_id")
@@ -95,5 +588,1192 @@ class TestDataRetrieval:
         assert response.status_code in [400, 404]
 
 
+
+class TestAnalysisCache:
+    """Test the content-addressed analysis cache."""
+    
+    def test_cache_key_ignores_whitespace(self):
+        """Test that cosmetic whitespace changes map to the same key."""
+        key_a = make_cache_key("Python  developer\n", "FastAPI role", "gpt-3.5-turbo", "v1")
+        key_b = make_cache_key("Python developer", " FastAPI   role", "gpt-3.5-turbo", "v1")
+        assert key_a == key_b
+        assert key_a != make_cache_key("Python developer", "FastAPI role", "gpt-4", "v1")
+    
+    def test_lru_eviction_and_ttl(self):
+        """Test size-based and TTL-based eviction."""
+        cache = LRUCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        
+        expired = LRUCache(max_entries=2, ttl_seconds=-1)
+        expired.set("a", 1)
+        assert expired.get("a") is None
+    
+    def test_cache_stats_endpoint(self):
+        """Test cache statistics endpoint."""
+        response = client.get("/api/v1/cache/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert "memory_hits" in data
+        assert "misses" in data
+    
+    def test_mongo_tier_lookup_does_not_error(self):
+        """Test that a miss falls through to the MongoDB tier without counting an error."""
+        errors = cache_counters["errors"]
+        result = asyncio.run(get_cached_result(make_cache_key("unseen resume", "unseen jd", "gpt-3.5-turbo", "v1")))
+        assert result is None
+        assert cache_counters["errors"] == errors
+
+
+
+class TestSingleFlight:
+    """Test coalescing of identical in-flight calls."""
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Test that concurrent callers receive one shared result."""
+        async def scenario():
+            flight = SingleFlight()
+            calls = []
+            
+            async def work():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return 42
+            
+            results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+            return results, calls, flight.stats()
+        
+        results, calls, stats = asyncio.run(scenario())
+        assert results == [42] * 5
+        assert len(calls) == 1
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+    
+    def test_failure_propagates_to_all_callers(self):
+        """Test that an exception reaches every waiting caller."""
+        async def scenario():
+            flight = SingleFlight()
+            
+            async def work():
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+            
+            return await asyncio.gather(
+                flight.do("key", work), flight.do("key", work), return_exceptions=True
+            )
+        
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+    
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test that one caller leaving keeps the shared call alive."""
+        async def scenario():
+            flight = SingleFlight()
+            
+            async def work():
+                await asyncio.sleep(0.05)
+                return "done"
+            
+            first = asyncio.ensure_future(flight.do("key", work))
+            second = asyncio.ensure_future(flight.do("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second, first.cancelled()
+        
+        assert asyncio.run(scenario()) == ("done", True)
+    
+    def test_caller_after_last_leaves_starts_fresh_call(self):
+        """Test that a caller arriving while an abandoned call winds down is not cancelled."""
+        async def scenario():
+            flight = SingleFlight()
+            
+            async def work():
+                try:
+                    await asyncio.sleep(0.05)
+                except asyncio.CancelledError:
+                    # Slow cleanup keeps the cancelled task pending for a while
+                    await asyncio.sleep(0.02)
+                    raise
+                return "done"
+            
+            first = asyncio.ensure_future(flight.do("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            await asyncio.sleep(0.005)
+            return await flight.do("key", work), flight.stats()
+        
+        result, stats = asyncio.run(scenario())
+        assert result == "done"
+        assert stats["executions"] == 2
+
+
+
+class TestWriteBehind:
+    """Test batched write-behind persistence"""
+    
+    def test_flushes_in_batches_and_drains_on_stop(self):
+        """Test that documents are batched by size and the rest flushed on stop."""
+        async def scenario():
+            batches = []
+            
+            async def flush(documents):
+                batches.append([d["_id"] for d in documents])
+            
+            queue = WriteBehindQueue(flush, max_batch=3, flush_interval=10)
+            queue.start()
+            for i in range(7):
+                await queue.put({"_id": ObjectId(), "n": i})
+            pending_before = queue.stats()["pending"]
+            await queue.stop()
+            return batches, pending_before, queue.stats()
+        
+        batches, pending_before, stats = asyncio.run(scenario())
+        assert [len(b) for b in batches] == [3, 3, 1]
+        assert pending_before > 0
+        assert stats["flushed"] == 7
+        assert stats["pending"] == 0
+    
+    def test_pending_documents_are_readable(self):
+        """Test that a queued document can be read before it is flushed."""
+        async def scenario():
+            async def flush(documents):
+                pass
+            
+            queue = WriteBehindQueue(flush, max_batch=10, flush_interval=10)
+            queue.start()
+            document = {"_id": ObjectId(), "match_percentage": 80}
+            await queue.put(document)
+            found = queue.get_pending(str(document["_id"]))
+            await queue.stop()
+            return found, queue.get_pending(str(document["_id"]))
+        
+        found, after = asyncio.run(scenario())
+        assert found["match_percentage"] == 80
+        assert after is None
+    
+    def test_full_backlog_applies_backpressure(self):
+        """Test that put() waits while the backlog is full."""
+        async def scenario():
+            release = asyncio.Event()
+            
+            async def flush(documents):
+                await release.wait()
+            
+            queue = WriteBehindQueue(flush, max_batch=1, flush_interval=0.01, max_backlog=1)
+            queue.start()
+            await queue.put({"_id": ObjectId()})  # taken by the flusher
+            await queue.put({"_id": ObjectId()})  # fills the backlog
+            blocked = asyncio.ensure_future(queue.put({"_id": ObjectId()}))
+            await asyncio.sleep(0.05)
+            was_blocked = not blocked.done()
+            release.set()
+            await blocked
+            await queue.stop()
+            return was_blocked, queue.stats()["flushed"]
+        
+        assert asyncio.run(scenario()) == (True, 3)
+
+
+
+class TestQuotaScheduler:
+    """Test token-bucket scheduling of LLM calls"""
+    
+    def test_interactive_calls_go_before_batch(self):
+        """Test that queued interactive calls are granted before earlier batch calls."""
+        async def scenario():
+            # 600 requests/minute with a 0.1s burst: one call every 0.1s
+            scheduler = QuotaScheduler(requests_per_minute=600, tokens_per_minute=0, burst_seconds=0.1)
+            order = []
+            
+            async def call(name, priority):
+                await scheduler.acquire(10, priority)
+                order.append(name)
+            
+            await scheduler.acquire(10, "batch")  # spends the burst
+            tasks = [asyncio.ensure_future(call(f"batch{i}", "batch")) for i in range(2)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(call("interactive", "interactive")))
+            await asyncio.gather(*tasks)
+            return order
+        
+        assert asyncio.run(scenario())[0] == "interactive"
+    
+    def test_token_budget_limits_throughput(self):
+        """Test that calls wait for the token bucket to refill."""
+        async def scenario():
+            # 6000 tokens/minute = 100 tokens/s, burst of 100 tokens
+            scheduler = QuotaScheduler(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for _ in range(3):
+                await scheduler.acquire(50)
+            return loop.time() - started
+        
+        elapsed = asyncio.run(scenario())
+        assert 0.4 <= elapsed < 1.0
+    
+    def test_rejects_when_wait_exceeds_limit(self):
+        """Test that a call is rejected instead of queueing indefinitely."""
+        async def scenario():
+            scheduler = QuotaScheduler(requests_per_minute=1, tokens_per_minute=0, burst_seconds=1, max_wait=0.05)
+            await scheduler.acquire(1)
+            with pytest.raises(RateLimitExceeded):
+                await scheduler.acquire(1)
+            return scheduler.stats()
+        
+        stats = asyncio.run(scenario())
+        assert stats["granted"] == 1
+        assert stats["rejected"] == 1
+
+
+
+class TestResilience:
+    """Test retries, circuit breaking and hedging of LLM calls"""
+    
+    @staticmethod
+    def make_caller(**kwargs):
+        breaker = CircuitBreaker(failure_threshold=kwargs.pop("failure_threshold", 5), recovery_timeout=60)
+        return ResilientCaller(
+            breaker=breaker,
+            is_retryable=lambda e: isinstance(e, asyncio.TimeoutError),
+            base_delay=0.001,
+            max_delay=0.01,
+            **kwargs
+        )
+    
+    def test_retries_retryable_errors(self):
+        """Test that a transient failure is retried and then succeeds."""
+        caller = self.make_caller(max_retries=2)
+        attempts = []
+        
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise asyncio.TimeoutError()
+            return "ok"
+        
+        assert asyncio.run(caller.call(flaky)) == "ok"
+        assert caller.counters["retries"] == 2
+        assert caller.breaker.state == "closed"
+    
+    def test_non_retryable_errors_are_not_retried(self):
+        """Test that a non-retryable error is raised on the first attempt."""
+        caller = self.make_caller(max_retries=2)
+        
+        async def bad_request():
+            raise ValueError("bad")
+        
+        with pytest.raises(ValueError):
+            asyncio.run(caller.call(bad_request))
+        assert caller.counters["attempts"] == 1
+    
+    def test_circuit_opens_and_fails_fast(self):
+        """Test that repeated failures open the circuit and later calls are short-circuited."""
+        caller = self.make_caller(max_retries=0, failure_threshold=2)
+        
+        async def down():
+            raise asyncio.TimeoutError()
+        
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                asyncio.run(caller.call(down))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(caller.call(down))
+        
+        stats = caller.stats()
+        assert stats["circuit"]["state"] == "open"
+        assert stats["circuit"]["transitions"] == {"closed->open": 1}
+        assert stats["short_circuited"] == 1
+    
+    def test_half_open_probe_closes_circuit(self):
+        """Test that a successful probe after the recovery timeout closes the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        assert breaker.allow()  # probe
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+    
+    def test_hedged_request_wins_over_slow_call(self):
+        """Test that a hedge is sent after the p95 delay and the fastest answer is used."""
+        caller = self.make_caller(hedge_enabled=True, hedge_min_samples=1)
+        caller.latency.record(0.01)
+        calls = []
+        
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+            return len(calls)
+        
+        assert asyncio.run(caller.call(call)) == 2
+        assert caller.counters["hedges"] == 1
+        assert caller.counters["hedges_won"] == 1
+    
+    def test_latency_excludes_queueing(self):
+        """Test that only the provider request inside timed() feeds the hedge delay."""
+        caller = self.make_caller()
+        
+        async def call():
+            await asyncio.sleep(0.2)  # waiting for quota and a slot
+            return await caller.timed(asyncio.sleep(0.01, result="ok"))
+        
+        assert asyncio.run(caller.call(call)) == "ok"
+        assert len(caller.latency.samples) == 1
+        assert caller.latency.samples[0] < 0.1
+    
+    def test_cancel_before_hedge_cancels_primary(self):
+        """Test that cancelling the caller before the hedge delay also cancels the request."""
+        caller = self.make_caller(hedge_enabled=True, hedge_min_samples=1)
+        caller.latency.record(0.5)
+        
+        async def scenario():
+            started = asyncio.Event()
+            cancelled = []
+            
+            async def call():
+                started.set()
+                try:
+                    await asyncio.sleep(1.0)
+                except asyncio.CancelledError:
+                    cancelled.append(1)
+                    raise
+            
+            outer = asyncio.ensure_future(caller.call(call))
+            await started.wait()
+            outer.cancel()
+            await asyncio.sleep(0.01)
+            # Copied before asyncio.run cancels any task still left running
+            return list(cancelled)
+        
+        assert asyncio.run(scenario()) == [1]
+
+
+
+class TestAsyncJobs:
+    """Test asynchronous job mode"""
+    
+    RESUME = "Senior Software Engineer with 10 years Python experience including FastAPI, Django, and microservices."
+    JD = "Senior Python Developer needed with 5+ years experience. Required: FastAPI, AWS, Docker."
+    
+    def test_async_requires_llm_mode(self):
+        """Test that async mode is rejected for fast scoring."""
+        payload = {"resume_text": self.RESUME, "job_description_text": self.JD}
+        response = client.post("/api/v1/analyze?async=true&mode=fast", json=payload)
+        assert response.status_code == 400
+    
+    def test_serialize_finished_job(self):
+        """Test the job status representation used for polling and callbacks."""
+        job = {
+            "_id": ObjectId(),
+            "status": "succeeded",
+            "attempts": 1,
+            "created_at": datetime(2024, 1, 1, 12, 0),
+            "updated_at": datetime(2024, 1, 1, 12, 1),
+            "completed_at": datetime(2024, 1, 1, 12, 1),
+            "result": {"match_percentage": 80, "missing_skills": [], "improvement_suggestions": [], "cached": False},
+            "analysis_id": "abc"
+        }
+        data = job_queue.serialize_job(job)
+        assert data["job_id"] == str(job["_id"])
+        assert data["result"]["analysis_id"] == "abc"
+        assert data["completed_at"] == "2024-01-01T12:01:00"
+    
+    def test_transient_failure_requeues_job(self, monkeypatch):
+        """Test that a job hitting a transient error is released for a retry."""
+        released = []
+        
+        async def failing_analysis(*args, **kwargs):
+            raise RuntimeError("upstream down")
+        
+        async def release_job(job_id, worker_id, delay=0):
+            released.append((job_id, delay))
+        
+        monkeypatch.setattr(job_queue, "run_analysis", failing_analysis)
+        monkeypatch.setattr(job_queue.database, "release_job", release_job)
+        
+        job = {"_id": ObjectId(), "attempts": 1, "resume_text": self.RESUME, "job_description_text": self.JD}
+        asyncio.run(job_queue.process_job(job, "worker-0"))
+        assert released == [(job["_id"], job_queue.JOB_RETRY_DELAY)]
+    
+    def test_invalid_llm_response_requeues_job(self, monkeypatch):
+        """Test that an invalid model answer is retried instead of failing the job."""
+        released = []
+        
+        async def invalid_answer(*args, **kwargs):
+            raise InvalidLLMResponse("Invalid JSON response from LLM")
+        
+        async def release_job(job_id, worker_id, delay=0):
+            released.append(job_id)
+        
+        monkeypatch.setattr(job_queue, "run_analysis", invalid_answer)
+        monkeypatch.setattr(job_queue.database, "release_job", release_job)
+        
+        job = {"_id": ObjectId(), "attempts": 1, "resume_text": self.RESUME, "job_description_text": self.JD}
+        asyncio.run(job_queue.process_job(job, "worker-0"))
+        assert released == [job["_id"]]
+    
+    @pytest.mark.parametrize("url", [
+        "ftp://example.com/hook",
+        "http://127.0.0.1:8000/hook",
+        "http://localhost/hook",
+        "http://10.0.0.5/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hook"
+    ])
+    def test_callback_url_rejects_internal_targets(self, url):
+        """Test that callbacks cannot be pointed at internal addresses."""
+        with pytest.raises(ValueError):
+            asyncio.run(job_queue.validate_callback_url(url))
+    
+    def test_callback_url_allowlist(self, monkeypatch):
+        """Test that a configured allowlist replaces the address check."""
+        monkeypatch.setattr(job_queue, "JOB_CALLBACK_ALLOWED_HOSTS", {"hooks.internal"})
+        asyncio.run(job_queue.validate_callback_url("https://hooks.internal/done"))
+        with pytest.raises(ValueError):
+            asyncio.run(job_queue.validate_callback_url("https://example.com/done"))
+    
+    def test_callback_connects_to_checked_address(self, monkeypatch):
+        """Test that delivery connects to the validated address, not a fresh DNS answer."""
+        answers = iter(["93.184.216.34", "127.0.0.1"])
+        requests = []
+        statuses = []
+        
+        async def getaddrinfo(host, port, type):
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (next(answers), port or 443))]
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200)
+        
+        real_client = httpx.AsyncClient
+        
+        async def set_status(job_id, callback_status):
+            statuses.append(callback_status)
+        
+        monkeypatch.setattr(job_queue.httpx, "AsyncClient", lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs))
+        monkeypatch.setattr(job_queue.database, "set_job_callback_status", set_status)
+        
+        async def scenario():
+            monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+            await job_queue.deliver_callback({
+                "_id": ObjectId(), "status": "succeeded", "callback_url": "https://hooks.example.com/done"
+            })
+        
+        asyncio.run(scenario())
+        assert statuses == ["delivered"]
+        assert requests[0].url.host == "93.184.216.34"
+        assert requests[0].headers["host"] == "hooks.example.com"
+        assert requests[0].extensions["sni_hostname"] == "hooks.example.com"
+    
+    def test_async_rejects_loopback_callback(self):
+        """Test that an async request with a loopback callback fails with 400."""
+        payload = {"resume_text": self.RESUME, "job_description_text": self.JD, "callback_url": "http://127.0.0.1:9000/hook"}
+        response = client.post("/api/v1/analyze?async=true", json=payload)
+        assert response.status_code == 400
+
+
+class TestMetrics:
+    """Tests for Prometheus metrics and Server-Timing headers"""
+    
+    def test_metrics_endpoint(self):
+        """Test that /metrics exposes stage histograms and service counters."""
+        client.get("/health")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "checknnext_stage_duration_seconds" in body
+        assert 'checknnext_http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert "checknnext_cache_events_total" in body
+        assert "checknnext_llm_circuit_state" in body
+    
+    def test_server_timing_header(self):
+        """Test that responses report stage durations in Server-Timing."""
+        payload = {
+            "resume_text": "Python developer with FastAPI, Docker and AWS experience. " * 3,
+            "job_description_text": "Looking for a Python engineer who knows FastAPI, Kubernetes and AWS. " * 3
+        }
+        response = client.post("/api/v1/skills/match", json=payload)
+        assert "total;dur=" in response.headers["server-timing"]
+        assert "x-process-time" in response.headers
+    
+    def test_format_server_timing_sums_repeated_stages(self):
+        """Test that repeated stages are summed into one entry."""
+        header = format_server_timing([("llm_call", 0.5), ("cache_lookup", 0.001), ("llm_call", 0.25)], 0.8)
+        assert header == "llm_call;dur=750.0, cache_lookup;dur=1.0, total;dur=800.0"
+    
+    def test_stage_records_into_request_timings(self):
+        """Test that stage() appends to the timings of the current request."""
+        timings = start_request_timing()
+        with stage("validation"):
+            pass
+        assert [name for name, _ in timings] == ["validation"]
+
+
+class TestLLMBackends:
+    """Tests for LLM backend selection and routing"""
+    
+    PAYLOAD = {
+        "resume_text": "Python developer with FastAPI, Docker and AWS experience. " * 3,
+        "job_description_text": "Looking for a Python engineer who knows FastAPI, Kubernetes and AWS. " * 3
+    }
+    
+    def test_parse_backend_routes(self):
+        """Test parsing per-priority routing rules."""
+        assert parse_backend_routes("batch=local, interactive=openai") == {"batch": "local", "interactive": "openai"}
+        assert parse_backend_routes("") == {}
+        with pytest.raises(ValueError):
+            parse_backend_routes("bulk=local")
+    
+    def test_select_backend(self):
+        """Test that an explicit backend wins and unknown backends are rejected."""
+        assert select_backend("stub").name == "stub"
+        assert select_backend(None).name == "openai"
+        with pytest.raises(ValueError):
+            select_backend("missing")
+    
+    def test_unknown_backend_rejected(self):
+        """Test that analyses naming an unknown backend fail with 400."""
+        payload = {**self.PAYLOAD, "backend": "missing"}
+        assert client.post("/api/v1/analyze", json=payload).status_code == 400
+        assert client.post("/api/v1/analyze/stream", json=payload).status_code == 400
+    
+    def test_stub_backend_is_deterministic(self):
+        """Test that the stub backend answers offline with local skill matching."""
+        stub = select_backend("stub")
+        first = asyncio.run(analyze_resume_vs_jd(self.PAYLOAD["resume_text"], self.PAYLOAD["job_description_text"], backend=stub))
+        second = asyncio.run(analyze_resume_vs_jd(self.PAYLOAD["resume_text"], self.PAYLOAD["job_description_text"], backend=stub))
+        assert first == second
+        assert "Kubernetes" in first["missing_skills"]
+    
+    def test_list_backends(self):
+        """Test listing the configured backends."""
+        response = client.get("/api/v1/llm/backends")
+        assert response.status_code == 200
+        names = [backend["name"] for backend in response.json()["backends"]]
+        assert "openai" in names and "stub" in names
+
+
+class TestJDProfiles:
+    """Tests for cached JD requirement profiles"""
+    
+    PROFILE = {
+        "title": "Backend Engineer",
+        "seniority": "senior",
+        "domain": "fintech",
+        "min_years_experience": 5,
+        "required_skills": ["Python", "Kubernetes"],
+        "nice_to_have_skills": ["Kafka"],
+        "responsibilities": ["Build payment APIs"]
+    }
+    
+    def test_validate_jd_profile(self):
+        """Test that profiles are normalized and invalid ones rejected."""
+        profile = validate_jd_profile({"required_skills": ["Python"], "nice_to_have_skills": [], "min_years_experience": "5"})
+        assert profile["min_years_experience"] is None
+        assert profile["seniority"] == ""
+        with pytest.raises(ValueError):
+            validate_jd_profile({"required_skills": "Python"})
+    
+    def test_prompt_uses_profile_instead_of_jd(self):
+        """Test that the analysis prompt sends the profile, not the full JD."""
+        prompt = create_analysis_prompt("Python developer resume", "FULL JD TEXT with benefits", self.PROFILE)
+        assert "FULL JD TEXT" not in prompt
+        assert "Required skills: Python, Kubernetes" in prompt
+        assert "Minimum experience: 5 years" in prompt
+    
+    def test_profile_extracted_once_per_jd(self, monkeypatch):
+        """Test that concurrent and later analyses of one JD share one extraction."""
+        calls = []
+        
+        async def fake_extract(job_description_text, backend, priority="interactive"):
+            calls.append(job_description_text)
+            await asyncio.sleep(0.01)
+            return dict(self.PROFILE)
+        
+        monkeypatch.setattr(profiles, "JD_PROFILE_ENABLED", True)
+        monkeypatch.setattr(profiles, "extract_jd_profile", fake_extract)
+        backend = SimpleNamespace(configured=True, cache_namespace="test:model", context_tokens=0)
+        jd = "Senior backend engineer for our payments platform. " * 20
+        
+        async def run():
+            first = await asyncio.gather(*[profiles.get_jd_profile(jd, backend) for _ in range(5)])
+            second = await profiles.get_jd_profile(jd, backend)
+            short = await profiles.get_jd_profile("Short JD for a Python developer role, remote friendly.", backend)
+            return first, second, short
+        
+        first, second, short = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(profile["required_skills"] == ["Python", "Kubernetes"] for profile in first)
+        assert second == first[0]
+        assert short is None
+    
+    def test_profiles_off_by_default(self):
+        """Test that profiles cost no extraction calls unless enabled."""
+        backend = SimpleNamespace(configured=True, cache_namespace="test:model", context_tokens=16385)
+        assert not profiles.uses_jd_profile("Senior backend engineer for our payments platform. " * 20, backend)
+    
+    def test_failed_extraction_cached_without_profile_version(self, monkeypatch):
+        """Test that a result scored without a profile is not cached under the profile version."""
+        stored = []
+        
+        async def failing_extract(job_description_text, backend, priority="interactive"):
+            raise Exception("extraction failed")
+        
+        async def fake_analyze(resume_text, job_description_text, priority, backend, jd_profile=None, resume_profile=None):
+            return {"match_percentage": 80, "missing_skills": [], "improvement_suggestions": []}
+        
+        async def store(cache_key, result):
+            stored.append(cache_key)
+        
+        backend = SimpleNamespace(name="fake", configured=True, cache_namespace="test:model", context_tokens=16385)
+        monkeypatch.setattr(profiles, "JD_PROFILE_ENABLED", True)
+        monkeypatch.setattr(analysis_service, "JD_PROFILE_ENABLED", True)
+        monkeypatch.setattr(analysis_service, "NEAR_DUPLICATE_ENABLED", False)
+        monkeypatch.setattr(profiles, "extract_jd_profile", failing_extract)
+        monkeypatch.setattr(analysis_service, "select_backend", lambda name, priority: backend)
+        monkeypatch.setattr(analysis_service, "analyze_resume_vs_jd", fake_analyze)
+        monkeypatch.setattr(analysis_service, "store_cached_result", store)
+        resume = "Senior engineer, six years of Python and payments work on AWS and Kubernetes."
+        jd = "Senior backend engineer for our payments platform, Python and Kubernetes. " * 20
+        
+        asyncio.run(analysis_service.run_analysis(resume, jd))
+        expected = analysis_service.expected_prompt_version(resume, jd, backend)
+        assert "+jd-profile-" in expected
+        assert stored == [make_cache_key(resume, jd, backend.cache_namespace, analysis_service.analysis_prompt_version(backend))]
+
+
+class TestResumeProfiles:
+    """Tests for cached structured resume profiles"""
+    
+    PROFILE = {
+        "current_title": "Senior Engineer",
+        "titles": ["Engineer"],
+        "total_years_experience": 7,
+        "domains": ["fintech"],
+        "skills": [{"name": "Python", "years": 6}, {"name": "k8s", "years": 2.5}, {"name": "Go", "years": None}],
+        "education": "BSc Computer Science",
+        "highlights": ["Cut p99 latency by 40%"]
+    }
+    
+    def test_validate_resume_profile(self):
+        """Test that skills are normalized and invalid profiles rejected."""
+        profile = validate_resume_profile({"skills": ["Python", {"name": "AWS", "years": "3"}, {"years": 2}]})
+        assert profile["skills"] == [{"name": "Python", "years": None}, {"name": "AWS", "years": None}]
+        assert profile["total_years_experience"] is None
+        with pytest.raises(ValueError):
+            validate_resume_profile({"skills": "Python, AWS"})
+    
+    def test_prescreen_canonicalizes_profile_skills(self):
+        """Test that profile skills are matched to JD skills through the taxonomy."""
+        prescreen = prescreen_resume_profile(self.PROFILE, "We need Python and Kubernetes on AWS.")
+        assert prescreen["matched_skills"] == [("Python", 6), ("Kubernetes", 2.5)]
+        assert prescreen["missing_skills"] == ["AWS"]
+    
+    def test_prompt_uses_profile_instead_of_resume(self):
+        """Test that the analysis prompt sends the profile and pre-screen, not the full resume."""
+        prompt = create_analysis_prompt("FULL RESUME TEXT", "We need Python and AWS.", resume_profile=self.PROFILE)
+        assert "FULL RESUME TEXT" not in prompt
+        assert "Skills: Python (6y), k8s (2.5y), Go" in prompt
+        assert "JD skills found in profile: Python (6y); not found: AWS" in prompt
+    
+    def test_profile_reused_until_resume_changes(self, monkeypatch):
+        """Test that a resume is parsed once and re-parsed when its text changes."""
+        calls = []
+        
+        async def fake_extract(resume_text, backend, priority="interactive"):
+            calls.append(resume_text)
+            return dict(self.PROFILE)
+        
+        monkeypatch.setattr(profiles, "RESUME_PROFILE_ENABLED", True)
+        monkeypatch.setattr(profiles, "extract_resume_profile", fake_extract)
+        backend = SimpleNamespace(configured=True, cache_namespace="test:model", context_tokens=0)
+        resume = "Senior engineer, six years of Python and payments work. " * 40
+        
+        async def run():
+            for _ in range(3):
+                await profiles.get_resume_profile(resume, backend)
+            await profiles.get_resume_profile(resume + " Now also leads the platform team.", backend)
+        
+        asyncio.run(run())
+        assert len(calls) == 2
+    
+    def test_stream_does_not_wait_for_profiles(self, monkeypatch):
+        """Test that streamed analyses send the full texts without extracting profiles."""
+        fetched = []
+        
+        async def get_profiles(*args):
+            fetched.append(args)
+            return dict(TestJDProfiles.PROFILE), dict(self.PROFILE)
+        
+        async def fake_stream(resume_text, job_description_text, backend, jd_profile=None, resume_profile=None):
+            yield "match_percentage", 70
+            yield "result", {"match_percentage": 70, "missing_skills": [], "improvement_suggestions": [], "profiles": (jd_profile, resume_profile)}
+        
+        async def no_cache(*args):
+            return None
+        
+        backend = SimpleNamespace(name="fake", configured=True, cache_namespace="test:model", context_tokens=16385)
+        monkeypatch.setattr(profiles, "RESUME_PROFILE_ENABLED", True)
+        monkeypatch.setattr(profiles, "JD_PROFILE_ENABLED", True)
+        monkeypatch.setattr(analysis_service, "get_profiles", get_profiles)
+        monkeypatch.setattr(analysis_service, "select_backend", lambda name, priority: backend)
+        monkeypatch.setattr(analysis_service, "stream_resume_vs_jd", fake_stream)
+        monkeypatch.setattr(analysis_service, "get_cached_result", no_cache)
+        monkeypatch.setattr(analysis_service, "store_cached_result", no_cache)
+        resume = "Senior engineer, six years of Python and payments work. " * 40
+        jd = "Senior backend engineer for our payments platform. " * 20
+        
+        async def scenario():
+            return [event async for event in analysis_service.stream_analysis(resume, jd)]
+        
+        events = asyncio.run(scenario())
+        assert events[1] == ("match_percentage", 70)
+        assert events[-1][1]["profiles"] == (None, None)
+        assert fetched == []
+
+
+class TestPromptCompression:
+    """Tests for prompt compression and token budgeting"""
+    
+    JD = (
+        "We need a Python engineer with Kubernetes and AWS experience.\n\n"
+        "Benefits:\nFree lunch, gym and unlimited PTO.\n\n"
+        "We are an equal opportunity employer and value every applicant."
+    )
+    
+    def test_boilerplate_removed(self):
+        """Test that benefits sections and EEO statements are stripped."""
+        cleaned = strip_boilerplate(normalize_whitespace(self.JD))
+        assert "Python engineer" in cleaned
+        assert "Free lunch" not in cleaned
+        assert "equal opportunity" not in cleaned
+    
+    def test_whitespace_normalized(self):
+        """Test that runs of spaces and blank lines are collapsed."""
+        assert normalize_whitespace("  Jane   Doe \r\n\n\n\nPython\t dev ") == "Jane Doe\n\nPython dev"
+    
+    def test_budget_keeps_relevant_paragraphs(self):
+        """Test that over budget, the opening and the most relevant paragraphs are kept."""
+        filler = [f"Studied medieval poetry and archival methods, term {i}." for i in range(40)]
+        resume = "Jane Doe, jane@example.com\n\nEXPERIENCE\n" + "\n\n".join(
+            filler[:20] + ["Built Python services on Kubernetes and AWS."] + filler[20:]
+        )
+        fitted_resume, fitted_jd = fit_to_budget(resume, "Python engineer with Kubernetes and AWS.", 60)
+        assert fitted_jd == "Python engineer with Kubernetes and AWS."
+        assert fitted_resume.startswith("Jane Doe")
+        assert "EXPERIENCE\n" in fitted_resume
+        assert "Built Python services on Kubernetes and AWS." in fitted_resume
+        assert len(fitted_resume) < len(resume) // 4
+    
+    def test_short_inputs_unchanged_and_savings_counted(self):
+        """Test that inputs within budget are only cleaned, and savings reach the metrics."""
+        before = prompt_tokens_saved.labels(document="jd", step="boilerplate")._value.get()
+        inputs = compress_inputs("Jane Doe, Python developer with five years of experience.", self.JD)
+        assert inputs.resume_prompt_text == inputs.resume_text
+        assert inputs.job_description_prompt_text == "We need a Python engineer with Kubernetes and AWS experience."
+        assert prompt_tokens_saved.labels(document="jd", step="boilerplate")._value.get() > before
+
+
+class TestChunkedAnalysis:
+    """Tests for map-reduce analysis of oversized inputs"""
+    
+    def test_split_into_chunks(self):
+        """Test that chunks stay within budget, keep every paragraph and repeat headings."""
+        paragraphs = [f"Built payment service number {i} in Python on AWS." for i in range(60)]
+        text = "Jane Doe\n\nEXPERIENCE\n" + "\n\n".join(paragraphs)
+        chunks = split_into_chunks(text, 100)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 110 for chunk in chunks)
+        assert all(chunk.startswith("EXPERIENCE") for chunk in chunks[1:])
+        assert all(any(paragraph in chunk for chunk in chunks) for paragraph in paragraphs)
+    
+    def test_merge_is_weighted_and_deduplicated(self):
+        """Test the merge rule: best resume chunk per JD chunk, weighted by JD chunk size."""
+        def result(score, missing, suggestions):
+            return {"match_percentage": score, "missing_skills": missing, "improvement_suggestions": suggestions}
+        
+        results = [
+            [result(40, ["Kafka", "Python"], ["Add metrics"]), result(80, ["kafka"], ["Add metrics", "Quantify impact"])],
+            [result(20, ["Spark"], ["Mention Spark"]), result(10, ["Spark", "Airflow"], [])]
+        ]
+        merged = merge_chunk_results(results, [300, 100], "Senior Python engineer")
+        assert merged["match_percentage"] == 65
+        assert merged["missing_skills"] == ["Kafka", "Spark", "Airflow"]
+        assert merged["improvement_suggestions"] == ["Add metrics", "Quantify impact", "Mention Spark"]
+    
+    def test_chunks_analyzed_concurrently(self, monkeypatch):
+        """Test that chunk calls run concurrently and cover the whole resume."""
+        calls = []
+        in_flight = {"now": 0, "max": 0}
+        
+        async def fake_analyze(resume_text, job_description_text, priority, backend, jd_profile, resume_profile):
+            calls.append(resume_text)
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return {"match_percentage": 50, "missing_skills": [], "improvement_suggestions": []}
+        
+        monkeypatch.setattr(chunking, "analyze_resume_vs_jd", fake_analyze)
+        backend = SimpleNamespace(configured=True, context_tokens=3000)
+        resume = "\n\n".join(f"Built payment service number {i} in Python on AWS." for i in range(200))
+        result = asyncio.run(analyze_chunked(resume, "We need a Python engineer with AWS experience.", "interactive", backend))
+        assert result["match_percentage"] == 50
+        assert len(calls) > 1
+        assert in_flight["max"] == len(calls)
+        assert "service number 199" in calls[-1]
+    
+    def test_oversized_inputs_are_chunked_not_compressed(self, monkeypatch):
+        """Test that chunking is decided on the cleaned texts, with compression at its defaults."""
+        calls = []
+        
+        async def fake_analyze(resume_text, job_description_text, priority, backend, jd_profile, resume_profile):
+            calls.append(resume_text)
+            return {"match_percentage": 50, "missing_skills": [], "improvement_suggestions": []}
+        
+        async def no_profiles(*args):
+            return None, None
+        
+        monkeypatch.setattr(chunking, "analyze_resume_vs_jd", fake_analyze)
+        monkeypatch.setattr(analysis_service, "get_profiles", no_profiles)
+        backend = SimpleNamespace(name="fake", configured=True, context_tokens=16385)
+        resume = "EXPERIENCE\n" + "\n\n".join(
+            f"Led migration {i} of a billing platform to Python microservices on AWS, cutting latency by {i % 40 + 10}%."
+            for i in range(1500)
+        )
+        jd = "We are hiring a senior Python engineer with AWS, Kafka and Kubernetes experience. " * 40
+        
+        async def scenario():
+            inputs, jd_profile, resume_profile = await analysis_service.prepare_inputs(resume, jd, backend, "interactive")
+            result = await analysis_service.analyze_inputs(inputs, "interactive", backend, jd_profile, resume_profile)
+            return inputs, result
+        
+        inputs, result = asyncio.run(scenario())
+        assert estimate_tokens(resume) > 30000
+        assert inputs.resume_prompt_text == inputs.resume_text
+        assert result["match_percentage"] == 50
+        assert len(calls) > 1
+        assert "migration 1499 " in "".join(calls)
+    
+    def test_too_small_context_falls_back_to_compression(self):
+        """Test that a context window without room for real chunks is not chunked."""
+        backend = SimpleNamespace(name="tiny", configured=True, context_tokens=1200)
+        resume = "Built payment services in Python on AWS. " * 400
+        jd = "We need a Python engineer with AWS experience. " * 100
+        assert not chunking.needs_chunking(resume, jd, backend)
+        with pytest.raises(ValueError):
+            asyncio.run(analyze_chunked(resume, jd, "interactive", backend))
+    
+    def test_failed_chunk_cancels_the_others(self, monkeypatch):
+        """Test that the first failing chunk call cancels the calls still running."""
+        cancelled = []
+        
+        async def fake_analyze(resume_text, job_description_text, priority, backend, jd_profile, resume_profile):
+            if "number 0." in resume_text:
+                raise RuntimeError("upstream down")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(resume_text)
+                raise
+        
+        monkeypatch.setattr(chunking, "analyze_resume_vs_jd", fake_analyze)
+        backend = SimpleNamespace(name="fake", configured=True, context_tokens=3000)
+        resume = "\n\n".join(f"Built payment service number {i}. in Python on AWS." for i in range(200))
+        
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await analyze_chunked(resume, "We need a Python engineer with AWS experience.", "interactive", backend)
+            await asyncio.sleep(0)
+            return len(cancelled)
+        
+        # Counted before asyncio.run cancels whatever is left at shutdown
+        assert asyncio.run(scenario()) > 0
+
+
+class TestCascade:
+    """Tests for cheap-model-first routing with escalation"""
+    
+    CHEAP = SimpleNamespace(name="cheap", configured=True)
+    STRONG = SimpleNamespace(name="strong", configured=True)
+    
+    def run(self, monkeypatch, first, high_priority=False, strong_error=None):
+        """Run the cascade with a cheap answer or error, returning the result and the backends called."""
+        monkeypatch.setattr(cascade, "escalation_backend", lambda backend: self.STRONG if backend is self.CHEAP else None)
+        called = []
+        
+        async def analyze(backend):
+            called.append(backend.name)
+            if backend is self.CHEAP:
+                if isinstance(first, Exception):
+                    raise first
+                return {"match_percentage": first, "missing_skills": [], "improvement_suggestions": []}
+            if strong_error:
+                raise strong_error
+            return {"match_percentage": 99, "missing_skills": [], "improvement_suggestions": []}
+        
+        result = asyncio.run(run_cascade(analyze, self.CHEAP, high_priority))
+        return result["match_percentage"], called
+    
+    def test_parse_settings(self):
+        """Test parsing escalation routes and the borderline band."""
+        assert parse_escalation_routes("openai=openai-strong, local=openai") == {"openai": "openai-strong", "local": "openai"}
+        assert parse_escalation_band("40-70") == (40, 70)
+        with pytest.raises(ValueError):
+            parse_escalation_routes("openai=openai")
+        with pytest.raises(ValueError):
+            parse_escalation_band("70-40")
+    
+    def test_clear_results_stay_on_cheap_backend(self, monkeypatch):
+        """Test that clear matches and mismatches are not escalated."""
+        assert self.run(monkeypatch, 90) == (90, ["cheap"])
+        assert self.run(monkeypatch, 10) == (10, ["cheap"])
+    
+    def test_borderline_and_invalid_escalate(self, monkeypatch):
+        """Test escalation on a borderline score and on an invalid answer."""
+        assert self.run(monkeypatch, 55) == (99, ["cheap", "strong"])
+        assert self.run(monkeypatch, InvalidLLMResponse("Missing required field")) == (99, ["cheap", "strong"])
+    
+    def test_high_priority_goes_direct(self, monkeypatch):
+        """Test that high-priority analyses skip the cheap backend."""
+        assert self.run(monkeypatch, 55, high_priority=True) == (99, ["strong"])
+    
+    def test_failed_escalation_keeps_valid_answer(self, monkeypatch):
+        """Test that a borderline answer is served when the stronger backend fails."""
+        assert self.run(monkeypatch, 55, strong_error=Exception("upstream down")) == (55, ["cheap", "strong"])
+    
+    def test_streamed_borderline_answer_does_not_skip_escalation(self, monkeypatch):
+        """Test that a streamed, unescalated answer is not served to later analyses."""
+        cheap = SimpleNamespace(name="cheap", configured=True, cache_namespace="test:cheap", context_tokens=16385)
+        strong = SimpleNamespace(name="strong", configured=True, cache_namespace="test:strong", context_tokens=16385)
+        
+        async def fake_stream(resume_text, job_description_text, backend, jd_profile=None, resume_profile=None):
+            yield "match_percentage", 55
+            yield "result", {"match_percentage": 55, "missing_skills": [], "improvement_suggestions": []}
+        
+        async def fake_analyze(resume_text, job_description_text, priority, backend, jd_profile=None, resume_profile=None):
+            score = 55 if backend is cheap else 99
+            return {"match_percentage": score, "missing_skills": [], "improvement_suggestions": []}
+        
+        monkeypatch.setattr(cascade, "escalation_backend", lambda backend: strong if backend is cheap else None)
+        monkeypatch.setattr(analysis_service, "select_backend", lambda name, priority: cheap)
+        monkeypatch.setattr(analysis_service, "stream_resume_vs_jd", fake_stream)
+        monkeypatch.setattr(analysis_service, "analyze_resume_vs_jd", fake_analyze)
+        monkeypatch.setattr(analysis_service, "NEAR_DUPLICATE_ENABLED", False)
+        resume = "Backend engineer with Python, Go and PostgreSQL, building billing systems for seven years."
+        jd = "Cascade check: senior backend engineer for billing, Python and PostgreSQL, Kafka a plus."
+        
+        async def scenario():
+            streamed = [event async for event in analysis_service.stream_analysis(resume, jd)]
+            return streamed, await analysis_service.run_analysis(resume, jd)
+        
+        streamed, (result, cached) = asyncio.run(scenario())
+        assert streamed[-1][1]["match_percentage"] == 55
+        assert (result["match_percentage"], cached) == (99, False)
+
+
+class TestNearDuplicates:
+    """Tests for the SimHash near-duplicate index"""
+    
+    RESUME = "\n".join([
+        "Jane Doe - Senior Backend Engineer. Phone: 555-0100. Email: jane.doe@example.com",
+        "Summary: eight years building Python services with FastAPI, Django and PostgreSQL.",
+        "Acme Payments, Staff Engineer, 2020-2024: led the migration of a monolith to Kubernetes on AWS,",
+        "cutting deploy times by half; designed event pipelines with Kafka and Redis; owned payments on-call.",
+        "Mentored four engineers, ran the architecture review and wrote the incident response playbook.",
+        "Globex Logistics, Backend Engineer, 2016-2020: built shipment tracking APIs serving 2M requests a day,",
+        "moved batch jobs to Celery, introduced contract tests and cut p99 latency from 900ms to 180ms.",
+        "Initech, Junior Developer, 2014-2016: maintained Django admin tools and reporting with pandas.",
+        "Skills: Python, Go, SQL, FastAPI, Django, PostgreSQL, Redis, Kafka, Kubernetes, Docker, Terraform,",
+        "AWS (ECS, Lambda, RDS), GitHub Actions, Prometheus, Grafana, OpenTelemetry.",
+        "Education: BSc Computer Science, State University, 2014. Certified Kubernetes Administrator.",
+        "Projects: open-source maintainer of a rate limiting library; speaker at PyCon on async Python."
+    ])
+    JD = (
+        "We are hiring a backend engineer to build Python APIs with FastAPI. "
+        "You will run services on Kubernetes and AWS, work with PostgreSQL and Kafka, "
+        "and improve our CI/CD pipelines. Five years of experience required."
+    )
+    RESULT = {"match_percentage": 82, "missing_skills": ["GraphQL"], "improvement_suggestions": ["Mention API design"]}
+    
+    def test_small_edits_stay_within_distance(self):
+        """Test that a changed phone number moves the fingerprint by a few bits only."""
+        edited = self.RESUME.replace("555-0100", "555-0199")
+        unrelated = "Registered nurse for ICU night shifts, patient care and medication administration."
+        assert hamming_distance(simhash(self.RESUME), simhash(edited)) <= 3
+        assert hamming_distance(simhash(self.RESUME), simhash(unrelated)) > 10
+    
+    def test_lookup_matches_near_pairs_in_scope(self):
+        """Test banded lookup within the distance, and that scopes are kept apart."""
+        index = NearDuplicateIndex(max_distance=3, max_entries=10)
+        index.add(pair_signature(self.RESUME, self.JD, "openai:v1"), self.RESULT)
+        
+        edited = self.RESUME.replace("555-0100", "555-0199")
+        assert index.lookup(pair_signature(edited, self.JD, "openai:v1")) == self.RESULT
+        assert index.lookup(pair_signature(edited, self.JD, "openai:v2")) is None
+        assert index.lookup(pair_signature(edited, "Registered nurse for ICU night shifts and patient care.", "openai:v1")) is None
+    
+    def test_exact_recall_at_max_distance(self):
+        """Test that any fingerprint within the distance is found, whatever bits differ."""
+        index = NearDuplicateIndex(max_distance=3, max_entries=10)
+        signature = pair_signature(self.RESUME, self.JD, "openai:v1")
+        index.add(signature, self.RESULT)
+        for bits in ((0, 1, 2), (15, 16, 47), (60, 61, 63)):
+            flipped = signature.resume
+            for bit in bits:
+                flipped ^= 1 << bit
+            assert index.lookup(signature._replace(resume=flipped, jd=signature.jd ^ (1 << 33))) == self.RESULT
+        assert index.lookup(signature._replace(resume=signature.resume ^ 0b1111)) is None
+    
+    def test_eviction_keeps_newest(self):
+        """Test that the oldest pairs are evicted beyond max_entries."""
+        index = NearDuplicateIndex(max_distance=3, max_entries=1)
+        old = pair_signature(self.RESUME, self.JD, "openai:v1")
+        new = pair_signature("Registered nurse for ICU night shifts and patient care.", self.JD, "openai:v1")
+        index.add(old, self.RESULT)
+        index.add(new, {**self.RESULT, "match_percentage": 10})
+        assert len(index) == 1
+        assert index.lookup(old) is None
+        assert index.lookup(new)["match_percentage"] == 10
+    
+    def test_rebuild_from_analyses(self, monkeypatch):
+        """Test that the index is rebuilt from the signatures stored with analyses."""
+        signature = pair_signature(self.RESUME, self.JD, "openai:v1")
+        
+        async def documents(limit):
+            return [{**self.RESULT, "near_duplicate": signature_document(signature)}]
+        
+        monkeypatch.setattr(database, "get_near_duplicate_documents", documents)
+        asyncio.run(rebuild_near_duplicate_index())
+        try:
+            assert near_duplicate_index.lookup(signature) == self.RESULT
+        finally:
+            near_duplicate_index.clear()
+
+
+class TestRevisions:
+    """Tests for incremental re-analysis of revised resumes"""
+    
+    JD = "Backend engineer with Python, FastAPI, Docker and Kubernetes experience on AWS."
+    RESUME = "\n".join([
+        "Jane Doe - Backend Engineer",
+        "",
+        "EXPERIENCE",
+        "Acme, 2019-2024: built Python APIs with FastAPI and PostgreSQL.",
+        "",
+        "SKILLS",
+        "Python, FastAPI, PostgreSQL, Redis",
+        "",
+        "EDUCATION",
+        "BSc Computer Science, 2019. " * 20
+    ])
+    PREVIOUS = {
+        "analysis_id": "65b7a8c9d1e2f3a4b5c6d7e8",
+        "match_percentage": 60,
+        "missing_skills": ["Docker", "Kubernetes"],
+        "improvement_suggestions": ["Add container experience"],
+        "revision": new_revision(RESUME, JD)
+    }
+    
+    def revise(self, monkeypatch, resume_text, jd_text=JD):
+        """Run a revision with stubbed model calls, returning its outcome and the calls made."""
+        calls = []
+        
+        async def analyze_revision(previous, changes, jd_text, priority, backend, jd_profile=None):
+            calls.append(("delta", [change.heading for change in changes]))
+            return {"match_percentage": 75, "missing_skills": ["Kubernetes"], "improvement_suggestions": []}
+        
+        async def run_analysis(resume, jd, backend=None, high_priority=False):
+            calls.append(("full", None))
+            return {"match_percentage": 90, "missing_skills": [], "improvement_suggestions": []}, False
+        
+        async def get_jd_profile(jd_text, backend, priority):
+            return None
+        
+        monkeypatch.setattr(revisions, "select_backend", lambda name, priority: SimpleNamespace(configured=True))
+        monkeypatch.setattr(revisions, "get_jd_profile", get_jd_profile)
+        monkeypatch.setattr(revisions, "analyze_revision", analyze_revision)
+        monkeypatch.setattr(revisions, "run_analysis", run_analysis)
+        return asyncio.run(run_revision_analysis(resume_text, jd_text, self.PREVIOUS)), calls
+    
+    def test_diff_sections(self):
+        """Test changed, added and removed sections, ignoring whitespace-only edits."""
+        revised = self.RESUME.replace("PostgreSQL.", "PostgreSQL and Docker.").replace("Python, FastAPI, PostgreSQL,", "Python,  FastAPI, PostgreSQL,")
+        revised = revised.replace("EDUCATION", "CERTIFICATIONS\nCertified Kubernetes Administrator, 2023\n\nEDUCATION")
+        changes = diff_sections(self.RESUME, revised)
+        assert [(change.heading, bool(change.old_text), bool(change.new_text)) for change in changes] == [
+            ("EXPERIENCE", True, True),
+            ("CERTIFICATIONS", False, True)
+        ]
+        assert diff_sections(self.RESUME, self.RESUME.replace("EDUCATION", "HOBBIES"))[-1].new_text == ""
+    
+    def test_small_edit_sends_only_changed_sections(self, monkeypatch):
+        """Test that a small edit is analyzed as a delta and linked to the previous analysis."""
+        revised = self.RESUME.replace("PostgreSQL.", "PostgreSQL, Docker and Kubernetes.")
+        (result, cached, revision), calls = self.revise(monkeypatch, revised)
+        assert calls == [("delta", ["EXPERIENCE"])]
+        assert result["match_percentage"] == 75 and not cached
+        assert revision["number"] == 2 and revision["mode"] == "delta"
+        assert revision["previous_analysis_id"] == revision["root_analysis_id"] == self.PREVIOUS["analysis_id"]
+        
+        prompt = create_revision_prompt(self.PREVIOUS, diff_sections(self.RESUME, revised), self.JD)
+        assert "Docker and Kubernetes" in prompt
+        assert "BSc Computer Science" not in prompt
+        assert self.JD in prompt
+    
+    def test_unchanged_and_large_edits(self, monkeypatch):
+        """Test that an unchanged resume reuses the result and a rewrite is analyzed in full."""
+        (result, cached, revision), calls = self.revise(monkeypatch, self.RESUME.replace("\n\n", "\n\n\n"))
+        assert calls == [] and not cached and revision["mode"] == "unchanged"
+        assert result["match_percentage"] == 60 and result["reused_previous"]
+        
+        (result, cached, revision), calls = self.revise(monkeypatch, self.RESUME.replace("BSc", "MSc"))
+        assert calls == [("full", None)] and revision["mode"] == "full"
+    
+    def test_rejects_another_job_description(self, monkeypatch):
+        """Test that a revision must keep the job description of the previous analysis."""
+        with pytest.raises(ValueError):
+            self.revise(monkeypatch, self.RESUME, "Registered nurse for ICU night shifts and patient care.")
+    
+    def test_endpoint_validation(self):
+        """Test that previous_analysis_id is rejected outside synchronous LLM analysis or when malformed."""
+        payload = {"resume_text": self.RESUME, "job_description_text": self.JD, "previous_analysis_id": "not-an-id"}
+        assert client.post("/api/v1/analyze?mode=fast", json=payload).status_code == 400
+        assert client.post("/api/v1/analyze/stream", json=payload).status_code == 400
+        assert client.post("/api/v1/analyze", json=payload).status_code == 400
+        assert client.get("/api/v1/analyses/not-an-id/revisions").status_code == 400
+        payload = {"resume_text": self.RESUME, "job_description_text": self.JD, "track_revisions": True}
+        assert client.post("/api/v1/analyze?async=true", json=payload).status_code == 400
+    
+    @pytest.mark.parametrize("track_revisions", [False, True])
+    def test_resume_stored_only_when_tracking(self, monkeypatch, track_revisions):
+        """Test that the resume text is kept with an analysis only when revisions are tracked."""
+        saved = {}
+        
+        async def run_analysis(resume, jd, backend=None, high_priority=False):
+            return {"match_percentage": 60, "missing_skills": [], "improvement_suggestions": []}, False
+        
+        async def save_analysis_result(**kwargs):
+            saved.update(kwargs)
+            return "65b7a8c9d1e2f3a4b5c6d7e9"
+        
+        monkeypatch.setattr(analyze, "run_analysis", run_analysis)
+        monkeypatch.setattr(analyze, "save_analysis_result", save_analysis_result)
+        payload = {"resume_text": self.RESUME, "job_description_text": self.JD, "track_revisions": track_revisions}
+        response = client.post("/api/v1/analyze", json=payload)
+        assert response.status_code == 200
+        if track_revisions:
+            assert saved["revision"]["resume_text"] == self.RESUME.strip()
+            assert response.json()["revision"]["number"] == 1
+        else:
+            assert saved["revision"] is None
+            assert response.json()["revision"] is None
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])